@@ -1,11 +1,19 @@
 # app.py
+import hmac
 import os
 from flask import Flask, abort, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user, logout_user
 from config import Config
-from extensions import db, login_manager, migrate, csrf
+from extensions import db, login_manager, migrate, csrf, cache, storage, mailer
 from models import User, UserRole, jakarta_now
 from blueprints import init_app as init_blueprints
+from commands import init_app as init_commands
+from utils.current_profile import load_user_with_profile
+from utils.instrumentation import REQUEST_METRICS, init_instrumentation
+from utils.loading import init_strict_loading
+from utils.metrics import render_prometheus, scan_latency
+from utils.roster_index import init_roster_index
+from utils.school_cache import get_school_branding, get_subscription_status, subscription_is_valid
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -16,14 +24,28 @@ def create_app(config_class=Config):
     login_manager.init_app(app)
     migrate.init_app(app, db)
     csrf.init_app(app)
+    cache.init_app(app)
+    storage.init_app(app)
+    mailer.init_app(app)
     
     # Initialize blueprints
     init_blueprints(app)
+    init_commands(app)
+    
+    # Metrik per endpoint (opt-in, INSTRUMENTATION_ENABLED)
+    init_instrumentation(app)
+    
+    # Deteksi N+1 (opt-in, STRICT_LOADING)
+    init_strict_loading(app)
+    
+    # Roster scan QR di-invalidasi otomatis saat siswa / User.is_active berubah
+    init_roster_index(app)
     
     # User loader for Flask-Login
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Profil guru/siswa, sekolah dan langganan dimuat sekaligus
+        return load_user_with_profile(int(user_id))
     
     # Login manager settings
     login_manager.login_view = 'auth.login'
@@ -53,15 +75,15 @@ def create_app(config_class=Config):
     def inject_school_data():
         school_data = {}
         if hasattr(request, 'school_id') and request.school_id:
-            from models import School
-            school = School.query.get(request.school_id)
+            # Branding diambil dari cache, bukan query per render
+            school = get_school_branding(request.school_id)
             if school:
                 school_data = {
                     'school': school,
-                    'brand_name': school.brand_name or school.name,
-                    'primary_color': school.primary_color or '#0d6efd',
-                    'secondary_color': school.secondary_color or '#6c757d',
-                    'logo_url': school.logo_url
+                    'brand_name': school['brand_name'],
+                    'primary_color': school['primary_color'],
+                    'secondary_color': school['secondary_color'],
+                    'logo_url': school['logo_url']
                 }
         return school_data
     
@@ -76,13 +98,10 @@ def create_app(config_class=Config):
             request.endpoint in ['auth.logout', 'auth.login', 'static']):
             return
         
-        # Periksa status langganan sekolah
-        if (current_user.school_id and 
-            hasattr(current_user, 'school') and 
-            current_user.school.subscription):
-            
-            subscription = current_user.school.subscription
-            if not subscription.is_valid():
+        # Periksa status langganan sekolah (dari cache)
+        if current_user.school_id:
+            subscription = get_subscription_status(current_user.school_id)
+            if subscription['has_subscription'] and not subscription_is_valid(subscription):
                 flash('Langganan sekolah Anda telah kedaluwarsa. Silakan hubungi administrator.', 'warning')
                 
                 # Logout user jika langganan tidak valid
@@ -141,6 +160,17 @@ def create_app(config_class=Config):
     def health_check():
         return jsonify({'status': 'healthy'}), 200
     
+    # Metrik Prometheus (per proses worker); nonaktif (404) selama METRICS_TOKEN belum diset
+    @app.route('/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            abort(404)
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(403)
+        body = render_prometheus(REQUEST_METRICS + [scan_latency])
+        return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    
     return app
 
 # Create app instance
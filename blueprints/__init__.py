@@ -3,6 +3,7 @@ from .superadmin import superadmin_bp
 from .admin import admin_bp
 from .teacher import teacher_bp
 from .student import student_bp
+from .qr import qr_bp
 
 # Register all blueprints
 def init_app(app):
@@ -10,4 +11,5 @@ def init_app(app):
     app.register_blueprint(superadmin_bp, url_prefix='/superadmin')
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(teacher_bp, url_prefix='/teacher')
-    app.register_blueprint(student_bp, url_prefix='/student')
\ No newline at end of file
+    app.register_blueprint(student_bp, url_prefix='/student')
+    app.register_blueprint(qr_bp, url_prefix='/qr')
\ No newline at end of file
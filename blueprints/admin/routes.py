@@ -1,22 +1,32 @@
-from collections import Counter
 import csv
 from functools import wraps
 import secrets
 from flask import Response, current_app, render_template, redirect, url_for, flash, request, jsonify,send_file
 from flask_login import login_required, current_user
-import qrcode
 import os
-from io import BytesIO
 import base64
 from datetime import date, timedelta
-from models import EventType, TeacherAttendance, User, UserRole, School, Teacher, Student, Classroom, SchoolEvent, SchoolQRCode, Attendance, jakarta_now
+from models import EventType, TeacherAttendance, User, UserRole, School, Teacher, Student, Classroom, SchoolEvent, SchoolQRCode, Attendance, BackgroundJob, JobStatus, jakarta_now
 import io
 from extensions import db
 from . import admin_bp
 from .forms import TeacherForm, StudentForm, ClassroomForm, EventForm, SchoolSettingsForm
-import pandas as pd
-from utils.s3_helper import *
-from utils.card_generator import generate_student_card
+from utils.card_generator import student_card
+from utils.qr_render import delete_qr, student_qr_data
+from utils.school_cache import invalidate_school
+from utils.roster_index import roster_index
+from utils.loading import attendance_list, recent_attendance, student_list_options, teacher_attendance_list
+from utils.roster_search import search_students, search_teachers, student_to_dict, teacher_to_dict
+from utils.report_export import csv_response, xlsx_response
+from utils.attendance_report import monthly_recap, student_history_page, student_status_counts
+from utils.email_outbox import queue_email
+from utils.password_links import password_link_url
+from utils.jobs import enqueue, job_file_response, release_job
+from utils.card_batch import CARD_BATCH_FORMATS, CARD_BATCH_JOB_TYPE
+from utils.student_import import IMPORT_JOB_TYPE, error_report_rows, read_import_file, split_valid_rows
+from utils.attendance_summary import affected_ranges, rebuild_ranges, summary_counts
+from sqlalchemy import func
+from sqlalchemy.orm import aliased, joinedload
 from flask import send_file
 import io
 
@@ -38,29 +48,15 @@ def dashboard():
     classroom_count = Classroom.query.filter_by(school_id=current_user.school_id).count()
     
     today = jakarta_now().date()
-    today_attendance_records = Attendance.query.filter(
-        Attendance.school_id == current_user.school_id,
-        Attendance.date == today
-    ).all()
-    
-    today_attendance = len(today_attendance_records)
-    
-    # Hitung statistik status attendance
-    status_counts = Counter([a.status.value for a in today_attendance_records])
-    attendance_stats = {
-        'hadir': status_counts.get('hadir', 0),
-        'izin': status_counts.get('izin', 0),
-        'sakit': status_counts.get('sakit', 0),
-        'alpha': status_counts.get('alpha', 0)
-    }
+    # Statistik hari ini dari tabel ringkasan (satu baris per kelas)
+    attendance_stats = summary_counts(current_user.school_id, today)
+    today_attendance = attendance_stats.pop('total')
     
     # Get recent activities (mock data for now)
     recent_activities = []
 
     # 1. Ambil 5 absensi terbaru hari ini
-    absensi_terbaru = Attendance.query.filter(
-        Attendance.school_id == current_user.school_id
-    ).order_by(Attendance.created_at.desc()).limit(5).all()
+    absensi_terbaru = recent_attendance(current_user.school_id, limit=5)
 
     for a in absensi_terbaru:
         recent_activities.append({
@@ -98,7 +94,9 @@ def dashboard():
     recent_activities.sort(key=lambda x: datetime.strptime(x['time'], '%H:%M %d/%m/%Y'), reverse=True)
     # Get recent teachers and students
     recent_teachers = Teacher.query.filter_by(school_id=current_user.school_id).order_by(Teacher.created_at.desc()).limit(5).all()
-    recent_students = Student.query.filter_by(school_id=current_user.school_id).order_by(Student.created_at.desc()).limit(5).all()
+    recent_students = Student.query.options(*student_list_options())\
+                                   .filter_by(school_id=current_user.school_id)\
+                                   .order_by(Student.created_at.desc()).limit(5).all()
     
     return render_template('admin/dashboard.html',
                            teacher_count=teacher_count,
@@ -116,15 +114,8 @@ def dashboard():
 def generate_card(student_id):
 
     student = Student.query.get_or_404(student_id)
-    if not student.qr_code:
-        flash('Siswa ini belum memiliki QR code. Silakan buat terlebih dahulu.', 'warning')
-        return redirect(url_for('admin.students'))
 
-    card_image = generate_student_card(student.full_name, student.nis, student.qr_code)
-
-    if card_image is None:
-        flash('Gagal mengambil gambar QR code dari S3.', 'danger')
-        return redirect(url_for('admin.students'))
+    card_image = student_card(student.full_name, student.nis, student_qr_data(student.nis, student.school_id))
 
     return send_file(
         io.BytesIO(card_image),
@@ -136,10 +127,28 @@ def generate_card(student_id):
 @admin_bp.route('/teachers')
 @require_admin
 def teachers():
-    page = request.args.get('page', 1, type=int)
-    teachers = Teacher.query.filter_by(school_id=current_user.school_id).paginate(
-        page=page, per_page=10, error_out=False)
-    return render_template('admin/teachers.html', teachers=teachers.items, pagination=teachers)
+    filters = _teacher_filters()
+    teachers, next_cursor = search_teachers(current_user.school_id, after=request.args.get('after'), **filters)
+    return render_template('admin/teachers.html', teachers=teachers, next_cursor=next_cursor,
+                           q=filters['q'], status=request.args.get('status', ''))
+
+def _teacher_filters():
+    status = request.args.get('status', '')
+    return {
+        'q': request.args.get('q', '').strip(),
+        'is_homeroom': {'homeroom': True, 'regular': False}.get(status)
+    }
+
+@admin_bp.route('/teachers/search')
+@require_admin
+def search_teachers_json():
+    teachers, next_cursor = search_teachers(
+        current_user.school_id,
+        after=request.args.get('after'),
+        per_page=request.args.get('per_page', type=int),
+        **_teacher_filters()
+    )
+    return jsonify({'items': [teacher_to_dict(t) for t in teachers], 'next_cursor': next_cursor})
 
 @admin_bp.route('/teachers/add', methods=['GET', 'POST'])
 @require_admin
@@ -182,30 +191,23 @@ def add_teacher():
             is_homeroom=False
         )
         db.session.add(teacher)
+
+        # Email akun masuk outbox di transaksi yang sama, dikirim oleh worker
+        body = f"""
+Halo {teacher.full_name},
+
+Akun guru Anda telah dibuat dengan username: {user.username}
+
+Atur password Anda melalui link berikut (sekali pakai):
+{password_link_url(user)}
+
+Setelah itu silakan login di {url_for('auth.login', _external=True)}
+"""
+        queue_email(user.email, "Akun Guru Baru", body, school_id=current_user.school_id)
         db.session.commit()
 
-        # Kirim email via Gmail API
-        try:
-            from utils.sendgrid_helper import send_email  # ganti gmail_helper
-            body = f"""
-        Halo {teacher.full_name},
-
-        Akun guru Anda telah dibuat:
-        Username: {user.username}
-        Password: {password}
-
-        Silakan login di {url_for('auth.login', _external=True)}
-        """
-            response = send_email(user.email, "Akun Guru Baru", body)
-            
-            if 200 <= response['status_code'] < 300:
-                flash('Akun guru berhasil dibuat dan email terkirim!', 'success')
-            else:
-                flash('Akun guru dibuat, tapi gagal kirim email', 'warning')
-        except Exception as e:
-            flash(f'Akun guru dibuat, tapi gagal kirim email: {str(e)}', 'warning')
-
-            return redirect(url_for('admin.teachers'))
+        flash('Akun guru berhasil dibuat, email akun akan segera dikirim.', 'success')
+        return redirect(url_for('admin.teachers'))
     
     return render_template('admin/add_teacher.html', form=form)
 
@@ -259,11 +261,16 @@ def delete_teacher(teacher_id):
         school_id=current_user.school_id
     ).first_or_404()
 
+    # Absensi yang dicatat guru ini ikut terhapus (cascade), ringkasan dihitung ulang
+    ranges = affected_ranges(Attendance.recorded_by == teacher.id)
+
     # Delete associated user account
     if teacher.user:
         db.session.delete(teacher.user)
     
     db.session.delete(teacher)
+    db.session.flush()
+    rebuild_ranges(current_user.school_id, ranges)
     db.session.commit()
     flash('Data guru berhasil dihapus!', 'success')
     return redirect(url_for('admin.teachers'))
@@ -271,11 +278,27 @@ def delete_teacher(teacher_id):
 @admin_bp.route('/students')
 @require_admin
 def students():
-    page = request.args.get('page', 1, type=int)
-    students = Student.query.filter_by(school_id=current_user.school_id).paginate(
-        page=page, per_page=10, error_out=False)
-    classrooms = Classroom.query.filter_by(school_id=current_user.school_id).all()
-    return render_template('admin/students.html', students=students.items, pagination=students, classrooms=classrooms)
+    q = request.args.get('q', '').strip()
+    classroom_id = request.args.get('classroom_id', type=int)
+    students, next_cursor = search_students(current_user.school_id, q, classroom_id, request.args.get('after'))
+    classrooms = Classroom.query.with_entities(Classroom.id, Classroom.name)\
+                                .filter_by(school_id=current_user.school_id)\
+                                .order_by(Classroom.name).all()
+    return render_template('admin/students.html', students=students, next_cursor=next_cursor,
+                           classrooms=classrooms, q=q, classroom_id=classroom_id)
+
+@admin_bp.route('/students/search')
+@require_admin
+def search_students_json():
+    """?q= (awalan nama/NIS/NISN), classroom_id= (0 = tanpa kelas), after= (cursor), per_page="""
+    students, next_cursor = search_students(
+        current_user.school_id,
+        q=request.args.get('q'),
+        classroom_id=request.args.get('classroom_id', type=int),
+        after=request.args.get('after'),
+        per_page=request.args.get('per_page', type=int)
+    )
+    return jsonify({'items': [student_to_dict(s) for s in students], 'next_cursor': next_cursor})
 
 @admin_bp.route('/students/add', methods=['GET', 'POST'])
 @require_admin
@@ -322,21 +345,6 @@ def add_student():
         db.session.add(user)
         db.session.flush()  # supaya dapat user.id
 
-        # Generate QR code
-        qr_data = f"STUDENT:{form.nis.data}:{current_user.school_id}"
-        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-
-        # Upload QR ke S3
-        qr_filename = f"student_{form.nis.data}.png"
-        qr_url = upload_file_to_s3(img_bytes, folder='qr_codes', filename=qr_filename)
-
         # Tambah data student
         student = Student(
             school_id=current_user.school_id,
@@ -344,29 +352,30 @@ def add_student():
             nis=form.nis.data,
             nisn=form.nisn.data,
             full_name=form.full_name.data,
-            classroom_id=form.classroom_id.data if form.classroom_id.data != 0 else None,
-            qr_code=qr_url
+            classroom_id=form.classroom_id.data if form.classroom_id.data != 0 else None
         )
         db.session.add(student)
-        db.session.commit()
 
-        # Kirim email via Gmail API
-        try:
-            from utils.sendgrid_helper import send_email
-            body = f"""
+        # Email akun masuk outbox di transaksi yang sama, dikirim oleh worker
+        body = f"""
 Halo {student.full_name},
 
-Akun siswa Anda telah dibuat:
-Username: {user.username}
-Password: {password}
+Akun siswa Anda telah dibuat dengan username: {user.username}
+
+Atur password Anda melalui link berikut (sekali pakai):
+{password_link_url(user)}
 
-Silakan login di {url_for('auth.login', _external=True)}
+Setelah itu silakan login di {url_for('auth.login', _external=True)}
 """
-            send_email(user.email, "Akun Siswa Baru", body)
-        except Exception as e:
-            flash(f'Akun siswa dibuat, tapi gagal kirim email: {str(e)}', 'warning')
+        if user.email:
+            queue_email(user.email, "Akun Siswa Baru", body, school_id=current_user.school_id)
+        db.session.commit()
+        roster_index.invalidate(current_user.school_id)
+
+        if user.email:
+            flash('Akun siswa berhasil dibuat, email akun akan segera dikirim.', 'success')
         else:
-            flash('Akun siswa berhasil dibuat dan email terkirim!', 'success')
+            flash('Akun siswa berhasil dibuat tanpa email akun.', 'warning')
 
         return redirect(url_for('admin.students'))
 
@@ -409,26 +418,13 @@ def edit_student(student_id):
         student.full_name = form.full_name.data
         student.classroom_id = form.classroom_id.data if form.classroom_id.data != 0 else None
 
-        # Generate QR baru
-        qr_data = f"STUDENT:{student.nis}:{current_user.school_id}"
-        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-
-        # Hapus QR lama di S3 kalau ada
+        # QR dirender on demand dari NIS; file QR lama di storage tidak dipakai lagi
         if student.qr_code:
-            delete_file_from_s3(student.qr_code)
-
-        # Upload QR baru
-        qr_filename = f"student_{student.nis}.png"
-        student.qr_code = upload_file_to_s3(img_bytes, folder='qr_codes', filename=qr_filename)
+            delete_qr(student.qr_code)
+            student.qr_code = None
 
         db.session.commit()
+        roster_index.invalidate(current_user.school_id)
         flash('Data siswa berhasil diperbarui!', 'success')
         return redirect(url_for('admin.students'))
 
@@ -445,16 +441,21 @@ def delete_student(student_id):
         school_id=current_user.school_id
     ).first_or_404()
 
-    # Delete QR code from S3 if exists
-    if student.qr_code and student.qr_code.startswith("https://"):
-        delete_file_from_s3(student.qr_code)
+    # Delete legacy QR file from storage if exists
+    if student.qr_code:
+        delete_qr(student.qr_code)
+
+    ranges = affected_ranges(Attendance.student_id == student.id)
 
     # Delete associated user account
     if student.user:
         db.session.delete(student.user)
     
     db.session.delete(student)
+    db.session.flush()
+    rebuild_ranges(current_user.school_id, ranges)
     db.session.commit()
+    roster_index.invalidate(current_user.school_id)
     flash('Data siswa berhasil dihapus!', 'success')
     return redirect(url_for('admin.students'))
 
@@ -462,134 +463,126 @@ def delete_student(student_id):
 @admin_bp.route('/students/import', methods=['POST'])
 @require_admin
 def import_students():
-    from utils.s3_helper import upload_file_to_s3
-    import secrets
-
     if 'file' not in request.files:
         flash('Tidak ada file yang diupload', 'danger')
         return redirect(url_for('admin.students'))
     
     file = request.files['file']
-    classroom_id = request.form.get('classroom_id')
+    classroom_id = request.form.get('classroom_id', type=int)
     
     if file.filename == '':
         flash('Tidak ada file yang dipilih', 'danger')
         return redirect(url_for('admin.students'))
     
     try:
-        # Baca file
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
-        
-        # Validasi kolom
-        required_columns = ['nis', 'full_name', 'email']
-        if not all(col in df.columns for col in required_columns):
-            flash('File harus memiliki kolom: nis, full_name, email', 'danger')
-            return redirect(url_for('admin.students'))
-        
-        success_count = 0
-        error_count = 0
-        
-        for _, row in df.iterrows():
-            try:
-                nis = str(row['nis']).strip()
-                full_name = str(row['full_name']).strip()
-                email = str(row['email']).strip() if pd.notna(row['email']) and str(row['email']).strip() else f"student_{nis}@school{current_user.school_id}.local"
-                nisn = str(row['nisn']).strip() if 'nisn' in df.columns and pd.notna(row['nisn']) else None
-
-                # Cek NIS unik
-                existing_student = Student.query.filter_by(nis=nis, school_id=current_user.school_id).first()
-                if existing_student:
-                    error_count += 1
-                    continue
-                
-                # Cek email unik
-                existing_user = User.query.filter_by(email=email).first()
-                if existing_user:
-                    error_count += 1
-                    continue
-
-                # Buat password acak
-                password = secrets.token_urlsafe(8)
-
-                # Buat akun user
-                user = User(
-                    school_id=current_user.school_id,
-                    username=f"student_{nis}",
-                    email=email,
-                    role=UserRole.STUDENT
-                )
-                user.set_password(password)
-                db.session.add(user)
-                db.session.flush()  # agar user.id tersedia
-
-                # Generate QR code
-                qr = qrcode.QRCode(
-                    version=1, 
-                    error_correction=qrcode.constants.ERROR_CORRECT_L, 
-                    box_size=10, 
-                    border=4
-                )
-                qr_data = f"STUDENT:{nis}:{current_user.school_id}"
-                qr.add_data(qr_data)
-                qr.make(fit=True)
-                img = qr.make_image(fill_color="black", back_color="white")
-
-                # Simpan QR ke BytesIO
-                qr_bytes = BytesIO()
-                img.save(qr_bytes, format='PNG')
-                qr_bytes.seek(0)
-
-                # Upload ke S3
-                qr_filename = f"student_{nis}.png"
-                qr_s3_url = upload_file_to_s3(qr_bytes, folder='qr_codes', filename=qr_filename)
-
-                # Buat record student
-                student = Student(
-                    school_id=current_user.school_id,
-                    user_id=user.id,
-                    nis=nis,
-                    nisn=nisn,
-                    full_name=full_name,
-                    classroom_id=classroom_id if classroom_id else None,
-                    qr_code=qr_s3_url
-                )
-                db.session.add(student)
-
-                # Kirim email
-                try:
-                    from utils.sendgrid_helper import send_email
-                    body = f"""
-Halo {student.full_name},
+        rows = read_import_file(file, current_user.school_id)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin.students'))
+    except Exception as e:
+        flash(f'Error memproses file: {str(e)}', 'danger')
+        return redirect(url_for('admin.students'))
 
-Akun siswa Anda telah dibuat:
-Username: {user.username}
-Password: {password}
+    # Validasi seluruh file sekaligus sebelum ada baris yang ditulis
+    valid_rows, rejected_rows = split_valid_rows(rows, current_user.school_id)
 
-Silakan login di {url_for('auth.login', _external=True)}
-"""
-                    send_email(user.email, "Akun Siswa Baru", body)
-                except Exception as e:
-                    # Gagal kirim email, tapi tetap hitung siswa berhasil
-                    flash(f'Akun {full_name} dibuat, tapi gagal kirim email: {str(e)}', 'warning')
+    # Pembuatan akun, QR dan email dijalankan worker; file bersih langsung diantrikan,
+    # file dengan error menunggu konfirmasi admin di halaman pratinjau
+    job = enqueue(IMPORT_JOB_TYPE, {
+        'school_id': current_user.school_id,
+        'classroom_id': classroom_id or None,
+        'login_url': url_for('auth.login', _external=True),
+        'base_url': request.host_url,  # link set password di email akun
+        'rows': valid_rows,
+        'rejected': rejected_rows
+    }, school_id=current_user.school_id, created_by=current_user.id, staged=bool(rejected_rows))
 
-                success_count += 1
+    if rejected_rows:
+        return redirect(url_for('admin.import_preview', job_id=job.id))
 
-            except Exception as e:
-                error_count += 1
-                continue
-        
-        db.session.commit()
-        flash(f'Import selesai: {success_count} siswa berhasil, {error_count} gagal', 'success')
+    flash(f'Import {len(valid_rows)} siswa sedang diproses di latar belakang.', 'info')
+    return redirect(url_for('admin.students', import_job=job.id))
 
-    except Exception as e:
-        flash(f'Error memproses file: {str(e)}', 'danger')
-    
+
+def _get_import_job(job_id):
+    return BackgroundJob.query.filter_by(
+        id=job_id,
+        school_id=current_user.school_id,
+        job_type=IMPORT_JOB_TYPE
+    ).first_or_404()
+
+
+@admin_bp.route('/students/import/<int:job_id>')
+@require_admin
+def import_preview(job_id):
+    job = _get_import_job(job_id)
+    if job.status != JobStatus.STAGED:
+        return redirect(url_for('admin.students', import_job=job.id))
+
+    payload = job.payload or {}
+    return render_template('admin/import_preview.html',
+                           job=job,
+                           valid_count=len(payload.get('rows', [])),
+                           rejected=payload.get('rejected', []))
+
+
+@admin_bp.route('/students/import/<int:job_id>/confirm', methods=['POST'])
+@require_admin
+def import_confirm(job_id):
+    job = _get_import_job(job_id)
+    if job.status == JobStatus.STAGED:
+        if not (job.payload or {}).get('rows'):
+            db.session.delete(job)
+            db.session.commit()
+            flash('Tidak ada baris valid untuk diimport.', 'warning')
+            return redirect(url_for('admin.students'))
+        release_job(job)
+        flash(f"Import {len(job.payload['rows'])} siswa valid sedang diproses di latar belakang.", 'info')
+    return redirect(url_for('admin.students', import_job=job.id))
+
+
+@admin_bp.route('/students/import/<int:job_id>/cancel', methods=['POST'])
+@require_admin
+def import_cancel(job_id):
+    job = _get_import_job(job_id)
+    if job.status == JobStatus.STAGED:
+        db.session.delete(job)
+        db.session.commit()
+        flash('Import dibatalkan.', 'info')
     return redirect(url_for('admin.students'))
 
 
+@admin_bp.route('/students/import/<int:job_id>/errors')
+@require_admin
+def import_errors(job_id):
+    job = _get_import_job(job_id)
+    return csv_response(
+        ['Baris', 'NIS', 'Nama Lengkap', 'Email', 'Kesalahan'],
+        error_report_rows(job),
+        f'error_import_siswa_{job.id}.csv'
+    )
+
+
+@admin_bp.route('/jobs/<int:job_id>')
+@require_admin
+def job_status(job_id):
+    job = BackgroundJob.query.filter_by(
+        id=job_id,
+        school_id=current_user.school_id
+    ).first_or_404()
+    return jsonify(job.to_dict())
+
+
+@admin_bp.route('/jobs/<int:job_id>/download')
+@require_admin
+def job_download(job_id):
+    job = BackgroundJob.query.filter_by(
+        id=job_id,
+        school_id=current_user.school_id
+    ).first_or_404()
+    return job_file_response(job)
+
+
 @admin_bp.route('/students/<int:student_id>')
 @require_admin
 def view_student(student_id):
@@ -598,19 +591,10 @@ def view_student(student_id):
         school_id=current_user.school_id
     ).first_or_404()
     
-    # Get attendance records
-    attendance_records = Attendance.query.filter_by(
-        student_id=student_id
-    ).order_by(Attendance.date.desc()).limit(50).all()
-    
-    # Calculate attendance stats
-    total_attendance = len(attendance_records)
-    attendance_stats = {
-        'hadir': len([a for a in attendance_records if a.status.value == 'hadir']),
-        'izin': len([a for a in attendance_records if a.status.value == 'izin']),
-        'sakit': len([a for a in attendance_records if a.status.value == 'sakit']),
-        'alpha': len([a for a in attendance_records if a.status.value == 'alpha'])
-    }
+    # 50 record terbaru untuk tabel, statistik dari GROUP BY status seluruh riwayat
+    attendance_records, _ = student_history_page(student_id, per_page=50)
+    attendance_stats = student_status_counts(student_id)
+    total_attendance = sum(attendance_stats.values())
     
     return render_template('admin/view_student.html', 
                          student=student,
@@ -648,9 +632,39 @@ def download_template():
 @admin_bp.route('/classrooms')
 @require_admin
 def classrooms():
-    classrooms = Classroom.query.filter_by(school_id=current_user.school_id).all()
-    teachers = Teacher.query.filter_by(school_id=current_user.school_id).all()
-    return render_template('admin/classrooms.html', classrooms=classrooms, teachers=teachers)
+    classrooms = Classroom.query.options(joinedload(Classroom.homeroom_teacher))\
+                                .filter_by(school_id=current_user.school_id)\
+                                .order_by(Classroom.name).all()
+    # Jumlah siswa per kelas dengan satu GROUP BY, bukan memuat semua siswa per kelas
+    student_counts = dict(
+        db.session.query(Student.classroom_id, func.count(Student.id))
+                  .filter(Student.school_id == current_user.school_id, Student.classroom_id.isnot(None))
+                  .group_by(Student.classroom_id)
+                  .all()
+    )
+    return render_template('admin/classrooms.html', classrooms=classrooms, student_counts=student_counts)
+
+@admin_bp.route('/classrooms/<int:classroom_id>/cards', methods=['POST'])
+@require_admin
+def classroom_cards(classroom_id):
+    classroom = Classroom.query.filter_by(
+        id=classroom_id,
+        school_id=current_user.school_id
+    ).first_or_404()
+
+    fmt = request.form.get('format', 'pdf')
+    if fmt not in CARD_BATCH_FORMATS:
+        fmt = 'pdf'
+
+    # Kartu satu kelas dirender oleh worker (utils/card_batch.py)
+    job = enqueue(CARD_BATCH_JOB_TYPE, {
+        'school_id': current_user.school_id,
+        'classroom_id': classroom.id,
+        'format': fmt
+    }, school_id=current_user.school_id, created_by=current_user.id)
+
+    flash(f'Kartu kelas {classroom.name} sedang dibuat.', 'info')
+    return redirect(url_for('admin.classrooms', card_job=job.id))
 
 @admin_bp.route('/classrooms/<int:classroom_id>/data')
 @require_admin
@@ -733,6 +747,7 @@ def edit_classroom(classroom_id):
             teacher.is_homeroom = True
         
         db.session.commit()
+        roster_index.invalidate(current_user.school_id)  # nama kelas ada di roster
         
         flash('Data kelas berhasil diperbarui!', 'success')
         return redirect(url_for('admin.classrooms'))
@@ -755,22 +770,11 @@ def attendance():
     # Get classrooms for filter
     classrooms = Classroom.query.filter_by(school_id=current_user.school_id).all()
     
-    # Get student attendance records
-    student_query = Attendance.query.filter_by(
-        school_id=current_user.school_id,
-        date=date
-    )
-    
-    if classroom_id:
-        student_query = student_query.filter_by(classroom_id=classroom_id)
-    
-    attendance_records = student_query.all()
+    # Get student attendance records (siswa, kelas dan guru pencatat di-load sekaligus)
+    attendance_records = attendance_list(current_user.school_id, date, classroom_id)
     
     # Get teacher attendance records for the same date
-    teacher_attendance = TeacherAttendance.query.filter_by(
-        school_id=current_user.school_id,
-        date=date
-    ).all()
+    teacher_attendance = teacher_attendance_list(current_user.school_id, date)
     
     return render_template('admin/attendance.html', 
                          attendance_records=attendance_records,
@@ -792,11 +796,67 @@ def attendance_export_form():
                          current_month=current_date.month,
                          current_year=current_date.year)
 
+def _student_export_rows(start_date, end_date, classroom_id=None):
+    """One joined, column-projected query streamed with yield_per"""
+    recorder = aliased(Teacher)
+    query = db.session.query(
+        Student.full_name,
+        Classroom.name,
+        Attendance.date,
+        Attendance.status,
+        Attendance.notes,
+        recorder.full_name
+    ).join(Student, Student.id == Attendance.student_id)\
+     .join(Classroom, Classroom.id == Attendance.classroom_id)\
+     .outerjoin(recorder, recorder.id == Attendance.recorded_by)\
+     .filter(
+        Attendance.school_id == current_user.school_id,
+        Attendance.date >= start_date,
+        Attendance.date < end_date
+    )
+
+    if classroom_id:
+        query = query.filter(Attendance.classroom_id == classroom_id)
+
+    query = query.order_by(Attendance.date, Classroom.name, Student.full_name)
+
+    for student_name, classroom_name, record_date, status, notes, teacher_name in query.yield_per(1000):
+        yield (
+            student_name,
+            classroom_name,
+            record_date.strftime('%d/%m/%Y'),
+            status.value.title(),
+            notes or '',
+            teacher_name or ''
+        )
+
+def _teacher_export_rows(start_date, end_date):
+    query = db.session.query(
+        Teacher.full_name,
+        TeacherAttendance.date,
+        TeacherAttendance.time_in,
+        TeacherAttendance.status
+    ).join(Teacher, Teacher.id == TeacherAttendance.teacher_id)\
+     .filter(
+        TeacherAttendance.school_id == current_user.school_id,
+        TeacherAttendance.date >= start_date,
+        TeacherAttendance.date < end_date
+    ).order_by(TeacherAttendance.date, Teacher.full_name)
+
+    for teacher_name, record_date, time_in, status in query.yield_per(1000):
+        yield (
+            teacher_name,
+            record_date.strftime('%d/%m/%Y'),
+            time_in.strftime('%H:%M') if time_in else '',
+            status.value.title()
+        )
+
 @admin_bp.route('/attendance/export/data')
 @require_admin
 def attendance_export():
     # Get parameters
     export_type = request.args.get('export_type', 'student')
+    export_format = request.args.get('format', 'xlsx')
     month = request.args.get('month', type=int, default=jakarta_now().month)
     year = request.args.get('year', type=int, default=jakarta_now().year)
     classroom_id = request.args.get('classroom_id', type=int)
@@ -815,107 +875,89 @@ def attendance_export():
         end_date = date(year, month + 1, 1)
     
     if export_type == 'student':
-        # Get student attendance records for the month
-        query = Attendance.query.filter(
-            Attendance.school_id == current_user.school_id,
-            Attendance.date >= start_date,
-            Attendance.date < end_date
-        )
-        
-        if classroom_id:
-            query = query.filter_by(classroom_id=classroom_id)
-        
-        attendance_records = query.all()
-        
-        # Prepare data for Excel
-        data = []
-        for record in attendance_records:
-            data.append({
-                'Nama Siswa': record.student.full_name,
-                'Kelas': record.classroom.name,
-                'Tanggal': record.date.strftime('%d/%m/%Y'),
-                'Status': record.status.value.title(),
-                'Catatan': record.notes or '',
-                'Dicatat Oleh': record.teacher.full_name if record.teacher else ''
-            })
-        
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        
-        # Create Excel file in memory
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Absensi Siswa', index=False)
-            
-            # Auto-adjust columns width
-            worksheet = writer.sheets['Absensi Siswa']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        output.seek(0)
-        
-        filename = f"absensi_siswa_{month:02d}_{year}.xlsx"
-        
+        sheet_name = 'Absensi Siswa'
+        headers = ['Nama Siswa', 'Kelas', 'Tanggal', 'Status', 'Catatan', 'Dicatat Oleh']
+        rows = _student_export_rows(start_date, end_date, classroom_id)
+        filename = f"absensi_siswa_{month:02d}_{year}"
     else:
-        # Get teacher attendance records for the month
-        teacher_attendance = TeacherAttendance.query.filter(
-            TeacherAttendance.school_id == current_user.school_id,
-            TeacherAttendance.date >= start_date,
-            TeacherAttendance.date < end_date
-        ).all()
-        
-        # Prepare data for Excel
-        data = []
-        for record in teacher_attendance:
-            data.append({
-                'Nama Guru': record.teacher.full_name,
-                'Tanggal': record.date.strftime('%d/%m/%Y'),
-                'Jam Masuk': record.time_in.strftime('%H:%M') if record.time_in else '',
-                'Status': record.status.value.title()
-            })
-        
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        
-        # Create Excel file in memory
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Absensi Guru', index=False)
-            
-            # Auto-adjust columns width
-            worksheet = writer.sheets['Absensi Guru']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        output.seek(0)
-        
-        filename = f"absensi_guru_{month:02d}_{year}.xlsx"
+        sheet_name = 'Absensi Guru'
+        headers = ['Nama Guru', 'Tanggal', 'Jam Masuk', 'Status']
+        rows = _teacher_export_rows(start_date, end_date)
+        filename = f"absensi_guru_{month:02d}_{year}"
     
-    return send_file(
-        output,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        as_attachment=True,
-        download_name=filename
-    )
+    # Baris dialirkan langsung dari cursor ke file, tanpa list/DataFrame perantara
+    if export_format == 'csv':
+        return csv_response(headers, rows, f"{filename}.csv")
+    
+    return xlsx_response([(sheet_name, headers, rows, None)], f"{filename}.xlsx")
     
+def _recap_params():
+    """Month, year and classroom filter shared by the recap page and its export"""
+    month = request.args.get('month', type=int, default=jakarta_now().month)
+    year = request.args.get('year', type=int, default=jakarta_now().year)
+    classroom_id = request.args.get('classroom_id', type=int)
+    if not (1 <= month <= 12):
+        month = jakarta_now().month
+    if year < 2000 or year > 2100:
+        year = jakarta_now().year
+    return month, year, classroom_id
+
+@admin_bp.route('/attendance/recap')
+@require_admin
+def attendance_recap():
+    month, year, classroom_id = _recap_params()
+    recap = monthly_recap(current_user.school_id, year, month, classroom_id)
+    classrooms = Classroom.query.filter_by(school_id=current_user.school_id).order_by(Classroom.name).all()
+    
+    return render_template('admin/rekap_absensi.html',
+                         recap=recap,
+                         classrooms=classrooms,
+                         selected_classroom=classroom_id,
+                         current_year=jakarta_now().year)
+
+@admin_bp.route('/attendance/recap/export')
+@require_admin
+def attendance_recap_export():
+    month, year, classroom_id = _recap_params()
+    recap = monthly_recap(current_user.school_id, year, month, classroom_id)
+    holidays = recap['holidays']
+    first_day_col = 2
+    
+    headers = ['NIS', 'Nama Siswa'] + [str(day) for day in recap['days']] + ['H', 'I', 'S', 'A']
+    holiday_cols = {first_day_col + day - 1 for day in holidays}
+    
+    def cell_format(row_index, col, value):
+        # Kolom hari libur diberi warna abu-abu
+        if col in holiday_cols:
+            return {'bg_color': '#D9D9D9', 'align': 'center'}
+        if col >= first_day_col:
+            return {'align': 'center'}
+        return None
+    
+    sheets = []
+    used_names = set()
+    for classroom in recap['classrooms']:
+        rows = [
+            [student['nis'], student['full_name']] + student['days'] +
+            [student['counts'][code] for code in ('H', 'I', 'S', 'A')]
+            for student in classroom['students']
+        ]
+        # Nama sheet Excel maksimal 31 karakter, tanpa karakter []:*?/\
+        sheet_name = ''.join(c for c in classroom['name'] if c not in '[]:*?/\\')[:31] or f"Kelas {classroom['id']}"
+        if sheet_name in used_names:
+            sheet_name = f"{sheet_name[:25]} ({classroom['id']})"
+        used_names.add(sheet_name)
+        sheets.append((sheet_name, headers, rows, {
+            'cell_format': cell_format,
+            'column_widths': {col: 4 for col in range(first_day_col, len(headers))},
+            'freeze_panes': (1, first_day_col)
+        }))
+    
+    if not sheets:
+        sheets.append(('Rekap', headers, [], None))
+    
+    return xlsx_response(sheets, f"rekap_absensi_{month:02d}_{year}.xlsx")
+
 @admin_bp.route('/events')
 @require_admin
 def events():
@@ -1021,6 +1063,7 @@ def settings():
     if form.validate_on_submit():
         form.populate_obj(school)
         db.session.commit()
+        invalidate_school(school.id)
         
         flash('Pengaturan berhasil diperbarui!', 'success')
         return redirect(url_for('admin.settings'))
@@ -1034,31 +1077,16 @@ def generate_qr():
     school_qr = SchoolQRCode.query.filter_by(school_id=current_user.school_id).first()
     
     if not school_qr:
-        # Generate QR code baru karena belum ada
-        qr = qrcode.QRCode(
-            version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4
+        # Gambar QR dirender on demand oleh blueprint qr; record hanya mencatat waktu generate
+        school_qr = SchoolQRCode(
+            school_id=current_user.school_id,
+            qr_code=url_for('qr.school_qr', school_id=current_user.school_id, fmt='png')
         )
-        qr_data = f"SCHOOL:{current_user.school_id}"
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Simpan ke memory
-        img_io = BytesIO()
-        img.save(img_io, 'PNG')
-        img_io.seek(0)
-        
-        # Upload ke S3
-        file_url = upload_file_to_s3(img_io, folder="qr_codes", filename=f"school_{current_user.school_id}.png")
-        
-        # Simpan URL ke DB
-        school_qr = SchoolQRCode(school_id=current_user.school_id, qr_code=file_url)
         db.session.add(school_qr)
         db.session.commit()
     
     # Render langsung ke template
-    return render_template('admin/school_qr.html', school_qr=school_qr)
+    return render_template('admin/school_qr.html', school_qr=school_qr, school_id=current_user.school_id)
 
 @admin_bp.route('/api/events')
 @require_admin
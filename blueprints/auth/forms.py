@@ -25,6 +25,12 @@ class ProfileForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     submit = SubmitField('Simpan Perubahan', name='update_profile')
 
+class SetPasswordForm(FlaskForm):
+    new_password = PasswordField('Password Baru', validators=[DataRequired(), Length(min=6)])
+    confirm_password = PasswordField('Konfirmasi Password', 
+                                     validators=[DataRequired(), EqualTo('new_password', message='Password tidak cocok')])
+    submit = SubmitField('Simpan Password')
+
 class PasswordForm(FlaskForm):
     current_password = PasswordField('Password Lama', validators=[DataRequired()])
     new_password = PasswordField('Password Baru', validators=[DataRequired(), Length(min=6)])
@@ -6,7 +6,8 @@ from werkzeug.security import generate_password_hash
 from extensions import db
 from models import User, UserRole, School, Teacher, Student
 from . import auth_bp
-from .forms import LoginForm, RegistrationForm, PasswordForm, ProfileForm
+from .forms import LoginForm, RegistrationForm, PasswordForm, ProfileForm, SetPasswordForm
+from utils.password_links import load_password_link
 from zoneinfo import ZoneInfo
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
@@ -39,6 +40,9 @@ def login():
             
             login_user(user)
             user.last_login = db.func.now()
+            # Password sudah diverifikasi, sekalian hash ulang jika method berubah
+            if user.password_needs_rehash():
+                user.set_password(form.password.data)
             db.session.commit()
             
             flash('Login berhasil!', 'success')
@@ -57,6 +61,23 @@ def login():
     
     return render_template('auth/login.html', form=form)
 
+@auth_bp.route('/set-password/<token>', methods=['GET', 'POST'])
+def set_password(token):
+    """Link sekali pakai dari email akun baru / reset password"""
+    user = load_password_link(token)
+    if user is None:
+        flash('Link tidak valid, sudah dipakai atau kedaluwarsa. Hubungi administrator.', 'danger')
+        return redirect(url_for('auth.login'))
+
+    form = SetPasswordForm()
+    if form.validate_on_submit():
+        user.set_password(form.new_password.data)
+        db.session.commit()
+        flash('Password berhasil disimpan, silakan login.', 'success')
+        return redirect(url_for('auth.login'))
+
+    return render_template('auth/set_password.html', form=form, user=user, token=token)
+
 @auth_bp.route('/logout')
 @login_required
 def logout():
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+qr_bp = Blueprint('qr', __name__)
+
+from . import routes
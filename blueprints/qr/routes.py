@@ -0,0 +1,63 @@
+from flask import Response, abort, request, url_for
+from flask_login import login_required, current_user
+from models import UserRole
+from utils.current_profile import current_student
+from utils.qr_render import QR_FORMATS, qr_etag, qr_image, school_qr_data, student_qr_data
+from . import qr_bp
+
+# Isi QR hanya bergantung pada URL (school_id + NIS), jadi aman di-cache selamanya
+QR_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+def _check_school(school_id):
+    if current_user.role != UserRole.SUPERADMIN and current_user.school_id != school_id:
+        abort(404)
+
+
+def _qr_response(qr_data, fmt, download_name):
+    if fmt not in QR_FORMATS:
+        abort(404)
+
+    etag = qr_etag(qr_data, fmt)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(qr_image(qr_data, fmt), mimetype=QR_FORMATS[fmt])
+        if request.args.get('download'):
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}.{fmt}"'
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = QR_CACHE_CONTROL
+    return response
+
+
+@qr_bp.route('/<int:school_id>/student/<nis>.<fmt>')
+@login_required
+def student_qr(school_id, nis, fmt):
+    _check_school(school_id)
+    if current_user.role == UserRole.STUDENT:
+        # Siswa hanya boleh melihat QR miliknya sendiri
+        student = current_student()
+        if not student or student.nis != nis:
+            abort(404)
+    return _qr_response(student_qr_data(nis, school_id), fmt, f"QRCode-{nis}")
+
+
+@qr_bp.route('/<int:school_id>/school.<fmt>')
+@login_required
+def school_qr(school_id, fmt):
+    _check_school(school_id)
+    if current_user.role == UserRole.STUDENT:
+        abort(404)
+    return _qr_response(school_qr_data(school_id), fmt, f"QRCode-sekolah-{school_id}")
+
+
+@qr_bp.app_template_global()
+def student_qr_url(student, fmt='png', download=False):
+    return url_for('qr.student_qr', school_id=student.school_id, nis=student.nis, fmt=fmt,
+                   download=1 if download else None)
+
+
+@qr_bp.app_template_global()
+def school_qr_url(school_id, fmt='png', download=False):
+    return url_for('qr.school_qr', school_id=school_id, fmt=fmt, download=1 if download else None)
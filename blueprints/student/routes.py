@@ -1,12 +1,16 @@
-from flask import render_template, redirect, request, url_for, flash, send_file
+from flask import render_template, redirect, request, url_for, flash
 from flask_login import login_required, current_user
 from utils.timezone import datetime
 from datetime import timedelta
 from extensions import db
-from models import User, UserRole, Student, Attendance
+from models import User, UserRole
+from utils.current_profile import current_student
+from utils.attendance_report import student_history_page, student_status_counts
 from . import student_bp
 import os
 
+STUDENT_HISTORY_PER_PAGE = 30
+
 @student_bp.before_request
 @login_required
 def require_student():
@@ -16,7 +20,7 @@ def require_student():
 
 @student_bp.route('/dashboard')
 def dashboard():
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = current_student()
     
     if not student:
         flash('Data siswa tidak ditemukan.', 'danger')
@@ -26,22 +30,10 @@ def dashboard():
     today = datetime.now().date()
     start_date = today - timedelta(days=30)  # Last 30 days
     
-    attendance_records = Attendance.query.filter(
-        Attendance.student_id == student.id,
-        Attendance.date >= start_date,
-        Attendance.date <= today
-    ).order_by(Attendance.date.desc()).all()
-    
-    # Count attendance status
-    status_count = {
-        'hadir': 0,
-        'izin': 0,
-        'sakit': 0,
-        'alpha': 0
-    }
-    
-    for record in attendance_records:
-        status_count[record.status.value] += 1
+    # Jumlah per status dihitung di database; jendela 30 hari paling banyak 31 record
+    status_count = student_status_counts(student.id, start_date, today)
+    attendance_records, _ = student_history_page(student.id, before=today + timedelta(days=1),
+                                                 per_page=31, start_date=start_date)
     
     return render_template('student/dashboard.html', 
                          student=student,
@@ -50,35 +42,37 @@ def dashboard():
 
 @student_bp.route('/attendance')
 def attendance():
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = current_student()
     if not student:
         flash("Data siswa tidak ditemukan.", "danger")
         return redirect(url_for('auth.logout'))
 
-    # Ambil semua absensi siswa
-    attendance_records = Attendance.query.filter_by(student_id=student.id)\
-                            .order_by(Attendance.date.desc()).all()
+    # Halaman berikutnya memakai cursor tanggal (?before=YYYY-MM-DD)
+    before = None
+    before_str = request.args.get('before')
+    if before_str:
+        try:
+            before = datetime.strptime(before_str, '%Y-%m-%d').date()
+        except ValueError:
+            before = None
 
-    # Hitung jumlah per status
-    status_count = {
-        'hadir': 0,
-        'izin': 0,
-        'sakit': 0,
-        'alpha': 0
-    }
-    for record in attendance_records:
-        status_count[record.status.value] += 1
+    status_count = student_status_counts(student.id)
+    attendance_records, next_cursor = student_history_page(
+        student.id, before=before, per_page=STUDENT_HISTORY_PER_PAGE
+    )
 
     return render_template(
         'student/attendance.html',
         student=student,
         attendance_records=attendance_records,
-        status_count=status_count
+        status_count=status_count,
+        before=before,
+        next_cursor=next_cursor
     )
 
 @student_bp.route('/qr_code')
 def qr_code():
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = current_student()
 
     if not student:
         flash("Data siswa tidak ditemukan.", "danger")
@@ -88,12 +82,12 @@ def qr_code():
 
 @student_bp.route('/download_qr')
 def download_qr():
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = current_student()
     
-    if not student or not student.qr_code:
+    if not student:
         flash('QR code tidak tersedia.', 'danger')
         return redirect(url_for('student.dashboard'))
     
-    # Return the QR code image file
-    return send_file(student.qr_code, as_attachment=True, 
-                    download_name=f"qr_code_{student.nis}.png")
\ No newline at end of file
+    # QR dirender on demand (dengan cache + ETag) oleh blueprint qr
+    return redirect(url_for('qr.student_qr', school_id=student.school_id, nis=student.nis,
+                            fmt='png', download=1))
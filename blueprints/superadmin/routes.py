@@ -6,8 +6,13 @@ from functools import wraps
 from werkzeug.security import generate_password_hash
 from blueprints import admin
 from extensions import db
-from models import User, UserRole, School, Teacher, Student
-from utils.sendgrid_helper import send_email
+from models import User, UserRole, School, Teacher, Student, DailyAttendanceSummary, BackgroundJob
+from utils.email_outbox import queue_email
+from utils.jobs import delete_job_files
+from utils.password_links import password_link_url
+from utils.platform_stats import MONTH_LABELS, invalidate_platform_stats, platform_overview, school_page
+from utils.school_cache import invalidate_school
+from utils.roster_index import roster_index
 from . import superadmin_bp
 from .forms import AdminRegistrationForm, SchoolForm
 from ..auth.forms import RegistrationForm
@@ -24,32 +29,30 @@ def require_superadmin(f):
 @superadmin_bp.route('/dashboard')
 @require_superadmin
 def dashboard():
-    schools = School.query.order_by(School.created_at.desc()).all()
-    admin_count = User.query.filter(User.role == UserRole.ADMIN).count()
-    
-    # Hitung sekolah per bulan
-    month_labels = ['Jan','Feb','Mar','Apr','Mei','Jun','Jul','Agu','Sep','Okt','Nov','Des']
-    month_counts = [0]*12
-    for school in schools:
-        month_index = school.created_at.month - 1
-        month_counts[month_index] += 1
+    # Total, sekolah per bulan, masa berlaku langganan: query agregat, di-cache singkat
+    overview = platform_overview()
     
     return render_template(
         'superadmin/dashboard.html',
-        schools=schools,
-        admin_count=admin_count,
-        month_labels=month_labels,
-        month_counts=month_counts
+        overview=overview,
+        schools=overview['recent_schools'],
+        admin_count=overview['admin_count'],
+        month_labels=MONTH_LABELS,
+        month_counts=overview['month_counts']
     )
 
 @superadmin_bp.route('/schools')
 @require_superadmin
 def schools():
-    schools = School.query.all()
+    q = request.args.get('q', '').strip()
+    status = request.args.get('status', '')
+    schools, next_cursor = school_page(q, status or None, after=request.args.get('after'))
     return render_template(
     'superadmin/schools.html',
     schools=schools,
-    UserRole=UserRole
+    next_cursor=next_cursor,
+    q=q,
+    status=status
 )
 
 @superadmin_bp.route('/schools/add', methods=['GET', 'POST'])
@@ -110,6 +113,7 @@ def add_school():
         db.session.add(admin_user)
         
         db.session.commit()
+        invalidate_platform_stats()
         
         flash('Sekolah dan admin berhasil ditambahkan!', 'success')
         return redirect(url_for('superadmin.schools'))
@@ -127,6 +131,8 @@ def edit_school(school_id):
     if form.validate_on_submit():
         form.populate_obj(school)
         db.session.commit()
+        invalidate_school(school.id)
+        invalidate_platform_stats()
         
         flash('Data sekolah berhasil diperbarui!', 'success')
         return redirect(url_for('superadmin.schools'))
@@ -144,9 +150,15 @@ def delete_school(school_id):
     
     # Delete all related data (users, teachers, students, etc.)
     User.query.filter_by(school_id=school_id).delete()
+    DailyAttendanceSummary.query.filter_by(school_id=school_id).delete()
+    delete_job_files(BackgroundJob.query.filter_by(school_id=school_id).all())
+    BackgroundJob.query.filter_by(school_id=school_id).delete()
     
     db.session.delete(school)
     db.session.commit()
+    invalidate_school(school_id)
+    invalidate_platform_stats()
+    roster_index.invalidate(school_id)
     
     flash('Sekolah berhasil dihapus!', 'success')
     return redirect(url_for('superadmin.schools'))
@@ -184,6 +196,7 @@ def add_admin(school_id):
 
     db.session.add(new_admin)
     db.session.commit()
+    invalidate_platform_stats()
 
     return {"success": True, "message": "Admin berhasil ditambahkan"}
 
@@ -198,6 +211,8 @@ def toggle_school_status(school_id):
 
     school.is_active = bool(data['is_active'])
     db.session.commit()
+    invalidate_school(school.id)
+    invalidate_platform_stats()
 
     status_text = "aktif" if school.is_active else "nonaktif"
     return {"success": True, "message": f"Sekolah berhasil {status_text}kan"}
@@ -210,32 +225,24 @@ def reset_password(admin_id):
         flash("User bukan admin, tidak bisa reset password.", "danger")
         return redirect(url_for('superadmin.edit_school', school_id=admin.school_id))
 
-    # Generate password random
-    import random, string
-    new_password = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
-
-    # Update password (hash)
-    admin.set_password(new_password)
-    db.session.commit()
+    # Password lama langsung tidak berlaku; password acak ini tidak dikirim ke siapa pun
+    import secrets
+    admin.set_password(secrets.token_urlsafe(16))
 
-    # Kirim email via SendGrid
+    # Link set password (bukan password baru) masuk outbox di transaksi yang sama
     subject = "Reset Password Akun Admin"
     body = f"""
 Halo {admin.username},
 
 Password akun Anda telah direset oleh Superadmin.
-Berikut login terbaru Anda:
+Atur password baru melalui link berikut (sekali pakai):
+{password_link_url(admin)}
 
 Username: {admin.username}
-Password: {new_password}
-
-Silakan login dan segera ubah password Anda.
 """
 
-    try:
-        response = send_email(to_email=admin.email, subject=subject, body=body)
-        flash(f"Password berhasil direset dan dikirim ke email admin (status {response['status_code']}).", "success")
-    except Exception as e:
-        flash(f"Gagal mengirim email: {str(e)}", "danger")
+    queue_email(admin.email, subject, body, school_id=admin.school_id)
+    db.session.commit()
+    flash("Password berhasil direset, email ke admin akan segera dikirim.", "success")
 
     return redirect(url_for('superadmin.edit_school', school_id=admin.school_id))
@@ -1,9 +1,19 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from models import AttendanceStatus, SchoolEvent, TeacherAttendance, User, UserRole, Teacher, Student, Classroom, Attendance, SchoolQRCode, jakarta_now
+from models import AttendanceStatus, BackgroundJob, SchoolEvent, TeacherAttendance, User, UserRole, Student, Classroom, Attendance, SchoolQRCode, jakarta_now
 from extensions import db
 from . import teacher_bp
 from .forms import AttendanceForm
+from utils.attendance_summary import summary_counts
+from utils.card_batch import CARD_BATCH_FORMATS, CARD_BATCH_JOB_TYPE
+from utils.attendance_writer import AttendanceWrite, upsert_attendance, CREATED, UPDATED, UNCHANGED
+from utils.current_profile import current_teacher
+from utils.jobs import enqueue, job_file_response
+from utils.loading import classroom_roster_options, student_list_options
+from utils.roster_index import roster_index
+from utils.metrics import scan_latency
+from utils.timezone import to_jakarta
+from datetime import timedelta
 import re
     
 @teacher_bp.before_request
@@ -15,15 +25,26 @@ def require_teacher():
 
 @teacher_bp.route('/dashboard')
 def dashboard():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = current_teacher()
     
     # Homeroom class
     homeroom_class = None
     if teacher and teacher.is_homeroom:
-        homeroom_class = Classroom.query.filter_by(homeroom_teacher_id=teacher.id).first()
+        homeroom_class = Classroom.query.options(*classroom_roster_options())\
+                                        .filter_by(homeroom_teacher_id=teacher.id).first()
     
     today = jakarta_now().date()
 
+    # Absensi hari ini untuk daftar siswa wali kelas, satu query (bukan riwayat per siswa)
+    today_attendance = {}
+    if homeroom_class:
+        today_attendance = {
+            record.student_id: record for record in Attendance.query.filter(
+                Attendance.classroom_id == homeroom_class.id,
+                Attendance.date == today
+            ).all()
+        }
+
     # Upcoming events khusus sekolah
     upcoming_events = SchoolEvent.query.filter(
     SchoolEvent.school_id == current_user.school_id,
@@ -35,32 +56,71 @@ def dashboard():
         Attendance.school_id == current_user.school_id
     ).order_by(Attendance.date.desc()).limit(3).all()
 
-    # Attendance stats hanya untuk homeroom class
+    # Attendance stats hanya untuk homeroom class, dari tabel ringkasan harian
     attendance_stats = {"hadir": 0, "sakit": 0, "izin": 0, "alpa": 0}
     if homeroom_class:
-        # Ambil siswa di kelas itu
-        student_ids = [s.id for s in Student.query.filter_by(classroom_id=homeroom_class.id).all()]
-        
-        # Ambil attendance hari ini untuk siswa-siswa itu
-        attendance_records = Attendance.query.filter(
-            Attendance.student_id.in_(student_ids),
-            Attendance.date == today
-        ).all()
-        
-        for a in attendance_records:
-            if a.status in attendance_stats:
-                attendance_stats[a.status] += 1
+        counts = summary_counts(current_user.school_id, today, homeroom_class.id)
+        attendance_stats = {
+            "hadir": counts['hadir'],
+            "sakit": counts['sakit'],
+            "izin": counts['izin'],
+            "alpa": counts['alpha']
+        }
 
     return render_template(
         'teacher/dashboard.html',
         teacher=teacher,
         homeroom_class=homeroom_class,
         today=today,
+        today_attendance=today_attendance,
         upcoming_events=upcoming_events,
         recent_activities=recent_activities,
         attendance_stats=attendance_stats
     )
 
+@teacher_bp.route('/homeroom/cards', methods=['POST'])
+def homeroom_cards():
+    teacher = current_teacher()
+    homeroom_class = None
+    if teacher and teacher.is_homeroom:
+        homeroom_class = Classroom.query.filter_by(homeroom_teacher_id=teacher.id).first()
+    if not homeroom_class:
+        flash('Anda bukan wali kelas.', 'danger')
+        return redirect(url_for('teacher.dashboard'))
+
+    fmt = request.form.get('format', 'pdf')
+    if fmt not in CARD_BATCH_FORMATS:
+        fmt = 'pdf'
+
+    job = enqueue(CARD_BATCH_JOB_TYPE, {
+        'school_id': current_user.school_id,
+        'classroom_id': homeroom_class.id,
+        'format': fmt
+    }, school_id=current_user.school_id, created_by=current_user.id)
+
+    flash(f'Kartu kelas {homeroom_class.name} sedang dibuat.', 'info')
+    return redirect(url_for('teacher.dashboard', card_job=job.id))
+
+
+def _get_own_job(job_id):
+    # Guru hanya bisa melihat job yang dia buat sendiri
+    return BackgroundJob.query.filter_by(
+        id=job_id,
+        school_id=current_user.school_id,
+        created_by=current_user.id
+    ).first_or_404()
+
+
+@teacher_bp.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    return jsonify(_get_own_job(job_id).to_dict())
+
+
+@teacher_bp.route('/jobs/<int:job_id>/download')
+def job_download(job_id):
+    return job_file_response(_get_own_job(job_id))
+
+
 @teacher_bp.route('/attendance', methods=['GET', 'POST'])
 def attendance():
     # Get filter parameters
@@ -77,7 +137,7 @@ def attendance():
     selected_date_display = date.strftime('%d %B %Y')
     
     # Get teacher info
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = current_teacher()
     
     # Get classrooms that the teacher can access
     if teacher and teacher.is_homeroom:
@@ -89,7 +149,7 @@ def attendance():
         classrooms = Classroom.query.filter_by(school_id=current_user.school_id).all()
     
     # Get students based on filters
-    students_query = Student.query.filter_by(school_id=current_user.school_id)
+    students_query = Student.query.options(*student_list_options()).filter_by(school_id=current_user.school_id)
     
     if classroom_id:
         students_query = students_query.filter_by(classroom_id=classroom_id)
@@ -121,6 +181,7 @@ def attendance():
             form_date = date
         
         # Process attendance for each student
+        rows = []
         for student in students:
             status_key = f"status_{student.id}"
             notes_key = f"notes_{student.id}"
@@ -129,32 +190,17 @@ def attendance():
             notes_value = request.form.get(notes_key, '')
             
             if status_value:
-                status_enum = AttendanceStatus(status_value)  # convert string ke Enum
-                
-                # Check if record already exists
-                existing_record = Attendance.query.filter_by(
+                rows.append(AttendanceWrite(
                     student_id=student.id,
-                    date=form_date
-                ).first()
-                
-                if existing_record:
-                    # Update existing record
-                    existing_record.status = status_enum
-                    existing_record.notes = notes_value
-                    existing_record.recorded_by = teacher.id if teacher else None
-                else:
-                    # Create new record
-                    new_attendance = Attendance(
-                        school_id=current_user.school_id,
-                        student_id=student.id,
-                        classroom_id=student.classroom_id,
-                        date=form_date,
-                        status=status_enum,
-                        notes=notes_value,
-                        recorded_by=teacher.id if teacher else None
-                    )
-                    db.session.add(new_attendance)
+                    date=form_date,
+                    status=AttendanceStatus(status_value),  # convert string ke Enum
+                    notes=notes_value,
+                    recorded_by=teacher.id if teacher else None,
+                    classroom_id=student.classroom_id
+                ))
 
+        # Satu upsert untuk seluruh kelas
+        upsert_attendance(current_user.school_id, rows)
         db.session.commit()
         flash('Absensi berhasil disimpan!', 'success')
         return redirect(url_for('teacher.attendance', date=date_str, classroom_id=classroom_id))
@@ -178,32 +224,22 @@ def record_attendance(student_id):
     
     if form.validate_on_submit():
         # Get teacher info
-        teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+        teacher = current_teacher()
         
-        # Check if attendance already exists for today
         today = jakarta_now().date()
-        attendance = Attendance.query.filter_by(
+        result, = upsert_attendance(current_user.school_id, [AttendanceWrite(
             student_id=student_id,
-            date=today
-        ).first()
+            date=today,
+            status=form.status.data,
+            notes=None,
+            recorded_by=teacher.id if teacher else None,
+            classroom_id=student.classroom_id
+        )])
         
-        if attendance:
-            # Update existing record
-            attendance.status = form.status.data
-            attendance.recorded_by = teacher.id if teacher else None
-            flash('Absensi berhasil diperbarui!', 'success')
-        else:
-            # Create new record
-            attendance = Attendance(
-                school_id=current_user.school_id,
-                student_id=student_id,
-                classroom_id=student.classroom_id,
-                date=today,
-                status=form.status.data,
-                recorded_by=teacher.id if teacher else None
-            )
-            db.session.add(attendance)
+        if result.outcome == CREATED:
             flash('Absensi berhasil dicatat!', 'success')
+        else:
+            flash('Absensi berhasil diperbarui!', 'success')
         
         db.session.commit()
     
@@ -277,18 +313,24 @@ def validate_qr_format(qr_data):
 
 @teacher_bp.route('/scan/process', methods=['POST'])
 def process_scan():
-    qr_data = request.form.get('qr_data', '').strip()
-    manual_status = request.form.get('status', 'hadir')  # For manual input
-    manual_notes = request.form.get('notes', '').strip()
-    
-    if not qr_data:
-        return jsonify({'success': False, 'message': 'Tidak ada data QR'})
-    
-    # Validate and parse QR data
-    qr_info, error = validate_qr_format(qr_data)
-    if error:
-        return jsonify({'success': False, 'message': error})
-    
+    with scan_latency.time('invalid') as timer:
+        qr_data = request.form.get('qr_data', '').strip()
+        manual_status = request.form.get('status', 'hadir')  # For manual input
+        manual_notes = request.form.get('notes', '').strip()
+        
+        if not qr_data:
+            return jsonify({'success': False, 'message': 'Tidak ada data QR'})
+        
+        # Validate and parse QR data
+        qr_info, error = validate_qr_format(qr_data)
+        if error:
+            return jsonify({'success': False, 'message': error})
+        
+        timer.label = qr_info['type'].lower()
+        return _process_parsed_scan(qr_info, manual_status, manual_notes)
+
+def _process_parsed_scan(qr_info, manual_status='hadir', manual_notes=''):
+    """Dispatch a parsed QR (hasil validate_qr_format) to the student/school handler"""
     # Verify school
     if qr_info['school_id'] != current_user.school_id:
         return jsonify({
@@ -297,7 +339,7 @@ def process_scan():
         })
     
     # Get teacher info
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = current_teacher()
     if not teacher:
         return jsonify({'success': False, 'message': 'Data guru tidak ditemukan'})
     
@@ -309,13 +351,10 @@ def process_scan():
         return jsonify({'success': False, 'message': 'Jenis QR code tidak dikenali'})
 
 def process_student_qr(qr_info, teacher, status='hadir', notes=''):
-    """Process student QR code for attendance"""
+    """Process student QR code for attendance (lookup via roster index, tanpa query)"""
     try:
         # Find student by NIS
-        student = Student.query.filter_by(
-            nis=qr_info['nis'],
-            school_id=current_user.school_id
-        ).first()
+        student = roster_index.lookup(current_user.school_id, qr_info['nis'])
         
         if not student:
             return jsonify({
@@ -324,7 +363,7 @@ def process_student_qr(qr_info, teacher, status='hadir', notes=''):
             })
         
         # Check if student is active
-        if not student.user or not student.user.is_active:
+        if not student.is_active:
             return jsonify({
                 'success': False, 
                 'message': f'Akun siswa {student.full_name} tidak aktif'
@@ -333,68 +372,51 @@ def process_student_qr(qr_info, teacher, status='hadir', notes=''):
         # Get today's date
         today = jakarta_now().date()
         
-        # Check if attendance already exists for today
-        existing_attendance = Attendance.query.filter_by(
-            student_id=student.id,
-            date=today
-        ).first()
+        # Insert/update dalam satu statement (aman untuk scan bersamaan)
+        result, = upsert_attendance(current_user.school_id, [AttendanceWrite(
+            student_id=student.student_id,
+            date=today,
+            status=status,
+            notes=notes if notes else None,
+            recorded_by=teacher.id,
+            classroom_id=student.classroom_id
+        )])
+        db.session.commit()
         
-        if existing_attendance:
-            # Update existing record if status is different or if it's manual input with notes
-            if existing_attendance.status.value != status or (notes and existing_attendance.notes != notes):
-                old_status = existing_attendance.status.value
-                existing_attendance.status = AttendanceStatus(status)
-                existing_attendance.recorded_by = teacher.id
-                existing_attendance.updated_at = jakarta_now()
-                
-                if notes:
-                    existing_attendance.notes = notes
-                
-                db.session.commit()
-                
-                return jsonify({
-                    'success': True,
-                    'message': f'Absensi {student.full_name} diperbarui dari {old_status.upper()} ke {status.upper()}',
-                    'student_name': student.full_name,
-                    'student_nis': student.nis,
-                    'status': status,
-                    'classroom': student.classroom.name if student.classroom else 'Belum ada kelas',
-                    'updated': True,
-                    'timestamp': jakarta_now().strftime('%H:%M:%S')
-                })
-            else:
-                return jsonify({
-                    'success': True,
-                    'message': f'{student.full_name} sudah absen hari ini',
-                    'student_name': student.full_name,
-                    'student_nis': student.nis,
-                    'status': existing_attendance.status.value,
-                    'classroom': student.classroom.name if student.classroom else 'Belum ada kelas',
-                    'already_recorded': True,
-                    'recorded_at': existing_attendance.created_at.strftime('%H:%M:%S')
-                })
+        classroom_name = student.classroom_name or 'Belum ada kelas'
+        
+        if result.outcome == UPDATED:
+            # previous_status tidak tersedia di SQLite
+            old_status = f' dari {result.previous_status.value.upper()}' if result.previous_status else ''
+            return jsonify({
+                'success': True,
+                'message': f'Absensi {student.full_name} diperbarui{old_status} ke {status.upper()}',
+                'student_name': student.full_name,
+                'student_nis': student.nis,
+                'status': status,
+                'classroom': classroom_name,
+                'updated': True,
+                'timestamp': jakarta_now().strftime('%H:%M:%S')
+            })
+        elif result.outcome == UNCHANGED:
+            return jsonify({
+                'success': True,
+                'message': f'{student.full_name} sudah absen hari ini',
+                'student_name': student.full_name,
+                'student_nis': student.nis,
+                'status': result.status.value,
+                'classroom': classroom_name,
+                'already_recorded': True,
+                'recorded_at': result.created_at.strftime('%H:%M:%S')
+            })
         else:
-            # Create new attendance record
-            attendance = Attendance(
-                school_id=current_user.school_id,
-                student_id=student.id,
-                classroom_id=student.classroom_id,
-                date=today,
-                status=AttendanceStatus(status),
-                recorded_by=teacher.id,
-                notes=notes if notes else None
-            )
-            
-            db.session.add(attendance)
-            db.session.commit()
-            
             return jsonify({
                 'success': True,
                 'message': f'Absensi {student.full_name} berhasil dicatat',
                 'student_name': student.full_name,
                 'student_nis': student.nis,
                 'status': status,
-                'classroom': student.classroom.name if student.classroom else 'Belum ada kelas',
+                'classroom': classroom_name,
                 'already_recorded': False,
                 'timestamp': jakarta_now().strftime('%H:%M:%S')
             })
@@ -473,10 +495,7 @@ def validate_qr():
         return jsonify({'valid': False, 'message': 'QR code tidak valid untuk sekolah ini'})
     
     if qr_info['type'] == 'STUDENT':
-        student = Student.query.filter_by(
-            nis=qr_info['nis'],
-            school_id=current_user.school_id
-        ).first()
+        student = roster_index.lookup(current_user.school_id, qr_info['nis'])
         
         if not student:
             return jsonify({'valid': False, 'message': f'Siswa dengan NIS {qr_info["nis"]} tidak ditemukan'})
@@ -486,7 +505,7 @@ def validate_qr():
             'type': 'student',
             'student_name': student.full_name,
             'student_nis': student.nis,
-            'classroom': student.classroom.name if student.classroom else 'Belum ada kelas'
+            'classroom': student.classroom_name or 'Belum ada kelas'
         })
     
     elif qr_info['type'] == 'SCHOOL':
@@ -498,9 +517,187 @@ def validate_qr():
     
     return jsonify({'valid': False, 'message': 'Jenis QR tidak dikenali'})
 
+def _parse_scan_time(value, now):
+    """Parse ISO-8601 scan timestamp from the device, default ke waktu sekarang"""
+    if not value:
+        return now
+    from datetime import datetime
+    scanned_at = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return to_jakarta(scanned_at)
+
+@teacher_bp.route('/scan/sync', methods=['POST'])
+def sync_scans():
+    """
+    Apply a batch of offline-queued scans in one transaction.
+    Body JSON: {"scans": [{"client_id", "qr_data", "scanned_at", "status", "notes"}]}
+    Hasil per scan dikembalikan dengan client_id yang sama agar perangkat
+    bisa menghapus antrean IndexedDB yang sudah diterima.
+    """
+    data = request.get_json(silent=True) or {}
+    scans = data.get('scans')
+    if not isinstance(scans, list):
+        return jsonify({'success': False, 'message': 'Data tidak valid'}), 400
+
+    max_batch = current_app.config.get('SCAN_SYNC_MAX_BATCH', 1000)
+    if len(scans) > max_batch:
+        return jsonify({'success': False, 'message': f'Maksimal {max_batch} scan per sinkronisasi'}), 413
+
+    teacher = current_teacher()
+    if not teacher:
+        return jsonify({'success': False, 'message': 'Data guru tidak ditemukan'})
+
+    school_id = current_user.school_id
+    teacher_id = teacher.id
+    now = jakarta_now()
+    max_age = timedelta(days=current_app.config.get('SCAN_SYNC_MAX_AGE_DAYS', 7))
+
+    results = {}
+    order = []
+    student_scans = {}   # (student_id, date) -> (client_id, scanned_at, AttendanceWrite, roster entry)
+    school_scans = {}    # date -> (client_id, scanned_at)
+    seen_client_ids = set()
+    pending = []         # scan valid: (client_id, scan, qr_info, scanned_at, scan_date)
+    for index, scan in enumerate(scans):
+        scan = scan if isinstance(scan, dict) else {}
+        client_id = str(scan.get('client_id') or index)
+
+        # Scan yang dikirim ulang (retry) cukup diproses sekali
+        if client_id in seen_client_ids:
+            continue
+        seen_client_ids.add(client_id)
+        order.append(client_id)
+
+        qr_info, error = validate_qr_format(scan.get('qr_data'))
+        if error:
+            results[client_id] = {'success': False, 'message': error}
+            continue
+        if qr_info['school_id'] != school_id:
+            results[client_id] = {'success': False, 'message': 'QR code tidak valid untuk sekolah ini'}
+            continue
+
+        try:
+            scanned_at = _parse_scan_time(scan.get('scanned_at'), now)
+        except (TypeError, ValueError):
+            results[client_id] = {'success': False, 'message': 'Waktu scan tidak valid'}
+            continue
+        if scanned_at > now + timedelta(minutes=5) or scanned_at < now - max_age:
+            results[client_id] = {'success': False, 'message': 'Waktu scan di luar rentang yang diizinkan'}
+            continue
+        scan_date = scanned_at.date()
+        pending.append((client_id, scan, qr_info, scanned_at, scan_date))
+
+    # Semua NIS batch dicari (dan dicek ulang) sekaligus, bukan satu query per scan
+    students = roster_index.lookup_many(
+        school_id, [qr_info['nis'] for _, _, qr_info, _, _ in pending if qr_info['type'] != 'SCHOOL']
+    )
+    for client_id, scan, qr_info, scanned_at, scan_date in pending:
+        if qr_info['type'] == 'SCHOOL':
+            # Absensi guru: scan paling awal di hari itu yang dipakai sebagai jam masuk
+            previous = school_scans.get(scan_date)
+            if previous and previous[1] <= scanned_at:
+                results[client_id] = {'success': True, 'duplicate': True, 'message': 'Scan ganda'}
+                continue
+            if previous:
+                results[previous[0]] = {'success': True, 'duplicate': True, 'message': 'Scan ganda'}
+            school_scans[scan_date] = (client_id, scanned_at)
+            continue
+
+        student = students.get(qr_info['nis'])
+        if not student:
+            results[client_id] = {'success': False, 'message': f'Siswa dengan NIS {qr_info["nis"]} tidak ditemukan'}
+            continue
+        if not student.is_active:
+            results[client_id] = {'success': False, 'message': f'Akun siswa {student.full_name} tidak aktif'}
+            continue
+
+        status = scan.get('status') or 'hadir'
+        try:
+            status = AttendanceStatus(status)
+        except ValueError:
+            results[client_id] = {'success': False, 'message': f'Status {status} tidak valid'}
+            continue
+
+        notes = (scan.get('notes') or '').strip() or None
+        key = (student.student_id, scan_date)
+        write = AttendanceWrite(
+            student_id=student.student_id,
+            date=scan_date,
+            status=status,
+            notes=notes,
+            recorded_by=teacher_id,
+            classroom_id=student.classroom_id,
+            recorded_at=scanned_at
+        )
+
+        # Siswa yang sama di hari yang sama: scan terbaru menentukan status,
+        # scan sebelumnya ditandai duplikat
+        previous = student_scans.get(key)
+        if previous and previous[1] > scanned_at:
+            results[client_id] = {'success': True, 'duplicate': True, 'message': f'{student.full_name} sudah discan'}
+            continue
+        if previous:
+            results[previous[0]] = {'success': True, 'duplicate': True, 'message': f'{student.full_name} sudah discan'}
+        student_scans[key] = (client_id, scanned_at, write, student)
+
+    try:
+        # Absensi siswa: satu upsert untuk seluruh batch
+        ordered = sorted(student_scans.values(), key=lambda item: item[1])
+        write_results = upsert_attendance(school_id, [item[2] for item in ordered])
+        for (client_id, scanned_at, write, student), result in zip(ordered, write_results):
+            results[client_id] = {
+                'success': True,
+                'outcome': result.outcome,
+                'student_name': student.full_name,
+                'student_nis': student.nis,
+                'classroom': student.classroom_name or 'Belum ada kelas',
+                'status': result.status.value,
+                'date': result.date.isoformat(),
+                'scanned_at': scanned_at.strftime('%H:%M:%S')
+            }
+
+        # Absensi guru: satu query untuk tanggal yang sudah tercatat
+        if school_scans:
+            existing_dates = {
+                row.date for row in TeacherAttendance.query.with_entities(TeacherAttendance.date).filter(
+                    TeacherAttendance.teacher_id == teacher_id,
+                    TeacherAttendance.date.in_(list(school_scans))
+                ).all()
+            }
+            for scan_date, (client_id, scanned_at) in school_scans.items():
+                if scan_date in existing_dates:
+                    results[client_id] = {'success': True, 'outcome': UNCHANGED, 'date': scan_date.isoformat(),
+                                          'message': 'Absensi guru sudah tercatat'}
+                    continue
+                db.session.add(TeacherAttendance(
+                    teacher_id=teacher_id,
+                    school_id=school_id,
+                    date=scan_date,
+                    status=AttendanceStatus.HADIR,
+                    time_in=scanned_at,
+                    created_at=scanned_at
+                ))
+                results[client_id] = {'success': True, 'outcome': CREATED, 'date': scan_date.isoformat(),
+                                      'message': 'Absensi guru berhasil dicatat'}
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Error sinkronisasi scan: {str(e)}'}), 500
+
+    return jsonify({
+        'success': True,
+        'processed': len(results),
+        'results': [dict(results[client_id], client_id=client_id) for client_id in order]
+    })
+
+@teacher_bp.route('/scan/stats')
+def scan_stats():
+    """Latency histogram of process_scan for this worker process"""
+    return jsonify(scan_latency.snapshot())
+
 @teacher_bp.route('/my_attendance')
 def my_attendance():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = current_teacher()
     
     if not teacher:
         flash('Data guru tidak ditemukan.', 'danger')
@@ -566,57 +763,56 @@ def bulk_attendance():
         if not data or 'students' not in data:
             return jsonify({'success': False, 'message': 'Data tidak valid'})
         
-        teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+        teacher = current_teacher()
         if not teacher:
             return jsonify({'success': False, 'message': 'Data guru tidak ditemukan'})
         
         today = jakarta_now().date()
-        processed = 0
         errors = []
         
+        # student_id dari JSON bisa string ("12"); cast ke int per baris
+        entries = []
         for student_data in data['students']:
+            raw_id = student_data.get('student_id')
+            try:
+                entries.append((int(raw_id), student_data))
+            except (TypeError, ValueError):
+                errors.append(f'Siswa ID {raw_id} tidak valid')
+        
+        # Ambil semua siswa yang dikirim dalam satu query
+        students = {
+            s.id: s for s in Student.query.filter(
+                Student.id.in_([student_id for student_id, _ in entries]),
+                Student.school_id == current_user.school_id
+            ).all()
+        } if entries else {}
+        
+        rows = []
+        for student_id, student_data in entries:
             try:
-                student_id = student_data.get('student_id')
                 status = student_data.get('status', 'hadir')
                 notes = student_data.get('notes', '')
                 
-                student = Student.query.filter_by(
-                    id=student_id,
-                    school_id=current_user.school_id
-                ).first()
+                student = students.get(student_id)
                 
                 if not student:
                     errors.append(f'Siswa ID {student_id} tidak ditemukan')
                     continue
                 
-                # Check existing attendance
-                existing = Attendance.query.filter_by(
+                rows.append(AttendanceWrite(
                     student_id=student_id,
-                    date=today
-                ).first()
-                
-                if existing:
-                    existing.status = AttendanceStatus(status)
-                    existing.notes = notes
-                    existing.recorded_by = teacher.id
-                    existing.updated_at = jakarta_now()
-                else:
-                    attendance = Attendance(
-                        school_id=current_user.school_id,
-                        student_id=student_id,
-                        classroom_id=student.classroom_id,
-                        date=today,
-                        status=AttendanceStatus(status),
-                        recorded_by=teacher.id,
-                        notes=notes
-                    )
-                    db.session.add(attendance)
-                
-                processed += 1
+                    date=today,
+                    status=AttendanceStatus(status),
+                    notes=notes,
+                    recorded_by=teacher.id,
+                    classroom_id=student.classroom_id
+                ))
                 
             except Exception as e:
-                errors.append(f'Error processing student {student_data.get("student_id", "unknown")}: {str(e)}')
+                errors.append(f'Error processing student {student_id}: {str(e)}')
         
+        results = upsert_attendance(current_user.school_id, rows)
+        processed = len(results)
         db.session.commit()
         
         return jsonify({
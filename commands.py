@@ -0,0 +1,52 @@
+# commands.py
+from datetime import datetime
+import click
+from extensions import db
+from utils.attendance_summary import rebuild_daily_summary
+from utils.email_outbox import deliver_all, purge_outbox
+from utils.jobs import purge_jobs
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+@click.command('rebuild-attendance-summary')
+@click.option('--school-id', type=int, default=None, help='Hanya sekolah ini (default semua sekolah)')
+@click.option('--start', default=None, help='Tanggal awal YYYY-MM-DD')
+@click.option('--end', default=None, help='Tanggal akhir YYYY-MM-DD (inklusif)')
+def rebuild_attendance_summary(school_id, start, end):
+    """Hitung ulang daily_attendance_summary dari tabel attendances."""
+    rows = rebuild_daily_summary(school_id, _parse_date(start), _parse_date(end))
+    db.session.commit()
+    click.echo(f"Ringkasan absensi dibangun ulang: {rows} baris.")
+
+
+@click.command('send-emails')
+def send_emails():
+    """Kirim semua email outbox yang sudah jatuh tempo."""
+    processed = deliver_all()
+    click.echo(f"Email outbox diproses: {processed}.")
+
+
+@click.command('purge-emails')
+@click.option('--days', type=int, default=None, help='Default EMAIL_RETENTION_DAYS')
+def purge_emails(days):
+    """Hapus email outbox terkirim/gagal yang lebih lama dari masa simpan."""
+    deleted = purge_outbox(days)
+    click.echo(f"Email outbox dihapus: {deleted}.")
+
+
+@click.command('purge-jobs')
+@click.option('--days', type=int, default=None, help='Default JOBS_RETENTION_DAYS')
+def purge_jobs_command(days):
+    """Hapus background job selesai/gagal yang lebih lama dari masa simpan, beserta filenya."""
+    deleted = purge_jobs(days)
+    click.echo(f"Background job dihapus: {deleted}.")
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_attendance_summary)
+    app.cli.add_command(send_emails)
+    app.cli.add_command(purge_emails)
+    app.cli.add_command(purge_jobs_command)
@@ -33,14 +33,82 @@ class Config:
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     TESTING = os.environ.get('TESTING', 'False').lower() == 'true'
     
-    # QR Code config
-    QR_CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'qr_codes')
+    # Cache config (branding sekolah, status langganan, dll.)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')  # 'memory' atau 'redis'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    SCHOOL_CACHE_TTL = int(os.environ.get('SCHOOL_CACHE_TTL', 300))
+    PLATFORM_STATS_TTL = int(os.environ.get('PLATFORM_STATS_TTL', 60))  # angka dashboard / daftar sekolah superadmin
+    
+    # Roster index untuk scan QR (NIS -> siswa di memori). Invalidasi antar worker
+    # butuh CACHE_BACKEND=redis; dengan 'memory' setiap hit dicek ulang ke database.
+    ROSTER_INDEX_TTL = int(os.environ.get('ROSTER_INDEX_TTL', 600))
+    ROSTER_MISS_RELOAD_SECONDS = int(os.environ.get('ROSTER_MISS_RELOAD_SECONDS', 30))
+    
+    # Sinkronisasi scan offline dari perangkat gerbang
+    SCAN_SYNC_MAX_BATCH = int(os.environ.get('SCAN_SYNC_MAX_BATCH', 1000))
+    SCAN_SYNC_MAX_AGE_DAYS = int(os.environ.get('SCAN_SYNC_MAX_AGE_DAYS', 7))
+    
+    # Background job (import siswa, dll.) - diproses oleh worker.py
+    JOBS_INLINE = os.environ.get('JOBS_INLINE', 'False').lower() == 'true'
+    JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 2))
+    JOBS_STALE_SECONDS = int(os.environ.get('JOBS_STALE_SECONDS', 300))
+    JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 3))
+    JOBS_RETENTION_DAYS = int(os.environ.get('JOBS_RETENTION_DAYS', 7))  # job selesai + file hasilnya dihapus worker
+    
+    # Object storage (QR code, dll.): 's3' atau 'local' (disk lokal, pengganti S3 saat development)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 's3')
+    STORAGE_LOCAL_ROOT = os.environ.get('STORAGE_LOCAL_ROOT') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
+    STORAGE_LOCAL_URL = os.environ.get('STORAGE_LOCAL_URL', '/static/uploads')
+    # File private (kartu kelas hasil job): hanya diunduh lewat route job_download
+    STORAGE_PRIVATE_ROOT = os.environ.get('STORAGE_PRIVATE_ROOT') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'private')
+    S3_PRIVATE_BUCKET_NAME = os.environ.get('S3_PRIVATE_BUCKET_NAME')  # default: bucket utama, prefix private/
+    STORAGE_UPLOAD_THREADS = int(os.environ.get('STORAGE_UPLOAD_THREADS', 16))  # Storage.put_many
+    STORAGE_UPLOAD_ATTEMPTS = int(os.environ.get('STORAGE_UPLOAD_ATTEMPTS', 3))
+    S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME')
+    AWS_REGION = os.environ.get('AWS_REGION')
+    AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
+    AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # mis. MinIO / moto server
+    S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL')  # default https://<bucket>.s3.<region>.amazonaws.com
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 32))
+    S3_MAX_ATTEMPTS = int(os.environ.get('S3_MAX_ATTEMPTS', 5))
+    
+    # Instrumentasi per endpoint (jumlah query, waktu DB, latency, ukuran response) di /metrics
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'False').lower() == 'true'
+    INSTRUMENTATION_SLOW_SECONDS = float(os.environ.get('INSTRUMENTATION_SLOW_SECONDS', 1.0))
+    INSTRUMENTATION_MAX_QUERIES = int(os.environ.get('INSTRUMENTATION_MAX_QUERIES', 30))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # wajib untuk /metrics: Authorization: Bearer <token>
+    
+    # Debug N+1: error pada lazy load berulang / relationship yang tidak di-load (utils/loading.py)
+    STRICT_LOADING = os.environ.get('STRICT_LOADING', 'False').lower() == 'true'
+    STRICT_LOADING_MAX_LAZY = int(os.environ.get('STRICT_LOADING_MAX_LAZY', 1))  # lazy load per relationship per request
+    
+    # Hash password: method Werkzeug ('pbkdf2', 'pbkdf2:sha256:600000', 'scrypt', ...);
+    # hash lama diganti otomatis saat login. Akun hasil import tidak di-hash
+    # (password diatur siswa lewat link).
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2')
+    
+    # Email akun dll. ditulis ke tabel email_outbox lalu dikirim worker.py per batch
+    EMAIL_TRANSPORT = os.environ.get('EMAIL_TRANSPORT', 'sendgrid')  # 'sendgrid' atau 'fake'
+    SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
+    SENDGRID_FROM_EMAIL = os.environ.get('SENDGRID_FROM_EMAIL')  # misal: "no-reply@hubsensi.com"
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 1000))  # maks. 1000 personalizations per request
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 60))
+    EMAIL_RETENTION_DAYS = int(os.environ.get('EMAIL_RETENTION_DAYS', 30))  # baris terkirim/gagal dihapus worker
+    # Email akun berisi link set password sekali pakai, bukan password
+    PASSWORD_LINK_MAX_AGE = int(os.environ.get('PASSWORD_LINK_MAX_AGE', 72 * 3600))
+    APP_BASE_URL = os.environ.get('APP_BASE_URL', 'http://localhost:5000')  # link di email yang dibuat worker
+    
+    # Render kartu + QR di process pool untuk batch besar
+    CARD_RENDER_PROCESSES = int(os.environ.get('CARD_RENDER_PROCESSES', 0)) or None  # kartu kelas (job class_cards)
     
     # Ensure upload directories exist
     @staticmethod
     def init_app(app):
         # Create necessary directories
-        for directory in [app.config['UPLOAD_FOLDER'], app.config['QR_CODE_DIR']]:
+        for directory in [app.config['UPLOAD_FOLDER']]:
             if not os.path.exists(directory):
                 os.makedirs(directory)
 
@@ -51,7 +119,16 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # connect_args timezone hanya untuk Postgres
     WTF_CSRF_ENABLED = False  # Disable CSRF for testing
+    CACHE_BACKEND = 'memory'
+    JOBS_INLINE = True  # job dijalankan langsung di request
+    CARD_RENDER_PROCESSES = 1  # tanpa process pool di test
+    EMAIL_TRANSPORT = 'fake'  # email dicatat di mailer.transport.sent
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # cepat untuk test, jangan di production
+    STORAGE_BACKEND = 'local'
+    STORAGE_LOCAL_ROOT = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'hubsensi-test-uploads')
+    STORAGE_PRIVATE_ROOT = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'hubsensi-test-private')
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -3,9 +3,15 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
+from utils.cache import Cache
+from utils.storage import Storage
+from utils.mailer import Mailer
 
 # Initialize extensions
 db = SQLAlchemy()
 login_manager = LoginManager()
 migrate = Migrate()
-csrf = CSRFProtect()
\ No newline at end of file
+csrf = CSRFProtect()
+cache = Cache()
+storage = Storage()
+mailer = Mailer()
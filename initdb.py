@@ -24,3 +24,4 @@ if __name__ == "__main__":
         db.drop_all()   # hati-hati: ini hapus semua tabel lama
         db.create_all()
         print("Selesai membuat tabel.")
+        print("Jalankan 'flask db stamp head' sebelum memakai 'flask db upgrade' (lihat readme.md).")
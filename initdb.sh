@@ -55,7 +55,9 @@ psql -h $DB_HOST -p $DB_PORT -U $PG_SUPERUSER -c "
 
 echo -e "${GREEN}Database and user created successfully!${NC}"
 
-# Run migrations
+# Run migrations: revisi pertama membuat semua tabel di database kosong.
+# Database yang dibuat dengan initdb.py / db.create_all() harus di-stamp
+# dulu ('flask db stamp head'), lihat readme.md.
 echo -e "${YELLOW}Running database migrations...${NC}"
 flask db upgrade
 
@@ -0,0 +1,59 @@
+"""attendance hot path indexes
+
+Revision ID: 3f1a9c2d7b10
+Revises: 1c0e7a5b9d42
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7b10'
+down_revision = '1c0e7a5b9d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hapus duplikat (student_id, date) sebelum unique index dibuat,
+    # simpan record terbaru (id terbesar)
+    op.execute(
+        """
+        DELETE FROM attendances
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MAX(id) AS keep_id FROM attendances GROUP BY student_id, date
+            ) AS latest
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM teacher_attendances
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MAX(id) AS keep_id FROM teacher_attendances GROUP BY teacher_id, date
+            ) AS latest
+        )
+        """
+    )
+
+    op.create_index('uq_attendances_student_date', 'attendances', ['student_id', 'date'], unique=True)
+    op.create_index('ix_attendances_school_date_classroom', 'attendances', ['school_id', 'date', 'classroom_id'])
+    op.create_index('ix_attendances_school_date_status', 'attendances', ['school_id', 'date', 'status'])
+    op.create_index('uq_teacher_attendances_teacher_date', 'teacher_attendances', ['teacher_id', 'date'], unique=True)
+    op.create_index('ix_students_school_nis', 'students', ['school_id', 'nis'])
+    op.create_index(op.f('ix_students_user_id'), 'students', ['user_id'])
+    op.create_index(op.f('ix_teachers_user_id'), 'teachers', ['user_id'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_teachers_user_id'), table_name='teachers')
+    op.drop_index(op.f('ix_students_user_id'), table_name='students')
+    op.drop_index('ix_students_school_nis', table_name='students')
+    op.drop_index('uq_teacher_attendances_teacher_date', table_name='teacher_attendances')
+    op.drop_index('ix_attendances_school_date_status', table_name='attendances')
+    op.drop_index('ix_attendances_school_date_classroom', table_name='attendances')
+    op.drop_index('uq_attendances_student_date', table_name='attendances')
@@ -0,0 +1,57 @@
+"""daily attendance summary
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1a9c2d7b10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f1a9c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'daily_attendance_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('school_id', sa.Integer(), nullable=False),
+        sa.Column('classroom_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('hadir', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('izin', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sakit', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('alpha', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['school_id'], ['schools.id']),
+        sa.ForeignKeyConstraint(['classroom_id'], ['classrooms.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('school_id', 'classroom_id', 'date',
+                            name='uq_daily_attendance_summary_school_classroom_date')
+    )
+
+    # Isi awal dari data absensi yang sudah ada (status disimpan sebagai nama enum)
+    op.execute(
+        """
+        INSERT INTO daily_attendance_summary
+            (school_id, classroom_id, date, hadir, izin, sakit, alpha, updated_at)
+        SELECT school_id, classroom_id, date,
+               SUM(CASE WHEN status = 'HADIR' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'IZIN' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'SAKIT' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'ALPHA' THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM attendances
+        WHERE classroom_id IS NOT NULL
+        GROUP BY school_id, classroom_id, date
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('daily_attendance_summary')
@@ -0,0 +1,39 @@
+"""roster search indexes
+
+Revision ID: a8d4e6f2c1b9
+Revises: f5c3a9e1d8b2
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4e6f2c1b9'
+down_revision = 'f5c3a9e1d8b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Urutan keyset daftar siswa/guru: (school_id, lower(full_name), id)
+    op.create_index('ix_students_school_name_lower', 'students', ['school_id', sa.text('lower(full_name)'), 'id'])
+    op.create_index('ix_teachers_school_name_lower', 'teachers', ['school_id', sa.text('lower(full_name)'), 'id'])
+
+    # Pencarian awalan (LIKE 'abc%') di Postgres butuh pattern_ops jika collation bukan "C"
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE INDEX ix_students_name_lower_prefix ON students (school_id, lower(full_name) text_pattern_ops)')
+        op.execute('CREATE INDEX ix_students_nis_prefix ON students (school_id, nis varchar_pattern_ops)')
+        op.execute('CREATE INDEX ix_students_nisn_prefix ON students (school_id, nisn varchar_pattern_ops)')
+        op.execute('CREATE INDEX ix_teachers_name_lower_prefix ON teachers (school_id, lower(full_name) text_pattern_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_teachers_name_lower_prefix', table_name='teachers')
+        op.drop_index('ix_students_nisn_prefix', table_name='students')
+        op.drop_index('ix_students_nis_prefix', table_name='students')
+        op.drop_index('ix_students_name_lower_prefix', table_name='students')
+    op.drop_index('ix_teachers_school_name_lower', table_name='teachers')
+    op.drop_index('ix_students_school_name_lower', table_name='students')
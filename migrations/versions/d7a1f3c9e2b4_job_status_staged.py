@@ -0,0 +1,28 @@
+"""job status staged
+
+Revision ID: d7a1f3c9e2b4
+Revises: c4d8e2a6b5f7
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a1f3c9e2b4'
+down_revision = 'c4d8e2a6b5f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Enum di SQLite hanya VARCHAR, cukup tambah nilai di Postgres
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'STAGED'")
+
+
+def downgrade():
+    # Postgres tidak bisa menghapus nilai enum; job STAGED dibuang saja
+    op.execute("DELETE FROM background_jobs WHERE status = 'STAGED'")
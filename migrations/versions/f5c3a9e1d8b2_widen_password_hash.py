@@ -0,0 +1,27 @@
+"""widen users.password_hash
+
+Revision ID: f5c3a9e1d8b2
+Revises: e2b6c8d4f1a7
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c3a9e1d8b2'
+down_revision = 'e2b6c8d4f1a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hash scrypt / pbkdf2 dengan parameter besar lebih dari 128 karakter
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=128), type_=sa.String(length=255))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=255), type_=sa.String(length=128))
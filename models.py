@@ -2,8 +2,9 @@
 import enum
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from extensions import db
+from utils.passwords import hash_password, needs_rehash
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
@@ -30,6 +31,20 @@ class EventType(enum.Enum):
     LIBUR = 'LIBUR'
     UJIAN = 'UJIAN'
 
+# Enum untuk status background job
+class JobStatus(enum.Enum):
+    STAGED = 'staged'  # menunggu konfirmasi admin, tidak diambil worker
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+# Enum untuk status email di outbox
+class EmailStatus(enum.Enum):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
 # Model dasar untuk semua model yang membutuhkan multi-tenant
 class BaseModel(db.Model):
     __abstract__ = True
@@ -67,7 +82,7 @@ class User(BaseModel, UserMixin):
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=True)  # Nullable untuk superadmin
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(255))  # scrypt / iterasi besar > 128 karakter
     role = db.Column(db.Enum(UserRole), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     last_login = db.Column(db.DateTime)
@@ -77,11 +92,15 @@ class User(BaseModel, UserMixin):
     student_profile = db.relationship('Student', backref='user', uselist=False, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def password_needs_rehash(self):
+        """Hash lama dibuat dengan method selain PASSWORD_HASH_METHOD"""
+        return needs_rehash(self.password_hash)
+    
     def get_id(self):
         return str(self.id)
     
@@ -91,9 +110,13 @@ class User(BaseModel, UserMixin):
 # Model untuk guru/staff
 class Teacher(BaseModel):
     __tablename__ = 'teachers'
+    __table_args__ = (
+        # Daftar/pencarian guru: urut lower(full_name), id (keyset, utils/roster_search.py)
+        db.Index('ix_teachers_school_name_lower', 'school_id', db.text('lower(full_name)'), 'id'),
+    )
     
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     nip = db.Column(db.String(20))  # Teacher ID
     full_name = db.Column(db.String(100), nullable=False)
     is_homeroom = db.Column(db.Boolean, default=False)
@@ -105,9 +128,15 @@ class Teacher(BaseModel):
 # Model untuk siswa
 class Student(BaseModel):
     __tablename__ = 'students'
+    __table_args__ = (
+        # Lookup siswa per NIS (scan QR, import, validasi form)
+        db.Index('ix_students_school_nis', 'school_id', 'nis'),
+        # Daftar/pencarian siswa: urut lower(full_name), id (keyset, utils/roster_search.py)
+        db.Index('ix_students_school_name_lower', 'school_id', db.text('lower(full_name)'), 'id'),
+    )
     
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     nis = db.Column(db.String(20), nullable=False)  # Student ID
     nisn = db.Column(db.String(20))  # National Student ID
     full_name = db.Column(db.String(100), nullable=False)
@@ -133,6 +162,14 @@ class Classroom(BaseModel):
 # Model untuk absensi
 class Attendance(BaseModel):
     __tablename__ = 'attendances'
+    __table_args__ = (
+        # Satu record absensi per siswa per hari (juga target ON CONFLICT)
+        db.Index('uq_attendances_student_date', 'student_id', 'date', unique=True),
+        # Halaman absensi admin/guru: filter sekolah + tanggal (+ kelas)
+        db.Index('ix_attendances_school_date_classroom', 'school_id', 'date', 'classroom_id'),
+        # Statistik dashboard: hitung status per sekolah per hari
+        db.Index('ix_attendances_school_date_status', 'school_id', 'date', 'status'),
+    )
     
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -142,6 +179,86 @@ class Attendance(BaseModel):
     recorded_by = db.Column(db.Integer, db.ForeignKey('teachers.id'))
     notes = db.Column(db.Text)
 
+# Ringkasan absensi per kelas per hari (diperbarui oleh utils/attendance_summary)
+class DailyAttendanceSummary(db.Model):
+    __tablename__ = 'daily_attendance_summary'
+    __table_args__ = (
+        db.UniqueConstraint('school_id', 'classroom_id', 'date', name='uq_daily_attendance_summary_school_classroom_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
+    classroom_id = db.Column(db.Integer, db.ForeignKey('classrooms.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    hadir = db.Column(db.Integer, nullable=False, default=0)
+    izin = db.Column(db.Integer, nullable=False, default=0)
+    sakit = db.Column(db.Integer, nullable=False, default=0)
+    alpha = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=jakarta_now, onupdate=jakarta_now)
+    
+    @property
+    def total(self):
+        return self.hadir + self.izin + self.sakit + self.alpha
+
+# Antrian background job (diproses oleh worker.py, lihat utils/jobs.py)
+class BackgroundJob(BaseModel):
+    __tablename__ = 'background_jobs'
+    __table_args__ = (
+        db.Index('ix_background_jobs_status_created', 'status', 'created_at'),
+    )
+    
+    school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.PENDING)
+    payload = db.Column(db.JSON)
+    
+    # Progres untuk endpoint polling
+    total = db.Column(db.Integer, default=0)
+    processed = db.Column(db.Integer, default=0)
+    success_count = db.Column(db.Integer, default=0)
+    error_count = db.Column(db.Integer, default=0)
+    errors = db.Column(db.JSON)  # list {"row": .., "message": ..}
+    result = db.Column(db.JSON)
+    message = db.Column(db.Text)
+    
+    attempts = db.Column(db.Integer, default=0)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status.value,
+            'total': self.total or 0,
+            'processed': self.processed or 0,
+            'success_count': self.success_count or 0,
+            'error_count': self.error_count or 0,
+            'errors': self.errors or [],
+            'result': self.result,
+            'message': self.message,
+            'finished': self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+        }
+
+# Email yang menunggu dikirim worker (lihat utils/email_outbox.py)
+class EmailOutbox(BaseModel):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    school_id = db.Column(db.Integer, db.ForeignKey('schools.id', ondelete='SET NULL'), nullable=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum(EmailStatus), nullable=False, default=EmailStatus.PENDING)
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=jakarta_now)
+    last_error = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+
 # Model untuk event sekolah
 class SchoolEvent(BaseModel):
     __tablename__ = 'school_events'
@@ -165,6 +282,10 @@ class SchoolQRCode(BaseModel):
 # Model untuk absensi guru
 class TeacherAttendance(BaseModel):
     __tablename__ = 'teacher_attendances'
+    __table_args__ = (
+        # Satu record absensi per guru per hari
+        db.Index('uq_teacher_attendances_teacher_date', 'teacher_id', 'date', unique=True),
+    )
     
     school_id = db.Column(db.Integer, db.ForeignKey('schools.id'), nullable=False)
     teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'), nullable=False)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Benchmark latency query absensi sebelum/sesudah index hot path.
+
+Seed satu tahun ajaran data (sekolah, kelas, siswa, guru, absensi harian),
+jalankan query yang dipakai route scan/absensi tanpa index, lalu buat index
+dari models.py dan ukur ulang.
+
+Contoh:
+    python scripts/bench_attendance_indexes.py
+    python scripts/bench_attendance_indexes.py --database-url postgresql://localhost/hubsensi_bench --reset
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import insert, inspect, select, func
+
+from extensions import db
+from models import (Attendance, AttendanceStatus, Classroom, School, Student, Teacher,
+                    TeacherAttendance, User, UserRole)
+
+# Index yang diukur (dibuang saat fase "sebelum", dibuat ulang saat fase "sesudah")
+BENCH_TABLES = [Attendance.__table__, TeacherAttendance.__table__, Student.__table__, Teacher.__table__]
+
+
+def create_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def school_days(start, count):
+    """Hari sekolah (Senin-Jumat) mulai dari tanggal start"""
+    days = []
+    current = start
+    while len(days) < count:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def drop_bench_indexes():
+    # IF EXISTS, bukan checkfirst: reflection SQLite melewati index ekspresi (lower(full_name))
+    with db.engine.begin() as conn:
+        for table in BENCH_TABLES:
+            for index in table.indexes:
+                conn.exec_driver_sql(f'DROP INDEX IF EXISTS {index.name}')
+
+
+def create_bench_indexes():
+    # Semua index sudah di-drop oleh drop_bench_indexes()
+    for table in BENCH_TABLES:
+        for index in table.indexes:
+            index.create(bind=db.engine)
+    # Perbarui statistik planner setelah index dibuat
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+
+
+def seed(classrooms, students_per_class, teachers, days, chunk_size=10000):
+    school_id = db.session.execute(
+        insert(School.__table__).values(name='Sekolah Benchmark', code='BENCH', is_active=True)
+        .returning(School.__table__.c.id)
+    ).scalar_one()
+
+    total_students = classrooms * students_per_class
+    user_rows = [
+        {'school_id': school_id, 'username': f'bench_teacher_{i}', 'email': f'teacher{i}@bench.local',
+         'role': UserRole.TEACHER, 'is_active': True}
+        for i in range(teachers)
+    ] + [
+        {'school_id': school_id, 'username': f'bench_student_{i}', 'email': f'student{i}@bench.local',
+         'role': UserRole.STUDENT, 'is_active': True}
+        for i in range(total_students)
+    ]
+    db.session.execute(insert(User.__table__), user_rows)
+    user_ids = db.session.execute(
+        select(User.__table__.c.id).where(User.__table__.c.school_id == school_id).order_by(User.__table__.c.id)
+    ).scalars().all()
+    teacher_user_ids, student_user_ids = user_ids[:teachers], user_ids[teachers:]
+
+    db.session.execute(insert(Teacher.__table__), [
+        {'school_id': school_id, 'user_id': uid, 'nip': f'NIP{i:05d}', 'full_name': f'Guru {i}'}
+        for i, uid in enumerate(teacher_user_ids)
+    ])
+    teacher_ids = db.session.execute(
+        select(Teacher.__table__.c.id).where(Teacher.__table__.c.school_id == school_id)
+    ).scalars().all()
+
+    db.session.execute(insert(Classroom.__table__), [
+        {'school_id': school_id, 'name': f'Kelas {i + 1}', 'grade_level': str(10 + i % 3)}
+        for i in range(classrooms)
+    ])
+    classroom_ids = db.session.execute(
+        select(Classroom.__table__.c.id).where(Classroom.__table__.c.school_id == school_id)
+    ).scalars().all()
+
+    db.session.execute(insert(Student.__table__), [
+        {'school_id': school_id, 'user_id': uid, 'nis': f'{100000 + i}', 'full_name': f'Siswa {i}',
+         'classroom_id': classroom_ids[i // students_per_class]}
+        for i, uid in enumerate(student_user_ids)
+    ])
+    students = db.session.execute(
+        select(Student.__table__.c.id, Student.__table__.c.classroom_id)
+        .where(Student.__table__.c.school_id == school_id)
+    ).all()
+    db.session.commit()
+
+    statuses = list(AttendanceStatus)
+    weights = [90, 4, 4, 2]
+    attendance_table = Attendance.__table__
+    teacher_attendance_table = TeacherAttendance.__table__
+    rows = []
+    total_rows = 0
+    for day in days:
+        for student_id, classroom_id in students:
+            rows.append({
+                'school_id': school_id, 'student_id': student_id, 'classroom_id': classroom_id,
+                'date': day, 'status': random.choices(statuses, weights)[0],
+                'recorded_by': random.choice(teacher_ids),
+            })
+            if len(rows) >= chunk_size:
+                db.session.execute(insert(attendance_table), rows)
+                total_rows += len(rows)
+                rows = []
+        db.session.execute(insert(teacher_attendance_table), [
+            {'school_id': school_id, 'teacher_id': teacher_id, 'date': day, 'status': AttendanceStatus.HADIR}
+            for teacher_id in teacher_ids
+        ])
+    if rows:
+        db.session.execute(insert(attendance_table), rows)
+        total_rows += len(rows)
+    db.session.commit()
+
+    return {
+        'school_id': school_id,
+        'student_ids': [s[0] for s in students],
+        'student_nis': [f'{100000 + i}' for i in range(total_students)],
+        'student_user_ids': student_user_ids,
+        'teacher_ids': teacher_ids,
+        'classroom_ids': classroom_ids,
+        'attendance_rows': total_rows,
+    }
+
+
+def build_queries(data, days):
+    school_id = data['school_id']
+    return {
+        'scan: student_id + date': lambda: db.session.execute(
+            select(Attendance.id).where(Attendance.student_id == random.choice(data['student_ids']),
+                                        Attendance.date == random.choice(days))
+        ).first(),
+        'halaman absensi: school + date + classroom': lambda: db.session.execute(
+            select(Attendance.id).where(Attendance.school_id == school_id,
+                                        Attendance.date == random.choice(days),
+                                        Attendance.classroom_id == random.choice(data['classroom_ids']))
+        ).all(),
+        'dashboard: count status per school + date': lambda: db.session.execute(
+            select(Attendance.status, func.count()).where(Attendance.school_id == school_id,
+                                                          Attendance.date == random.choice(days))
+            .group_by(Attendance.status)
+        ).all(),
+        'absensi guru: teacher_id + date': lambda: db.session.execute(
+            select(TeacherAttendance.id).where(TeacherAttendance.teacher_id == random.choice(data['teacher_ids']),
+                                               TeacherAttendance.date == random.choice(days))
+        ).first(),
+        'scan: student by school + nis': lambda: db.session.execute(
+            select(Student.id).where(Student.school_id == school_id,
+                                     Student.nis == random.choice(data['student_nis']))
+        ).first(),
+        'profil: student by user_id': lambda: db.session.execute(
+            select(Student.id).where(Student.user_id == random.choice(data['student_user_ids']))
+        ).first(),
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, run in queries.items():
+        run()  # warm-up
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        results[name] = (statistics.median(samples), samples[int(len(samples) * 0.95) - 1])
+    return results
+
+
+def print_report(before, after, data):
+    print("=" * 96)
+    print(f"Baris absensi: {data['attendance_rows']:,} | Siswa: {len(data['student_ids']):,} | "
+          f"Kelas: {len(data['classroom_ids'])} | Guru: {len(data['teacher_ids'])}")
+    print("=" * 96)
+    print(f"{'Query':<45}{'p50 sebelum':>12}{'p50 sesudah':>12}{'p95 sebelum':>12}{'p95 sesudah':>12}")
+    print("-" * 96)
+    for name in before:
+        b50, b95 = before[name]
+        a50, a95 = after[name]
+        print(f"{name:<45}{b50:>10.3f}ms{a50:>10.3f}ms{b95:>10.3f}ms{a95:>10.3f}ms")
+    print("=" * 96)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+                        help='Database kosong untuk benchmark (default: SQLite sementara)')
+    parser.add_argument('--reset', action='store_true',
+                        help='Hapus semua tabel di --database-url sebelum seed (wajib jika database sudah berisi tabel)')
+    parser.add_argument('--classrooms', type=int, default=24)
+    parser.add_argument('--students-per-class', type=int, default=36)
+    parser.add_argument('--teachers', type=int, default=40)
+    parser.add_argument('--days', type=int, default=200, help='Jumlah hari sekolah (satu tahun ajaran ~200)')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    app = create_app(database_url)
+    with app.app_context():
+        # Jangan pernah drop_all database yang sudah berisi tanpa izin eksplisit
+        existing = inspect(db.engine).get_table_names()
+        if existing and not args.reset:
+            sys.exit(f"Database {db.engine.url.render_as_string()} sudah berisi {len(existing)} tabel; "
+                     f"pakai database kosong atau tambahkan --reset untuk menghapus semuanya")
+        if existing:
+            db.drop_all()
+        db.create_all()
+        drop_bench_indexes()
+
+        days = school_days(date(date.today().year - 1, 7, 15), args.days)
+        print(f"Seeding {args.classrooms * args.students_per_class} siswa x {len(days)} hari ke {db.engine.url.render_as_string()}...")
+        started = time.perf_counter()
+        data = seed(args.classrooms, args.students_per_class, args.teachers, days)
+        print(f"Seed selesai dalam {time.perf_counter() - started:.1f}s")
+
+        queries = build_queries(data, days)
+        before = measure(queries, args.repeat)
+
+        started = time.perf_counter()
+        create_bench_indexes()
+        print(f"Index dibuat dalam {time.perf_counter() - started:.1f}s")
+        after = measure(queries, args.repeat)
+
+        print_report(before, after, data)
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Benchmark beban "jam 07:00": ribuan siswa scan QR di gerbang dalam ~20 menit.
+
+Seed sekolah (kelas, siswa, guru), login beberapa sesi guru (satu per gerbang),
+lalu putar ulang aliran scan yang realistis (puncak menjelang bel, scan ulang,
+QR rusak) ke teacher.process_scan secara paralel, ditambah absensi massal
+wali kelas lewat teacher.bulk_attendance. Laporan: throughput, latency
+p50/p95/p99/maks per endpoint dan jumlah query per request (dari
+utils/instrumentation).
+
+Request dijalankan in-process lewat Flask test client (satu thread per
+gerbang), jadi yang diukur adalah aplikasi + database tanpa jaringan;
+cocok untuk membandingkan perubahan kode/index di mesin yang sama.
+
+Contoh:
+    python scripts/bench_gate_scan.py
+    python scripts/bench_gate_scan.py --students 1500 --gates 6 --json hasil.json
+    python scripts/bench_gate_scan.py --database-url postgresql://localhost/hubsensi_bench --reset
+    python scripts/bench_gate_scan.py --speedup 20   # putar ulang 20 menit dalam 1 menit
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, inspect, select
+
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import (Attendance, Classroom, School, SchoolSubscription, Student, SubscriptionPlan, Teacher, User,
+                    UserRole, jakarta_now)
+from utils.instrumentation import request_queries
+from utils.passwords import hash_password
+from utils.qr_render import student_qr_data
+
+PASSWORD = 'bench-gate'
+SCAN_URL = '/teacher/scan/process'
+BULK_URL = '/teacher/attendance/bulk'
+
+
+def bench_config(database_url, gates):
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+        # SQLite file: tunggu lock tulis, Postgres: satu koneksi per gerbang
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {'connect_args': {'timeout': 30}} if database_url.startswith('sqlite')
+            else {'pool_size': gates + 2, 'max_overflow': 4}
+        )
+        INSTRUMENTATION_ENABLED = True
+        INSTRUMENTATION_SLOW_SECONDS = 3600  # tanpa log per request
+        INSTRUMENTATION_MAX_QUERIES = 10 ** 6
+    return BenchConfig
+
+
+def seed(schools, classrooms, students_per_class, gates):
+    """Seed with bulk inserts; semua akun memakai hash password yang sama"""
+    today = jakarta_now().date()
+    password_hash = hash_password(PASSWORD)
+    result = []
+
+    for s in range(schools):
+        school_id = db.session.execute(
+            insert(School.__table__).values(name=f'Sekolah Gerbang {s}', code=f'GATE{s}', is_active=True)
+            .returning(School.__table__.c.id)
+        ).scalar_one()
+        db.session.execute(insert(SchoolSubscription.__table__).values(
+            school_id=school_id, plan=SubscriptionPlan.PREMIUM, is_active=True, start_date=today,
+            end_date=today.replace(year=today.year + 1), max_teachers=1000, max_students=100000, features={}
+        ))
+
+        teachers = max(gates, classrooms)
+        total_students = classrooms * students_per_class
+        db.session.execute(insert(User.__table__), [
+            {'school_id': school_id, 'username': f'gate{s}_teacher_{i}', 'email': f'gate{s}_teacher{i}@bench.local',
+             'password_hash': password_hash, 'role': UserRole.TEACHER, 'is_active': True}
+            for i in range(teachers)
+        ] + [
+            {'school_id': school_id, 'username': f'gate{s}_student_{i}', 'email': f'gate{s}_student{i}@bench.local',
+             'password_hash': password_hash, 'role': UserRole.STUDENT, 'is_active': True}
+            for i in range(total_students)
+        ])
+        users = db.session.execute(
+            select(User.__table__.c.id, User.__table__.c.username)
+            .where(User.__table__.c.school_id == school_id).order_by(User.__table__.c.id)
+        ).all()
+        teacher_users, student_users = users[:teachers], users[teachers:]
+
+        db.session.execute(insert(Teacher.__table__), [
+            {'school_id': school_id, 'user_id': uid, 'nip': f'{s}{i:05d}', 'full_name': f'Guru {s}-{i}',
+             'is_homeroom': i < classrooms}
+            for i, (uid, _) in enumerate(teacher_users)
+        ])
+        teacher_ids = db.session.execute(
+            select(Teacher.__table__.c.id).where(Teacher.__table__.c.school_id == school_id)
+            .order_by(Teacher.__table__.c.id)
+        ).scalars().all()
+
+        db.session.execute(insert(Classroom.__table__), [
+            {'school_id': school_id, 'name': f'Kelas {i + 1}', 'grade_level': str(7 + i % 3),
+             'homeroom_teacher_id': teacher_ids[i]}
+            for i in range(classrooms)
+        ])
+        classroom_ids = db.session.execute(
+            select(Classroom.__table__.c.id).where(Classroom.__table__.c.school_id == school_id)
+            .order_by(Classroom.__table__.c.id)
+        ).scalars().all()
+
+        db.session.execute(insert(Student.__table__), [
+            {'school_id': school_id, 'user_id': uid, 'nis': f'{s}{100000 + i}', 'full_name': f'Siswa {s}-{i}',
+             'classroom_id': classroom_ids[i // students_per_class]}
+            for i, (uid, _) in enumerate(student_users)
+        ])
+        students = db.session.execute(
+            select(Student.__table__.c.id, Student.__table__.c.nis, Student.__table__.c.classroom_id)
+            .where(Student.__table__.c.school_id == school_id)
+        ).all()
+        db.session.commit()
+
+        result.append({
+            'school_id': school_id,
+            'gate_usernames': [username for _, username in teacher_users[:gates]],
+            'students': students,
+            'classroom_ids': classroom_ids,
+        })
+    return result
+
+
+def build_scan_stream(school, window_seconds, rescan_rate, invalid_rate, bulk_classes):
+    """
+    Scan events (offset detik, qr_data) untuk satu sekolah. Kedatangan memuncak
+    menjelang bel (distribusi segitiga); siswa di kelas yang diabsen massal
+    tidak scan di gerbang.
+    """
+    bulk_classroom_ids = set(school['classroom_ids'][:bulk_classes])
+    events = []
+    for _, nis, classroom_id in school['students']:
+        if classroom_id in bulk_classroom_ids:
+            continue
+        offset = random.triangular(0, window_seconds, window_seconds * 0.7)
+        qr_data = student_qr_data(nis, school['school_id'])
+        events.append((offset, qr_data))
+        if random.random() < rescan_rate:
+            events.append((min(window_seconds, offset + random.uniform(1, 30)), qr_data))
+        if random.random() < invalid_rate:
+            events.append((offset, f'STUDENT:{nis}'))  # QR rusak / terpotong
+    return sorted(events)
+
+
+def build_bulk_requests(school, bulk_classes, window_seconds):
+    """One bulk_attendance payload per homeroom class, dikirim di akhir jendela"""
+    by_class = defaultdict(list)
+    for student_id, _, classroom_id in school['students']:
+        by_class[classroom_id].append(student_id)
+    requests = []
+    for classroom_id in school['classroom_ids'][:bulk_classes]:
+        payload = {'students': [
+            {'student_id': sid, 'status': random.choices(['hadir', 'izin', 'sakit', 'alpha'], [90, 4, 4, 2])[0]}
+            for sid in by_class[classroom_id]
+        ]}
+        requests.append((window_seconds * random.uniform(0.8, 1.0), payload))
+    return sorted(requests, key=lambda item: item[0])
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.rejected = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, response):
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            if response is None or response.status_code >= 400:
+                self.errors[name] += 1
+            elif not (response.get_json(silent=True) or {}).get('success', False):
+                self.rejected[name] += 1
+
+
+def run_gate(app, username, events, started, speedup, recorder):
+    client = app.test_client()
+    response = client.post('/auth/login', data={'username': username, 'password': PASSWORD})
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f'Login {username} gagal: {response.status_code}')
+
+    for offset, kind, data in events:
+        if speedup:
+            delay = started + offset / speedup - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        start = time.perf_counter()
+        try:
+            if kind == 'scan':
+                response = client.post(SCAN_URL, data={'qr_data': data})
+            else:
+                response = client.post(BULK_URL, json=data)
+        except Exception as e:
+            print(f"Request {kind} gagal: {e}")
+            response = None
+        recorder.record(kind, time.perf_counter() - start, response)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(q * (len(values) - 1)))))
+    return values[index]
+
+
+def build_report(recorder, wall_time, attendance_rows, args):
+    endpoints = {'scan': 'teacher.process_scan', 'bulk': 'teacher.bulk_attendance'}
+    query_stats = request_queries.snapshot()
+    report = {
+        'config': vars(args),
+        'wall_seconds': round(wall_time, 3),
+        'attendance_rows': attendance_rows,
+        'endpoints': {},
+    }
+    total = 0
+    for kind, endpoint in endpoints.items():
+        latencies = recorder.latencies.get(kind, [])
+        if not latencies:
+            continue
+        total += len(latencies)
+        queries = query_stats.get(endpoint, {})
+        report['endpoints'][kind] = {
+            'requests': len(latencies),
+            'errors': recorder.errors[kind],
+            'rejected': recorder.rejected[kind],
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'max_ms': round(max(latencies) * 1000, 2),
+            'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+            'queries_mean': round(queries['sum'] / queries['count'], 2) if queries.get('count') else None,
+            'queries_p95': round(queries['p95'], 1) if queries.get('p95') is not None else None,
+        }
+    report['throughput_rps'] = round(total / wall_time, 1) if wall_time else None
+    return report
+
+
+def print_report(report):
+    print("=" * 104)
+    print(f"Waktu: {report['wall_seconds']:.2f}s | Throughput: {report['throughput_rps']} req/s | "
+          f"Baris absensi hari ini: {report['attendance_rows']:,}")
+    print("=" * 104)
+    print(f"{'Endpoint':<10}{'Request':>9}{'Error':>7}{'Ditolak':>9}{'p50':>10}{'p95':>10}{'p99':>10}"
+          f"{'maks':>10}{'query/req':>11}{'query p95':>11}")
+    print("-" * 104)
+    for kind, row in report['endpoints'].items():
+        print(f"{kind:<10}{row['requests']:>9}{row['errors']:>7}{row['rejected']:>9}"
+              f"{row['p50_ms']:>8.2f}ms{row['p95_ms']:>8.2f}ms{row['p99_ms']:>8.2f}ms{row['max_ms']:>8.2f}ms"
+              f"{row['queries_mean'] if row['queries_mean'] is not None else '-':>11}"
+              f"{row['queries_p95'] if row['queries_p95'] is not None else '-':>11}")
+    print("=" * 104)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+                        help='Database kosong untuk benchmark (default: SQLite sementara)')
+    parser.add_argument('--reset', action='store_true',
+                        help='Hapus semua tabel di --database-url sebelum seed (wajib jika database sudah berisi tabel)')
+    parser.add_argument('--schools', type=int, default=1)
+    parser.add_argument('--classrooms', type=int, default=30, help='Kelas per sekolah')
+    parser.add_argument('--students-per-class', type=int, default=36)
+    parser.add_argument('--gates', type=int, default=4, help='Sesi guru (gerbang) paralel per sekolah')
+    parser.add_argument('--window-minutes', type=float, default=20)
+    parser.add_argument('--speedup', type=float, default=0, help='0 = secepat mungkin, mis. 20 = 20x waktu nyata')
+    parser.add_argument('--rescan-rate', type=float, default=0.05, help='Porsi siswa yang scan dua kali')
+    parser.add_argument('--invalid-rate', type=float, default=0.01, help='Porsi scan dengan QR rusak')
+    parser.add_argument('--bulk-classes', type=int, default=3, help='Kelas per sekolah yang diabsen massal wali kelas')
+    parser.add_argument('--json', default=None, help='Simpan laporan ke file JSON untuk dibandingkan')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_gate.db')}"
+
+    app = create_app(bench_config(database_url, args.gates))
+    with app.app_context():
+        # Jangan pernah drop_all database yang sudah berisi tanpa izin eksplisit
+        existing = inspect(db.engine).get_table_names()
+        if existing and not args.reset:
+            sys.exit(f"Database {db.engine.url.render_as_string()} sudah berisi {len(existing)} tabel; "
+                     f"pakai database kosong atau tambahkan --reset untuk menghapus semuanya")
+        if existing:
+            db.drop_all()
+        db.create_all()
+        schools = seed(args.schools, args.classrooms, args.students_per_class, args.gates)
+        db.session.remove()
+
+    window_seconds = args.window_minutes * 60
+    gate_events = []
+    for school in schools:
+        scans = build_scan_stream(school, window_seconds, args.rescan_rate, args.invalid_rate, args.bulk_classes)
+        bulks = build_bulk_requests(school, args.bulk_classes, window_seconds)
+        # Scan dibagi rata ke gerbang; absensi massal dikirim dari sesi guru yang sama
+        streams = [[] for _ in school['gate_usernames']]
+        for i, (offset, qr_data) in enumerate(scans):
+            streams[i % len(streams)].append((offset, 'scan', qr_data))
+        for i, (offset, payload) in enumerate(bulks):
+            streams[i % len(streams)].append((offset, 'bulk', payload))
+        for username, events in zip(school['gate_usernames'], streams):
+            gate_events.append((username, sorted(events, key=lambda item: item[0])))
+
+    total_events = sum(len(events) for _, events in gate_events)
+    print(f"Sekolah: {args.schools} | Siswa/sekolah: {args.classrooms * args.students_per_class:,} | "
+          f"Gerbang: {len(gate_events)} | Request: {total_events:,} | DB: {database_url.split('://')[0]}")
+
+    recorder = Recorder()
+    request_queries.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(gate_events)) as pool:
+        futures = [
+            pool.submit(run_gate, app, username, events, started, args.speedup, recorder)
+            for username, events in gate_events
+        ]
+        for future in futures:
+            future.result()
+    wall_time = time.perf_counter() - started
+
+    with app.app_context():
+        attendance_rows = db.session.execute(
+            select(func.count(Attendance.id)).where(Attendance.date == jakarta_now().date())
+        ).scalar_one()
+        db.session.remove()
+
+    report = build_report(recorder, wall_time, attendance_rows, args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan ke {args.json}")
+
+
+if __name__ == '__main__':
+    main()
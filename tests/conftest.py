@@ -0,0 +1,220 @@
+"""
+Fixture bersama: app TestingConfig (SQLite in-memory, atau TEST_DATABASE_URL)
+dengan satu sekolah realistis (kelas, guru, siswa, absensi beberapa minggu,
+event, job import) plus beberapa sekolah lain, client yang sudah login per
+role, dan QueryCounter pada engine app.
+
+Setiap request client berjalan di app context-nya sendiri (tidak di dalam
+context seeding), sama seperti di server: flask.g dan user Flask-Login tidak
+terbawa antar request. STRICT_LOADING=true ikut menggagalkan lazy load N+1.
+"""
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+# app.py membuat app default saat di-import; tanpa DATABASE_URL itu butuh driver Postgres
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app
+from config import TestingConfig
+from extensions import db
+from models import (Attendance, AttendanceStatus, BackgroundJob, Classroom, EventType, JobStatus, School,
+                    SchoolEvent, SchoolQRCode, SchoolSubscription, Student, SubscriptionPlan, Teacher,
+                    TeacherAttendance, User, UserRole)
+from utils.attendance_summary import rebuild_daily_summary
+from utils.card_batch import CARD_BATCH_JOB_TYPE
+from utils.query_counter import QueryCounter
+from utils.student_import import IMPORT_JOB_TYPE
+
+PASSWORD = 'budget-check'
+ROLES = ('superadmin', 'admin', 'teacher', 'student')
+
+# Ukuran seed sekolah utama
+CLASSROOMS = 4
+STUDENTS_PER_CLASS = 25
+TEACHERS = 8
+SCHOOL_DAYS = 15
+OTHER_SCHOOLS = 4
+
+
+def school_days(end, count):
+    """Hari sekolah (Senin-Jumat) terakhir sampai tanggal end"""
+    days = []
+    current = end
+    while len(days) < count:
+        if current.weekday() < 5:
+            days.append(current)
+        current -= timedelta(days=1)
+    return sorted(days)
+
+
+def create_user(school_id, username, role):
+    user = User(school_id=school_id, username=username, email=f'{username}@budget.local', role=role)
+    user.set_password(PASSWORD)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def create_school(code, classrooms, students_per_class, teachers, with_attendance_days=0):
+    today = date.today()
+    school = School(name=f'Sekolah {code}', code=code, is_active=True)
+    db.session.add(school)
+    db.session.flush()
+    db.session.add(SchoolSubscription(
+        school_id=school.id,
+        plan=SubscriptionPlan.STANDARD,
+        is_active=True,
+        start_date=today - timedelta(days=30),
+        end_date=today + timedelta(days=335),
+        max_teachers=100,
+        max_students=1000
+    ))
+    admin = create_user(school.id, f'admin_{code}', UserRole.ADMIN)
+
+    teacher_rows = []
+    for i in range(teachers):
+        user = create_user(school.id, f'teacher_{code}_{i}', UserRole.TEACHER)
+        teacher = Teacher(school_id=school.id, user_id=user.id, nip=f'{code}{i:04d}',
+                          full_name=f'Guru {code} {i}', is_homeroom=i < classrooms)
+        db.session.add(teacher)
+        teacher_rows.append(teacher)
+    db.session.flush()
+
+    classroom_rows = []
+    for i in range(classrooms):
+        classroom = Classroom(school_id=school.id, name=f'{7 + i % 3}-{chr(65 + i)}',
+                              grade_level=str(7 + i % 3), homeroom_teacher_id=teacher_rows[i].id)
+        db.session.add(classroom)
+        classroom_rows.append(classroom)
+    db.session.flush()
+
+    student_rows = []
+    for classroom in classroom_rows:
+        for i in range(students_per_class):
+            nis = f'{code}{classroom.id:03d}{i:03d}'
+            user = create_user(school.id, f'student_{nis}', UserRole.STUDENT)
+            student = Student(school_id=school.id, user_id=user.id, nis=nis, nisn=f'00{nis}',
+                              full_name=f'Siswa {nis}', classroom_id=classroom.id)
+            db.session.add(student)
+            student_rows.append(student)
+    db.session.flush()
+
+    statuses = [AttendanceStatus.HADIR] * 17 + [AttendanceStatus.IZIN, AttendanceStatus.SAKIT, AttendanceStatus.ALPHA]
+    for day in school_days(today, with_attendance_days) if with_attendance_days else []:
+        for student in student_rows:
+            db.session.add(Attendance(school_id=school.id, student_id=student.id, classroom_id=student.classroom_id,
+                                      date=day, status=random.choice(statuses),
+                                      recorded_by=random.choice(teacher_rows).id))
+        for teacher in teacher_rows:
+            db.session.add(TeacherAttendance(school_id=school.id, teacher_id=teacher.id, date=day,
+                                             time_in=datetime.combine(day, datetime.min.time()) + timedelta(hours=7),
+                                             status=AttendanceStatus.HADIR))
+    db.session.flush()
+    return school, admin, teacher_rows, classroom_rows, student_rows
+
+
+def seed():
+    """:return: dict username per role dan nilai argumen URL"""
+    random.seed(42)
+    superadmin = create_user(None, 'superadmin_budget', UserRole.SUPERADMIN)
+
+    school, admin, teachers, classrooms, students = create_school(
+        'MAIN', CLASSROOMS, STUDENTS_PER_CLASS, TEACHERS, with_attendance_days=SCHOOL_DAYS
+    )
+    for i in range(OTHER_SCHOOLS):
+        create_school(f'S{i}', 2, 10, 3)
+
+    now = datetime.now()
+    for i in range(3):
+        db.session.add(SchoolEvent(school_id=school.id, title=f'Event {i}', event_type=EventType.ACARA,
+                                   start_date=now + timedelta(days=i * 7), end_date=now + timedelta(days=i * 7 + 1),
+                                   is_holiday=(i == 0)))
+    db.session.add(SchoolQRCode(school_id=school.id, qr_code=f'/qr/{school.id}/school.png', is_active=True))
+
+    # Job import STAGED untuk halaman pratinjau / laporan error
+    job = BackgroundJob(school_id=school.id, created_by=admin.id, job_type=IMPORT_JOB_TYPE,
+                        status=JobStatus.STAGED, total=0, processed=0, success_count=0, error_count=0, attempts=0,
+                        payload={'school_id': school.id, 'classroom_id': classrooms[0].id, 'rows': [],
+                                 'rejected': [{'row': 2, 'nis': 'X', 'full_name': 'X', 'email': 'x', 'message': 'Format email tidak valid'}]})
+    db.session.add(job)
+    # Guru hanya melihat job miliknya sendiri
+    teacher_job = BackgroundJob(school_id=school.id, created_by=teachers[0].user_id, job_type=CARD_BATCH_JOB_TYPE,
+                                status=JobStatus.SUCCEEDED, total=0, processed=0, success_count=0, error_count=0,
+                                attempts=0, payload={'school_id': school.id, 'classroom_id': classrooms[0].id})
+    db.session.add(teacher_job)
+    db.session.flush()
+
+    rebuild_daily_summary()
+    db.session.commit()
+
+    return {
+        'users': {
+            'superadmin': superadmin.username,
+            'admin': admin.username,
+            'teacher': teachers[0].user.username,  # wali kelas
+            'student': students[0].user.username,
+        },
+        'url_values': {
+            'school_id': school.id,
+            'student_id': students[0].id,
+            'teacher_id': teachers[0].id,
+            'classroom_id': classrooms[0].id,
+            'job_id': job.id,
+            'nis': students[0].nis,
+            'fmt': 'png',
+        },
+        # Argumen URL yang berbeda per role
+        'role_url_values': {
+            'teacher': {'job_id': teacher_job.id},
+        },
+        # Siswa kelas wali guru teacher, untuk request scan/absensi (id, nis)
+        'homeroom_students': [(s.id, s.nis) for s in students if s.classroom_id == classrooms[0].id],
+    }
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        app.config['SEED_DATA'] = seed()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture(scope='session')
+def seed_data(app):
+    """Username per role dan nilai argumen URL dari seed()"""
+    return app.config['SEED_DATA']
+
+
+@pytest.fixture(scope='session')
+def clients(app, seed_data):
+    """Test client per role, masing-masing sudah login"""
+    result = {}
+    for role in ROLES:
+        client = app.test_client()
+        response = client.post('/auth/login', data={'username': seed_data['users'][role], 'password': PASSWORD})
+        assert response.status_code in (200, 302), f'Login {role} gagal: {response.status_code}'
+        result[role] = client
+    return result
+
+
+@pytest.fixture
+def query_counter(app):
+    """QueryCounter pada engine app; ukur dengan `with query_counter:`"""
+    with app.app_context():
+        engine = db.engine
+    return QueryCounter(engine)
+
+
+@pytest.fixture
+def db_session(app):
+    """db.session di app context; semua perubahan di-rollback setelah test"""
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
@@ -0,0 +1,89 @@
+"""upsert_attendance: outcome dari upsert itu sendiri dan ringkasan harian ikut diperbarui"""
+from datetime import timedelta
+
+import pytest
+
+from models import Attendance, AttendanceStatus, DailyAttendanceSummary, Student, jakarta_now
+from utils.attendance_writer import CREATED, UNCHANGED, UPDATED, AttendanceWrite, upsert_attendance
+
+
+@pytest.fixture
+def writer(db_session, seed_data):
+    """Dua siswa sekelas dan tanggal di luar data seed"""
+    school_id = seed_data['url_values']['school_id']
+    classroom_id = seed_data['url_values']['classroom_id']
+    students = Student.query.filter_by(school_id=school_id, classroom_id=classroom_id)\
+                            .order_by(Student.id).limit(2).all()
+    day = jakarta_now().date() + timedelta(days=60)
+
+    def write(*rows):
+        return upsert_attendance(school_id, [
+            AttendanceWrite(student_id=students[index].id, date=day, status=status, notes=notes,
+                            recorded_by=None, classroom_id=classroom_id)
+            for index, status, notes in rows
+        ])
+
+    def summary(status):
+        row = DailyAttendanceSummary.query.filter_by(school_id=school_id, classroom_id=classroom_id, date=day).first()
+        return getattr(row, status) if row is not None else 0
+
+    write.students = students
+    write.day = day
+    write.summary = summary
+    return write
+
+
+def test_create(writer):
+    result, = writer((0, 'hadir', None))
+
+    assert result.outcome == CREATED
+    assert result.status == AttendanceStatus.HADIR
+    assert result.previous_status is None
+    assert result.created_at is not None
+    assert Attendance.query.filter_by(student_id=writer.students[0].id, date=writer.day).count() == 1
+    assert writer.summary('hadir') == 1
+
+
+def test_update(writer):
+    writer((0, 'hadir', None))
+    result, = writer((0, 'sakit', 'demam'))
+
+    assert result.outcome == UPDATED
+    assert result.status == AttendanceStatus.SAKIT
+    assert result.notes == 'demam'
+    assert result.previous_status in (AttendanceStatus.HADIR, None)  # None di SQLite
+    assert writer.summary('hadir') == 0
+    assert writer.summary('sakit') == 1
+
+
+def test_unchanged(writer):
+    created, = writer((0, 'hadir', 'gerbang 1'))
+    result, = writer((0, 'hadir', None))  # notes=None mempertahankan catatan lama
+
+    assert result.outcome == UNCHANGED
+    assert result.status == AttendanceStatus.HADIR
+    assert result.notes == 'gerbang 1'
+    assert result.created_at.replace(tzinfo=None) == created.created_at.replace(tzinfo=None)
+    assert writer.summary('hadir') == 1
+
+
+def test_mixed_batch(writer):
+    writer((0, 'hadir', None))
+    results = writer((0, 'hadir', None), (1, 'izin', None))
+
+    assert [result.outcome for result in results] == [UNCHANGED, CREATED]
+    assert writer.summary('hadir') == 1
+    assert writer.summary('izin') == 1
+
+
+def test_duplicate_keys_in_batch(writer):
+    results = writer((0, 'hadir', None), (0, 'alpha', None), (0, 'izin', 'susulan'))
+
+    # Satu baris per (student_id, date), yang terakhir menang
+    assert len(results) == 1
+    assert results[0].outcome == CREATED
+    assert results[0].status == AttendanceStatus.IZIN
+    assert results[0].notes == 'susulan'
+    assert Attendance.query.filter_by(student_id=writer.students[0].id, date=writer.day).count() == 1
+    assert writer.summary('izin') == 1
+    assert writer.summary('hadir') == 0
@@ -0,0 +1,18 @@
+"""/metrics: nonaktif tanpa METRICS_TOKEN, selain itu wajib bearer token"""
+
+
+def test_metrics_disabled_without_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    assert app.test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_requires_bearer_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'rahasia')
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer salah'}).status_code == 403
+
+    response = client.get('/metrics', headers={'Authorization': 'Bearer rahasia'})
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
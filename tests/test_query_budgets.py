@@ -0,0 +1,166 @@
+"""
+Batas jumlah query per halaman (deteksi regresi N+1): setiap route GET di
+blueprint admin, teacher, student dan superadmin dipanggil sebagai role-nya,
+request kedua (cache sudah terisi) tidak boleh melewati QUERY_BUDGETS.
+Route POST yang sering dipanggil (scan, absensi massal, sinkronisasi, import
+siswa) punya request contoh dan batas sendiri di POST_BUDGETS.
+
+    python -m pytest tests/test_query_budgets.py -q
+    STRICT_LOADING=true python -m pytest tests/test_query_budgets.py -q
+    TEST_DATABASE_URL=postgresql://localhost/hubsensi_test python -m pytest tests/test_query_budgets.py
+"""
+import io
+from datetime import timedelta
+
+import pytest
+from flask import url_for
+
+from app import create_app
+from config import TestingConfig
+from utils.qr_render import student_qr_data
+from utils.timezone import jakarta_now
+
+# Batas default per request (termasuk load user, cek langganan, dll.).
+# Jumlah query tidak boleh tumbuh dengan jumlah baris data. Dikalibrasi dari
+# run SQLite dengan seed di conftest.py, plus sedikit ruang.
+DEFAULT_QUERY_BUDGET = 4
+QUERY_BUDGETS = {
+    'admin.dashboard': 11,
+    'admin.edit_classroom': 6,
+    'admin.attendance': 5,
+    'admin.attendance_recap': 5,
+    'admin.edit_student': 5,
+    'admin.view_student': 5,
+    'teacher.dashboard': 8,
+    'teacher.attendance': 5,
+    'superadmin.edit_school': 5,
+}
+
+# Route yang butuh file hasil job di storage
+SKIP_ENDPOINTS = {'admin.job_download', 'teacher.job_download'}
+
+
+def get_routes(app):
+    """GET routes of the four role blueprints as (endpoint, argumen URL)"""
+    routes = []
+    for rule in app.url_map.iter_rules():
+        blueprint = rule.endpoint.split('.', 1)[0]
+        if blueprint not in ('superadmin', 'admin', 'teacher', 'student') or 'GET' not in rule.methods:
+            continue
+        if rule.endpoint in SKIP_ENDPOINTS:
+            continue
+        routes.append((rule.endpoint, tuple(sorted(rule.arguments))))
+    return sorted(routes)
+
+
+def pytest_generate_tests(metafunc):
+    # Daftar route dibaca dari url_map saat collection, bukan saat modul di-import
+    if 'endpoint' in metafunc.fixturenames and 'arguments' in metafunc.fixturenames:
+        routes = get_routes(create_app(TestingConfig))
+        metafunc.parametrize('endpoint, arguments', routes, ids=[endpoint for endpoint, _ in routes])
+
+
+def test_query_budget(app, seed_data, clients, query_counter, endpoint, arguments):
+    role = endpoint.split('.', 1)[0]
+    url_values = dict(seed_data['url_values'], **seed_data['role_url_values'].get(role, {}))
+    missing = [arg for arg in arguments if arg not in url_values]
+    if missing:
+        pytest.skip(f"argumen tidak dikenal: {', '.join(missing)}")
+    with app.test_request_context():
+        url = url_for(endpoint, **{arg: url_values[arg] for arg in arguments})
+
+    client = clients[role]
+    # Request pertama mengisi cache (branding, roster), yang diukur request kedua
+    client.get(url)
+    with query_counter:
+        response = client.get(url)
+
+    assert response.status_code < 400, f'{url} -> {response.status_code}'
+    query_counter.assert_at_most(QUERY_BUDGETS.get(endpoint, DEFAULT_QUERY_BUDGET), endpoint)
+
+
+# Request POST contoh: builder(seed_data, attempt) -> kwargs client.post.
+# attempt 0 mengisi cache, attempt 1 (siswa/baris lain) yang diukur.
+SCAN_BATCH = 10
+IMPORT_ROWS = 20
+
+
+def _batch(seed_data, attempt):
+    return seed_data['homeroom_students'][attempt * SCAN_BATCH:(attempt + 1) * SCAN_BATCH]
+
+
+def _process_scan(seed_data, attempt):
+    _, nis = _batch(seed_data, attempt)[0]
+    return {'data': {'qr_data': student_qr_data(nis, seed_data['url_values']['school_id']), 'status': 'hadir'}}
+
+
+def _record_attendance(seed_data, attempt):
+    student_id, _ = _batch(seed_data, attempt)[0]
+    return {'path_values': {'student_id': student_id}, 'data': {'status': 'izin'}}
+
+
+def _attendance_form(seed_data, attempt):
+    data = {'date': jakarta_now().strftime('%Y-%m-%d'), 'classroom_id': seed_data['url_values']['classroom_id']}
+    for student_id, _ in _batch(seed_data, attempt):
+        data[f'status_{student_id}'] = 'sakit'
+        data[f'notes_{student_id}'] = 'cek budget'
+    return {'data': data}
+
+
+def _bulk_attendance(seed_data, attempt):
+    students = [{'student_id': student_id, 'status': 'izin', 'notes': 'cek budget'}
+                for student_id, _ in _batch(seed_data, attempt)]
+    return {'json': {'students': students}}
+
+
+def _sync_scans(seed_data, attempt):
+    school_id = seed_data['url_values']['school_id']
+    scanned_at = (jakarta_now() - timedelta(minutes=1)).isoformat()
+    scans = [{'client_id': f'budget-{attempt}-{nis}', 'qr_data': student_qr_data(nis, school_id),
+              'scanned_at': scanned_at, 'status': 'hadir'}
+             for _, nis in _batch(seed_data, attempt)]
+    return {'json': {'scans': scans}}
+
+
+def _import_students(seed_data, attempt):
+    lines = ['nis,full_name,email']
+    lines += [f'IMP{attempt}{i:03d},Siswa Import {attempt} {i},' for i in range(IMPORT_ROWS)]
+    upload = (io.BytesIO('\n'.join(lines).encode()), 'siswa.csv')
+    return {'data': {'file': upload, 'classroom_id': seed_data['url_values']['classroom_id']},
+            'content_type': 'multipart/form-data'}
+
+
+# endpoint -> (role, builder, batas query). Jumlah query tidak boleh tumbuh
+# dengan jumlah siswa per request. Import ikut menjalankan job secara inline:
+# tiap baris punya savepoint sendiri (SAVEPOINT, user, siswa, email outbox,
+# RELEASE, progress job), jadi batasnya tetap + per baris.
+IMPORT_QUERIES_PER_ROW = 6
+POST_BUDGETS = {
+    'teacher.process_scan': ('teacher', _process_scan, 7),
+    'teacher.record_attendance': ('teacher', _record_attendance, 7),
+    'teacher.attendance': ('teacher', _attendance_form, 9),
+    'teacher.bulk_attendance': ('teacher', _bulk_attendance, 7),
+    'teacher.sync_scans': ('teacher', _sync_scans, 7),
+    'admin.import_students': ('admin', _import_students, 18 + IMPORT_QUERIES_PER_ROW * IMPORT_ROWS),
+}
+
+
+@pytest.mark.parametrize('post_endpoint', sorted(POST_BUDGETS))
+def test_post_query_budget(app, seed_data, clients, query_counter, post_endpoint):
+    role, builder, budget = POST_BUDGETS[post_endpoint]
+    client = clients[role]
+
+    def post(attempt):
+        kwargs = builder(seed_data, attempt)
+        with app.test_request_context():
+            url = url_for(post_endpoint, **kwargs.pop('path_values', {}))
+        return url, client.post(url, **kwargs)
+
+    post(0)
+    with query_counter:
+        url, response = post(1)
+
+    assert response.status_code < 400, f'{url} -> {response.status_code}'
+    if response.is_json:
+        assert response.get_json().get('success', True), response.get_json()
+    query_counter.assert_at_most(budget, post_endpoint)
@@ -0,0 +1,61 @@
+"""Roster index scan QR: hit dicek ulang dan invalidasi otomatis"""
+import pytest
+
+from extensions import cache, db
+from models import Classroom, Student, User
+from utils.roster_index import roster_index
+
+
+@pytest.fixture
+def roster(db_session, seed_data):
+    school_id = seed_data['url_values']['school_id']
+    student = db.session.get(Student, seed_data['url_values']['student_id'])
+    roster_index.clear()
+    yield school_id, student
+    db.session.rollback()
+    roster_index.clear()
+
+
+def test_hit_reflects_deactivated_account_in_other_worker(roster):
+    school_id, student = roster
+    assert roster_index.lookup(school_id, student.nis).is_active
+
+    # Worker lain menonaktifkan akun: tulis tanpa lewat ORM, tidak ada invalidasi di proses ini
+    db.session.execute(User.__table__.update().where(User.id == student.user_id).values(is_active=False))
+
+    assert not cache.shared
+    assert roster_index.lookup(school_id, student.nis).is_active is False
+
+
+def test_hit_reflects_moved_and_deleted_student(roster):
+    school_id, student = roster
+    other = Classroom.query.filter(Classroom.school_id == school_id, Classroom.id != student.classroom_id).first()
+    assert roster_index.lookup(school_id, student.nis).classroom_id == student.classroom_id
+
+    db.session.execute(Student.__table__.update().where(Student.id == student.id).values(classroom_id=other.id))
+    entry = roster_index.lookup(school_id, student.nis)
+    assert (entry.classroom_id, entry.classroom_name) == (other.id, other.name)
+
+    db.session.execute(Student.__table__.delete().where(Student.id == student.id))
+    assert roster_index.lookup(school_id, student.nis) is None
+
+
+def test_is_active_toggle_invalidates_roster(roster):
+    school_id, student = roster
+    key = f"roster:{school_id}:generation"
+    user = db.session.get(User, student.user_id)
+    generation = cache.get_counter(key)
+
+    try:
+        user.is_active = False
+        db.session.commit()
+        assert cache.get_counter(key) == generation + 1
+
+        # Rollback membuang perubahan yang belum di-commit, tanpa invalidasi
+        user.is_active = True
+        db.session.flush()
+        db.session.rollback()
+        assert cache.get_counter(key) == generation + 1
+    finally:
+        user.is_active = True
+        db.session.commit()
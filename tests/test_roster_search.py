@@ -0,0 +1,47 @@
+"""Pencarian awalan roster: nama tanpa membedakan huruf besar/kecil, NIS/NIP apa adanya"""
+import pytest
+from sqlalchemy import text
+
+from extensions import db
+from models import Student, Teacher, User, UserRole
+from utils.roster_search import search_students, search_teachers
+
+
+def add_user(school_id, username, role):
+    user = User(school_id=school_id, username=username, email=f'{username}@budget.local', role=role)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+@pytest.fixture
+def case_sensitive_like(db_session):
+    # LIKE di Postgres membedakan huruf besar/kecil; SQLite dibuat sama agar bug terlihat
+    sqlite = db.engine.dialect.name == 'sqlite'
+    if sqlite:
+        db_session.execute(text('PRAGMA case_sensitive_like = ON'))
+    yield db_session
+    if sqlite:
+        db_session.execute(text('PRAGMA case_sensitive_like = OFF'))
+
+
+def test_uppercase_nis_matches_prefix(case_sensitive_like, seed_data):
+    school_id = seed_data['url_values']['school_id']
+    user = add_user(school_id, 'student_AX9001', UserRole.STUDENT)
+    db.session.add(Student(school_id=school_id, user_id=user.id, nis='AX9001', nisn='NX9001', full_name='Budi Santoso'))
+    db.session.flush()
+
+    for q in ('AX90', 'NX90', 'budi s', 'BUDI'):
+        students, _ = search_students(school_id, q=q)
+        assert [s.nis for s in students] == ['AX9001'], q
+
+
+def test_uppercase_nip_matches_prefix(case_sensitive_like, seed_data):
+    school_id = seed_data['url_values']['school_id']
+    user = add_user(school_id, 'GX7001', UserRole.TEACHER)
+    db.session.add(Teacher(school_id=school_id, user_id=user.id, nip='GX7001', full_name='Rina Wati'))
+    db.session.flush()
+
+    for q in ('GX70', 'rina', 'RINA W'):
+        teachers, _ = search_teachers(school_id, q=q)
+        assert [t.nip for t in teachers] == ['GX7001'], q
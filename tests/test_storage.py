@@ -0,0 +1,29 @@
+"""Storage.put_many: upload paralel dengan hasil dan error per key"""
+from utils.storage import LocalStorage, Storage
+
+
+class FlakyStorage(LocalStorage):
+    """Gagal sekali untuk setiap key sebelum berhasil, kecuali key 'rusak/' yang selalu gagal"""
+
+    def __init__(self, root, base_url):
+        super().__init__(root, base_url)
+        self.failed = set()
+
+    def put(self, key, data, content_type=None):
+        if key.startswith('rusak/') or key not in self.failed:
+            self.failed.add(key)
+            raise OSError(f'upload {key} gagal')
+        return super().put(key, data, content_type)
+
+
+def test_put_many_retries_and_reports_errors(app, tmp_path):
+    storage = Storage()
+    storage.init_app(app, driver=FlakyStorage(str(tmp_path), '/files'))
+    storage.upload_attempts = 2
+
+    items = [(f'qr/{i}.png', f'data {i}'.encode()) for i in range(20)] + [('rusak/x.png', b'x')]
+    urls, errors = storage.put_many(items, content_type='image/png')
+
+    assert urls == {f'qr/{i}.png': f'/files/qr/{i}.png' for i in range(20)}
+    assert list(errors) == ['rusak/x.png']
+    assert (tmp_path / 'qr' / '7.png').read_bytes() == b'data 7'
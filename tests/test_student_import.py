@@ -0,0 +1,22 @@
+"""Akun hasil import: tanpa password yang bisa dipakai, diatur lewat link"""
+from utils.password_links import load_password_link, password_link_token
+from utils.student_import import _create_student
+
+
+def test_imported_account_has_unusable_password(db_session, seed_data):
+    school_id = seed_data['url_values']['school_id']
+    _, first = _create_student(school_id, None, {'nis': 'UNUSABLE1', 'full_name': 'Siswa A',
+                                                 'email': 'unusable1@budget.local'})
+    _, second = _create_student(school_id, None, {'nis': 'UNUSABLE2', 'full_name': 'Siswa B',
+                                                  'email': 'unusable2@budget.local'})
+
+    assert first.password_hash != second.password_hash
+    for password in ('', 'password', first.password_hash):
+        assert not first.check_password(password)
+
+    # Link set password berlaku sekali untuk user pemiliknya
+    token = password_link_token(first)
+    assert load_password_link(token) is first
+    first.set_password('password-baru')
+    assert first.check_password('password-baru')
+    assert load_password_link(token) is None
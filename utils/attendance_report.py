@@ -0,0 +1,145 @@
+import calendar
+from datetime import date, timedelta
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models import Attendance, AttendanceStatus, Classroom, SchoolEvent, Student
+
+# Kode singkat untuk grid rekap bulanan
+STATUS_CODES = {
+    AttendanceStatus.HADIR: 'H',
+    AttendanceStatus.IZIN: 'I',
+    AttendanceStatus.SAKIT: 'S',
+    AttendanceStatus.ALPHA: 'A',
+}
+
+
+def month_range(year, month):
+    """(tanggal pertama, tanggal pertama bulan berikutnya, jumlah hari)"""
+    days_in_month = calendar.monthrange(year, month)[1]
+    start_date = date(year, month, 1)
+    return start_date, start_date + timedelta(days=days_in_month), days_in_month
+
+
+def holiday_days(school_id, year, month):
+    """Day numbers of the month covered by SchoolEvent.is_holiday"""
+    start_date, end_date, days_in_month = month_range(year, month)
+    events = SchoolEvent.query.with_entities(SchoolEvent.start_date, SchoolEvent.end_date).filter(
+        SchoolEvent.school_id == school_id,
+        SchoolEvent.is_holiday.is_(True),
+        SchoolEvent.start_date < end_date,
+        SchoolEvent.end_date > start_date
+    ).all()
+
+    holidays = set()
+    for event_start, event_end in events:
+        # end_date disimpan eksklusif (+1 hari untuk FullCalendar)
+        for day in range(1, days_in_month + 1):
+            current = date(year, month, day)
+            if event_start.date() <= current < event_end.date():
+                holidays.add(day)
+    return holidays
+
+
+def monthly_recap(school_id, year, month, classroom_id=None):
+    """
+    Students x days attendance grid for one month, pivoted in SQL.
+
+    Satu query GROUP BY siswa menghasilkan status per tanggal (MAX(CASE ...)
+    per kolom hari, aman karena ada unique index student_id+date) dan jumlah
+    H/I/S/A, sehingga baris absensi mentah tidak pernah dimuat ke Python.
+    :return: dict dengan 'days', 'holidays' dan 'classrooms' (list kelas berisi siswa)
+    """
+    start_date, end_date, days_in_month = month_range(year, month)
+
+    day_columns = [
+        func.max(case((Attendance.date == date(year, month, day), Attendance.status), else_=None)).label(f'd{day}')
+        for day in range(1, days_in_month + 1)
+    ]
+    count_columns = [
+        func.sum(case((Attendance.status == status, 1), else_=0)).label(code)
+        for status, code in STATUS_CODES.items()
+    ]
+
+    query = db.session.query(
+        Classroom.id, Classroom.name, Student.id, Student.nis, Student.full_name,
+        *day_columns, *count_columns
+    ).select_from(Student)\
+     .join(Classroom, Classroom.id == Student.classroom_id)\
+     .outerjoin(Attendance, and_(
+        Attendance.student_id == Student.id,
+        Attendance.date >= start_date,
+        Attendance.date < end_date
+     ))\
+     .filter(Student.school_id == school_id)
+
+    if classroom_id:
+        query = query.filter(Student.classroom_id == classroom_id)
+
+    query = query.group_by(Classroom.id, Classroom.name, Student.id, Student.nis, Student.full_name)\
+                 .order_by(Classroom.name, Classroom.id, Student.full_name)  # id: kelas bernama sama tidak bercampur
+
+    classrooms = []
+    current = None
+    for row in query.all():
+        if current is None or current['id'] != row[0]:
+            current = {'id': row[0], 'name': row[1], 'students': []}
+            classrooms.append(current)
+        statuses = row[5:5 + days_in_month]
+        counts = row[5 + days_in_month:]
+        current['students'].append({
+            'id': row[2],
+            'nis': row[3],
+            'full_name': row[4],
+            'days': [STATUS_CODES.get(status, '') for status in statuses],
+            'counts': dict(zip(STATUS_CODES.values(), (int(c or 0) for c in counts)))
+        })
+
+    return {
+        'year': year,
+        'month': month,
+        'days': list(range(1, days_in_month + 1)),
+        'holidays': holiday_days(school_id, year, month),
+        'classrooms': classrooms
+    }
+
+
+def student_status_counts(student_id, start_date=None, end_date=None):
+    """
+    Status counts for one student with a single GROUP BY status query.
+    :return: dict hadir/izin/sakit/alpha (end_date inklusif)
+    """
+    query = db.session.query(Attendance.status, func.count(Attendance.id))\
+                      .filter(Attendance.student_id == student_id)
+    if start_date is not None:
+        query = query.filter(Attendance.date >= start_date)
+    if end_date is not None:
+        query = query.filter(Attendance.date <= end_date)
+
+    counts = {status.value: 0 for status in AttendanceStatus}
+    for status, total in query.group_by(Attendance.status).all():
+        counts[status.value] = total
+    return counts
+
+
+def student_history_page(student_id, before=None, per_page=30, start_date=None):
+    """
+    One page of a student's attendance, newest first, keyset-paginated on date
+    (unik per siswa karena index student_id+date), jadi halaman lama tidak
+    perlu OFFSET.
+    :param before: hanya record sebelum tanggal ini (cursor dari halaman sebelumnya)
+    :return: (list Attendance, cursor tanggal untuk halaman berikutnya atau None)
+    """
+    query = Attendance.query.options(joinedload(Attendance.teacher), joinedload(Attendance.classroom))\
+                            .filter(Attendance.student_id == student_id)
+    if before is not None:
+        query = query.filter(Attendance.date < before)
+    if start_date is not None:
+        query = query.filter(Attendance.date >= start_date)
+
+    records = query.order_by(Attendance.date.desc()).limit(per_page + 1).all()
+    next_cursor = None
+    if len(records) > per_page:
+        records = records[:per_page]
+        next_cursor = records[-1].date
+    return records, next_cursor
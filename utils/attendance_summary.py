@@ -0,0 +1,144 @@
+from sqlalchemy import and_, bindparam, case, func, literal, select, true, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models import Attendance, AttendanceStatus, DailyAttendanceSummary, jakarta_now
+
+# Kolom ringkasan untuk setiap status absensi
+STATUS_COLUMNS = {status: status.value for status in AttendanceStatus}
+
+
+def refresh_summary_rows(school_id, keys):
+    """
+    Recompute the summary rows for (classroom_id, date) pairs from attendances,
+    dalam transaksi penulisan absensi. Baris ringkasan dikunci dulu (upsert kosong,
+    urut key), lalu dihitung ulang dengan statement baru: penulis lain untuk kelas
+    dan tanggal yang sama menunggu lock ini dan menghitung ulang setelah commit,
+    jadi ringkasan tidak bergeser walau scan yang sama datang bersamaan.
+    Tidak melakukan commit.
+    """
+    keys = sorted({(classroom_id, day) for classroom_id, day in keys if classroom_id is not None})
+    if not keys:
+        return
+
+    summary = DailyAttendanceSummary.__table__
+    attendance = Attendance.__table__
+    now = jakarta_now()
+
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name not in ('postgresql', 'sqlite'):
+        for classroom_id, day in keys:
+            rebuild_daily_summary(school_id, day, day, [classroom_id])
+        return
+
+    insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+    stmt = insert(summary).values([
+        {'school_id': school_id, 'classroom_id': classroom_id, 'date': day, 'updated_at': now,
+         **{column: 0 for column in STATUS_COLUMNS.values()}}
+        for classroom_id, day in keys
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[summary.c.school_id, summary.c.classroom_id, summary.c.date],
+        set_={'updated_at': stmt.excluded.updated_at}
+    ))
+
+    counts = {key: {column: 0 for column in STATUS_COLUMNS.values()} for key in keys}
+    result = db.session.execute(
+        select(attendance.c.classroom_id, attendance.c.date, attendance.c.status, func.count())
+        .where(
+            attendance.c.school_id == school_id,
+            tuple_(attendance.c.classroom_id, attendance.c.date).in_(keys)
+        )
+        .group_by(attendance.c.classroom_id, attendance.c.date, attendance.c.status)
+    )
+    for classroom_id, day, status, total in result:
+        counts[(classroom_id, day)][STATUS_COLUMNS[status]] = total
+
+    db.session.execute(
+        update(summary).where(
+            summary.c.school_id == school_id,
+            summary.c.classroom_id == bindparam('b_classroom_id'),
+            summary.c.date == bindparam('b_date')
+        ).values(updated_at=now, **{column: bindparam(column) for column in STATUS_COLUMNS.values()}),
+        [{'b_classroom_id': classroom_id, 'b_date': day, **values} for (classroom_id, day), values in counts.items()]
+    )
+
+
+def rebuild_daily_summary(school_id=None, start_date=None, end_date=None, classroom_ids=None):
+    """
+    Recompute summary rows from the raw attendances table (INSERT ... SELECT GROUP BY).
+    Semua filter opsional; end_date inklusif. Tidak melakukan commit.
+    :return: jumlah baris ringkasan yang dibuat
+    """
+    summary = DailyAttendanceSummary.__table__
+    attendance = Attendance.__table__
+
+    summary_filters = []
+    attendance_filters = []
+    if school_id is not None:
+        summary_filters.append(summary.c.school_id == school_id)
+        attendance_filters.append(attendance.c.school_id == school_id)
+    if start_date is not None:
+        summary_filters.append(summary.c.date >= start_date)
+        attendance_filters.append(attendance.c.date >= start_date)
+    if end_date is not None:
+        summary_filters.append(summary.c.date <= end_date)
+        attendance_filters.append(attendance.c.date <= end_date)
+    if classroom_ids is not None:
+        classroom_ids = list(classroom_ids)
+        if not classroom_ids:
+            return 0
+        summary_filters.append(summary.c.classroom_id.in_(classroom_ids))
+        attendance_filters.append(attendance.c.classroom_id.in_(classroom_ids))
+
+    db.session.execute(summary.delete().where(and_(true(), *summary_filters)))
+
+    aggregate = select(
+        attendance.c.school_id,
+        attendance.c.classroom_id,
+        attendance.c.date,
+        *[func.sum(case((attendance.c.status == status, 1), else_=0)) for status in STATUS_COLUMNS],
+        literal(jakarta_now(), type_=summary.c.updated_at.type)
+    ).where(and_(true(), *attendance_filters))\
+     .group_by(attendance.c.school_id, attendance.c.classroom_id, attendance.c.date)
+
+    result = db.session.execute(summary.insert().from_select(
+        ['school_id', 'classroom_id', 'date', *STATUS_COLUMNS.values(), 'updated_at'],
+        aggregate
+    ))
+    return result.rowcount
+
+
+def affected_ranges(*criteria):
+    """
+    (classroom_id, tanggal awal, tanggal akhir) of attendance rows matching criteria.
+    Dipanggil sebelum penghapusan yang ikut menghapus absensi (cascade),
+    lalu hasilnya diberikan ke rebuild_ranges setelah flush.
+    """
+    return db.session.query(
+        Attendance.classroom_id, func.min(Attendance.date), func.max(Attendance.date)
+    ).filter(*criteria).group_by(Attendance.classroom_id).all()
+
+
+def rebuild_ranges(school_id, ranges):
+    for classroom_id, start_date, end_date in ranges:
+        rebuild_daily_summary(school_id, start_date, end_date, [classroom_id])
+
+
+def summary_counts(school_id, day, classroom_id=None):
+    """
+    Status counts for one day from the summary table (satu baris per kelas).
+    :return: dict hadir/izin/sakit/alpha/total
+    """
+    query = db.session.query(*[
+        func.coalesce(func.sum(getattr(DailyAttendanceSummary, column)), 0)
+        for column in STATUS_COLUMNS.values()
+    ]).filter(
+        DailyAttendanceSummary.school_id == school_id,
+        DailyAttendanceSummary.date == day
+    )
+    if classroom_id is not None:
+        query = query.filter(DailyAttendanceSummary.classroom_id == classroom_id)
+
+    counts = dict(zip(STATUS_COLUMNS.values(), (int(value) for value in query.one())))
+    counts['total'] = sum(counts.values())
+    return counts
@@ -0,0 +1,252 @@
+from collections import namedtuple
+from sqlalchemy import func, literal_column, or_, select, tuple_, update, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models import Attendance, AttendanceStatus, jakarta_now
+from utils.attendance_summary import refresh_summary_rows
+
+CREATED = 'created'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+
+# Batas baris per statement (Postgres maksimal 65535 parameter per query)
+UPSERT_CHUNK_SIZE = 1000
+
+# notes=None berarti "pertahankan catatan lama", string kosong menghapus catatan.
+# recorded_at (opsional) = waktu scan asli, dipakai sebagai created_at record baru
+AttendanceWrite = namedtuple(
+    'AttendanceWrite',
+    ['student_id', 'date', 'status', 'notes', 'recorded_by', 'classroom_id', 'recorded_at'],
+    defaults=(None,)
+)
+
+# previous_status hanya terisi untuk UPDATED, dan di SQLite selalu None
+AttendanceWriteResult = namedtuple(
+    'AttendanceWriteResult',
+    ['student_id', 'date', 'outcome', 'status', 'previous_status', 'notes', 'created_at']
+)
+
+
+def _normalize(rows):
+    """Convert status to AttendanceStatus and drop duplicate (student_id, date), last one wins"""
+    pending = {}
+    for row in rows:
+        if not isinstance(row, AttendanceWrite):
+            row = AttendanceWrite(*row)
+        if not isinstance(row.status, AttendanceStatus):
+            row = row._replace(status=AttendanceStatus(row.status))
+        pending.pop((row.student_id, row.date), None)
+        pending[(row.student_id, row.date)] = row
+    return pending
+
+
+def _fetch_existing(keys):
+    table = Attendance.__table__
+    existing = {}
+    keys = list(keys)
+    for i in range(0, len(keys), UPSERT_CHUNK_SIZE):
+        chunk = keys[i:i + UPSERT_CHUNK_SIZE]
+        result = db.session.execute(
+            select(table.c.student_id, table.c.date, table.c.status, table.c.notes,
+                   table.c.classroom_id, table.c.created_at)
+            .where(tuple_(table.c.student_id, table.c.date).in_(chunk))
+        )
+        for record in result:
+            existing[(record.student_id, record.date)] = record
+    return existing
+
+
+def _upsert_statement(dialect_name, values):
+    """
+    Single INSERT ... ON CONFLICT (student_id, date) DO UPDATE for Postgres/SQLite.
+    RETURNING hanya berisi baris yang ditulis (baru atau berubah); baris yang
+    tidak berubah dilewati oleh WHERE dan tidak dikembalikan.
+    """
+    table = Attendance.__table__
+    insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+    stmt = insert(table).values(values)
+    excluded = stmt.excluded
+    new_notes = func.coalesce(excluded.notes, table.c.notes)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id, table.c.date],
+        set_={
+            'status': excluded.status,
+            'notes': new_notes,
+            'recorded_by': excluded.recorded_by,
+            'updated_at': excluded.updated_at,
+        },
+        # Jangan sentuh baris yang tidak berubah (mis. scan ganda)
+        where=or_(
+            table.c.status.is_distinct_from(excluded.status),
+            new_notes.is_distinct_from(table.c.notes),
+        )
+    )
+
+    # classroom_id tidak diubah upsert, jadi nilai yang dikembalikan = kelas record lama
+    returning = [table.c.student_id, table.c.date, table.c.status, table.c.notes,
+                 table.c.classroom_id, table.c.created_at]
+    if dialect_name == 'postgresql':
+        # xmax = 0 hanya untuk baris yang baru di-insert oleh statement ini (bukan hasil
+        # pembacaan terpisah, jadi tetap benar saat dua scan bersamaan). Subquery di
+        # RETURNING memakai snapshot awal statement, jadi melihat status sebelum update.
+        # (ditulis literal: SQLAlchemy tidak meng-correlate subquery di RETURNING INSERT)
+        returning += [
+            literal_column('(xmax = 0)').label('inserted'),
+            literal_column(
+                '(SELECT previous.status FROM attendances AS previous WHERE previous.id = attendances.id)',
+                type_=table.c.status.type
+            ).label('previous_status'),
+        ]
+    return stmt.returning(*returning)
+
+
+def _naive(value):
+    return value.replace(tzinfo=None) if value is not None else None
+
+
+def _write_generic(inserts, updates):
+    """Fallback for dialects without ON CONFLICT support"""
+    table = Attendance.__table__
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+    if updates:
+        db.session.execute(
+            update(table)
+            .where(table.c.student_id == bindparam('b_student_id'), table.c.date == bindparam('b_date'))
+            .values(status=bindparam('status'), notes=bindparam('notes'),
+                    recorded_by=bindparam('recorded_by'), updated_at=bindparam('updated_at')),
+            [{'b_student_id': row['student_id'], 'b_date': row['date'], **row} for row in updates]
+        )
+
+
+def _write_upsert(dialect_name, values):
+    """
+    :return: ({key: AttendanceWriteResult} untuk baris yang ditulis, set (classroom_id, date) terdampak)
+    """
+    written = {}
+    affected = set()
+    to_write = list(values.values())
+    for i in range(0, len(to_write), UPSERT_CHUNK_SIZE):
+        chunk = to_write[i:i + UPSERT_CHUNK_SIZE]
+        for record in db.session.execute(_upsert_statement(dialect_name, chunk)):
+            key = (record.student_id, record.date)
+            sent = values[key]
+            if dialect_name == 'postgresql':
+                created = record.inserted
+                previous_status = record.previous_status
+            else:
+                # SQLite tanpa xmax: baris baru membawa created_at yang kita kirim, update
+                # mempertahankan created_at lama. Penulis SQLite diserialisasi, tidak ada balapan.
+                created = _naive(record.created_at) == _naive(sent['created_at'])
+                previous_status = None
+            written[key] = AttendanceWriteResult(
+                student_id=record.student_id,
+                date=record.date,
+                outcome=CREATED if created else UPDATED,
+                status=record.status,
+                previous_status=None if created else previous_status,
+                notes=record.notes,
+                created_at=record.created_at
+            )
+            affected.add((sent['classroom_id'], record.date))
+            affected.add((record.classroom_id, record.date))
+    return written, affected
+
+
+def _write_fallback(pending, values):
+    """Dialects without ON CONFLICT: baca record lama lalu insert/update"""
+    existing = _fetch_existing(pending.keys())
+    written = {}
+    affected = set()
+    inserts = []
+    updates = []
+    for key, row in pending.items():
+        old = existing.get(key)
+        notes = row.notes if old is None or row.notes is not None else old.notes
+        if old is not None and old.status == row.status and old.notes == notes:
+            continue
+        written[key] = AttendanceWriteResult(
+            student_id=row.student_id,
+            date=row.date,
+            outcome=CREATED if old is None else UPDATED,
+            status=row.status,
+            previous_status=old.status if old is not None else None,
+            notes=notes,
+            created_at=old.created_at if old is not None else values[key]['created_at']
+        )
+        affected.add((row.classroom_id, row.date))
+        if old is None:
+            inserts.append(values[key])
+        else:
+            affected.add((old.classroom_id, row.date))
+            updates.append({**values[key], 'notes': notes})
+    _write_generic(inserts, updates)
+    return written, affected
+
+
+def upsert_attendance(school_id, rows):
+    """
+    Write a batch of attendance records with one upsert statement; outcome
+    (CREATED/UPDATED/UNCHANGED) diambil dari RETURNING statement itu sendiri.
+    :param school_id: sekolah pemilik record
+    :param rows: iterable AttendanceWrite / tuple (student_id, date, status, notes, recorded_by, classroom_id[, recorded_at])
+    :return: list AttendanceWriteResult, urut sesuai baris unik yang diberikan
+
+    Ringkasan harian (daily_attendance_summary) ikut diperbarui dalam transaksi yang sama.
+    Tidak melakukan commit; pemanggil yang commit seperti route lainnya.
+    """
+    pending = _normalize(rows)
+    if not pending:
+        return []
+
+    now = jakarta_now()
+    values = {
+        key: {
+            'school_id': school_id,
+            'student_id': row.student_id,
+            'classroom_id': row.classroom_id,
+            'date': row.date,
+            'status': row.status,
+            'notes': row.notes,
+            'recorded_by': row.recorded_by,
+            'created_at': row.recorded_at or now,
+            'updated_at': now,
+        }
+        for key, row in pending.items()
+    }
+
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name in ('postgresql', 'sqlite'):
+        written, affected = _write_upsert(dialect_name, values)
+    else:
+        written, affected = _write_fallback(pending, values)
+
+    # Baris yang tidak ditulis sudah ada dengan status/catatan yang sama; dibaca
+    # setelah upsert hanya untuk melaporkan waktu pencatatan awalnya
+    unchanged = _fetch_existing([key for key in pending if key not in written])
+
+    results = []
+    for key, row in pending.items():
+        if key in written:
+            results.append(written[key])
+            continue
+        record = unchanged.get(key)
+        results.append(AttendanceWriteResult(
+            student_id=row.student_id,
+            date=row.date,
+            outcome=UNCHANGED,
+            status=record.status if record is not None else row.status,
+            previous_status=None,
+            notes=record.notes if record is not None else row.notes,
+            created_at=record.created_at if record is not None else values[key]['created_at']
+        ))
+
+    # Ringkasan dihitung ulang dari attendances untuk kelas baru dan kelas record lama
+    refresh_summary_rows(school_id, affected)
+
+    # Objek Attendance yang sudah dimuat di session kini usang
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Attendance):
+            db.session.expire(obj)
+
+    return results
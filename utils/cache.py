@@ -0,0 +1,222 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """Process-local TTL cache (default backend, juga dipakai saat testing)"""
+
+    shared = False  # tidak terlihat oleh worker lain
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                self._evict()
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._data[key] = (expires_at, value)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            expires_at, value = self._data.get(key, (None, 0))
+            value = int(value) + 1
+            self._data[key] = (expires_at, value)
+            return value
+
+    def get_counter(self, key):
+        return int(self.get(key) or 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        # Buang yang kedaluwarsa dulu, kalau masih penuh buang entri tertua
+        now = time.monotonic()
+        expired = [k for k, (exp, _) in self._data.items() if exp is not None and exp < now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.max_entries:
+            del self._data[next(iter(self._data))]
+
+
+class LRUCache:
+    """Thread-safe in-process LRU without TTL (untuk nilai deterministik, mis. gambar QR)"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """
+    Backend for any Redis-compatible client (redis-py, fakeredis, ...).
+    Nilai diserialisasi dengan pickle, jadi hanya untuk Redis internal.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix='hubsensi:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        raw = pickle.dumps(value)
+        if ttl:
+            self.client.setex(self.prefix + key, int(ttl), raw)
+        else:
+            self.client.set(self.prefix + key, raw)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + key))
+
+    def get_counter(self, key):
+        # Counter disimpan sebagai integer Redis biasa, bukan pickle
+        raw = self.client.get(self.prefix + key)
+        return int(raw) if raw is not None else 0
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class Cache:
+    """
+    Small cache extension configured from app.config:
+    - CACHE_BACKEND: 'memory' (default) atau 'redis'
+    - CACHE_REDIS_URL: URL Redis untuk backend 'redis'
+    - CACHE_DEFAULT_TTL: TTL default dalam detik
+    """
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.default_ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, client=None):
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+
+        if client is not None:
+            self.backend = RedisBackend(client)
+        elif backend == 'redis':
+            import redis
+            self.backend = RedisBackend(redis.Redis.from_url(app.config['CACHE_REDIS_URL']))
+        else:
+            self.backend = MemoryBackend()
+
+        app.extensions['cache'] = self
+
+    @property
+    def shared(self):
+        """True jika invalidasi (incr) terlihat oleh semua worker (Redis)"""
+        return self.backend.shared
+
+    def get(self, key):
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            # Cache tidak boleh menjatuhkan request, anggap miss
+            print(f"Cache get gagal ({key}): {e}")
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.backend.set(key, value, ttl if ttl is not None else self.default_ttl)
+        except Exception as e:
+            print(f"Cache set gagal ({key}): {e}")
+
+    def delete(self, *keys):
+        try:
+            self.backend.delete(*keys)
+        except Exception as e:
+            print(f"Cache delete gagal ({keys}): {e}")
+
+    def incr(self, key):
+        try:
+            return self.backend.incr(key)
+        except Exception as e:
+            print(f"Cache incr gagal ({key}): {e}")
+            return None
+
+    def get_counter(self, key):
+        try:
+            return self.backend.get_counter(key)
+        except Exception as e:
+            print(f"Cache get_counter gagal ({key}): {e}")
+            return 0
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, factory, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
@@ -0,0 +1,166 @@
+import io
+import os
+import re
+import secrets
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from PIL import Image
+from extensions import storage
+from models import Classroom, Student
+from utils.card_generator import card_assets, card_png, render_card
+from utils.jobs import job_handler
+from utils.qr_render import render_qr_png, student_qr_data
+
+CARD_BATCH_JOB_TYPE = 'class_cards'
+CARD_BATCH_FORMATS = {
+    'pdf': 'application/pdf',
+    'zip': 'application/zip',
+}
+
+# Halaman A4 300 dpi, kartu CR80 (54 x 85.6 mm) ukuran asli, 3 x 3 per halaman
+PAGE_SIZE = (2480, 3508)
+PAGE_DPI = 300
+CARD_SIZE = (638, 1011)
+CARDS_PER_ROW = 3
+CARDS_PER_COLUMN = 3
+CARDS_PER_PAGE = CARDS_PER_ROW * CARDS_PER_COLUMN
+
+# Di bawah jumlah ini render langsung di proses worker (start pool lebih mahal)
+CARD_POOL_MIN_ITEMS = 20
+
+# Laporan progres setiap N kartu
+CARD_CHECKPOINT_EVERY = 10
+
+def _init_worker():
+    # Template dan font dimuat sekali per proses pool
+    card_assets()
+
+
+def _render_task(task):
+    """
+    Render one card in a pool process (fungsi top-level agar bisa di-pickle).
+    :param task: (full_name, nis, school_id, fmt)
+    :return: PNG bytes; untuk PDF sudah diperkecil ke ukuran cetak
+    """
+    full_name, nis, school_id, fmt = task
+    card = render_card(card_assets(), full_name, nis, render_qr_png(student_qr_data(nis, school_id)))
+    if fmt == 'pdf':
+        card = card.convert('RGB').resize(CARD_SIZE, Image.LANCZOS)
+    return card_png(card)
+
+
+def _render_cards(tasks, processes=None):
+    """Yield rendered cards in order, memakai process pool untuk kelas besar"""
+    processes = processes or os.cpu_count() or 1
+    if len(tasks) < CARD_POOL_MIN_ITEMS or processes <= 1:
+        for task in tasks:
+            yield _render_task(task)
+        return
+
+    chunksize = max(1, len(tasks) // (processes * 4))
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        yield from pool.map(_render_task, tasks, chunksize=chunksize)
+
+
+def _card_position(index):
+    column = index % CARDS_PER_ROW
+    row = index // CARDS_PER_ROW
+    gap_x = (PAGE_SIZE[0] - CARDS_PER_ROW * CARD_SIZE[0]) // (CARDS_PER_ROW + 1)
+    gap_y = (PAGE_SIZE[1] - CARDS_PER_COLUMN * CARD_SIZE[1]) // (CARDS_PER_COLUMN + 1)
+    return (
+        gap_x + column * (CARD_SIZE[0] + gap_x),
+        gap_y + row * (CARD_SIZE[1] + gap_y),
+    )
+
+
+def _write_pdf(output, cards):
+    """
+    Write cards to a multi-page PDF one page at a time, jadi hanya satu
+    halaman yang ada di memori (halaman berikutnya di-append ke file).
+    """
+    page, on_page, pages = None, 0, 0
+
+    def flush():
+        page.save(output, format='PDF', resolution=PAGE_DPI, append=pages > 0)
+
+    for card_bytes in cards:
+        if page is None:
+            page = Image.new('RGB', PAGE_SIZE, 'white')
+        page.paste(Image.open(io.BytesIO(card_bytes)), _card_position(on_page))
+        on_page += 1
+        yield
+        if on_page == CARDS_PER_PAGE:
+            flush()
+            page, on_page, pages = None, 0, pages + 1
+
+    if page is not None:
+        flush()
+
+
+def _write_zip(output, cards, filenames):
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        # PNG sudah terkompresi, ZIP_STORED menghemat CPU
+        for card_bytes, filename in zip(cards, filenames):
+            archive.writestr(filename, card_bytes)
+            yield
+
+
+def _safe_filename(value):
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', value).strip('_') or 'kelas'
+
+
+@job_handler(CARD_BATCH_JOB_TYPE)
+def class_cards_job(ctx, payload):
+    """
+    Render ID cards for every student in a classroom into one file
+    (PDF siap cetak 3 x 3 per halaman A4, atau ZIP berisi PNG per siswa)
+    dan simpan ke storage private. Hasil: {'key', 'filename', 'content_type'}.
+    """
+    school_id = payload['school_id']
+    fmt = payload.get('format', 'pdf')
+    if fmt not in CARD_BATCH_FORMATS:
+        raise ValueError(f"Format kartu tidak dikenal: {fmt}")
+
+    classroom = Classroom.query.filter_by(id=payload['classroom_id'], school_id=school_id).first()
+    if classroom is None:
+        raise ValueError('Kelas tidak ditemukan')
+
+    students = Student.query.with_entities(Student.full_name, Student.nis).filter_by(
+        school_id=school_id,
+        classroom_id=classroom.id
+    ).order_by(Student.full_name, Student.id).all()
+    if not students:
+        raise ValueError('Belum ada siswa di kelas ini')
+
+    # File dibuat ulang dari awal jika job diulang
+    ctx.restart()
+    ctx.set_total(len(students))
+    ctx.checkpoint()
+
+    tasks = [(full_name, nis, school_id, fmt) for full_name, nis in students]
+    cards = _render_cards(tasks, current_app.config.get('CARD_RENDER_PROCESSES'))
+
+    filename = f"kartu_{_safe_filename(classroom.name)}.{fmt}"
+    # Storage private + token acak: file hanya bisa diambil lewat job_download
+    key = f"cards/{school_id}/{secrets.token_urlsafe(16)}/{filename}"
+
+    with tempfile.TemporaryFile() as output:
+        if fmt == 'pdf':
+            steps = _write_pdf(output, cards)
+        else:
+            steps = _write_zip(output, cards, [
+                f"{index:03d}_{nis}_{_safe_filename(full_name)}.png"
+                for index, (full_name, nis) in enumerate(students, start=1)
+            ])
+
+        for _ in steps:
+            ctx.advance()
+            if ctx.processed % CARD_CHECKPOINT_EVERY == 0:
+                ctx.checkpoint()
+
+        output.seek(0)
+        storage.put_private_stream(key, output, content_type=CARD_BATCH_FORMATS[fmt])
+
+    return {'key': key, 'filename': filename, 'content_type': CARD_BATCH_FORMATS[fmt]}
@@ -1,22 +1,62 @@
 from PIL import Image, ImageDraw, ImageFont,ImageOps
-import requests
 import io
 import textwrap
+import threading
+from utils.cache import LRUCache
+from utils.qr_render import qr_image
 
-def generate_student_card(student_name, nis, qr_code):
+CARD_TEMPLATE_PATH = "static/img/card_template.png"
+FONT_BOLD_PATH = "static/fonts/AvenirBlack.ttf"
+FONT_REGULAR_PATH = "static/fonts/AvenirMedium.ttf"
+
+# Naikkan jika template, font atau tata letak kartu berubah agar cache lama tidak dipakai
+CARD_TEMPLATE_VERSION = 1
+
+# PNG kartu jadi (~ratusan KB), key (nama, NIS, isi QR, versi template)
+card_cache = LRUCache(max_entries=128)
+
+# Template + font dimuat sekali per proses (worker gunicorn / process pool)
+_assets = None
+_assets_lock = threading.Lock()
+
+
+def load_card_assets():
     """
-    Generates a student card with text wrapping for the student's name.
+    Load the card template and both fonts once.
+    :return: (template, font_bold, font_regular); template dicopy per kartu
     """
-    template = Image.open("static/img/card_template.png")
-    draw = ImageDraw.Draw(template)
+    template = Image.open(CARD_TEMPLATE_PATH)
+    template.load()
 
     try:
-        font_bold = ImageFont.truetype("static/fonts/AvenirBlack.ttf", 65)
-        font_regular = ImageFont.truetype("static/fonts/AvenirMedium.ttf", 65)
+        font_bold = ImageFont.truetype(FONT_BOLD_PATH, 65)
+        font_regular = ImageFont.truetype(FONT_REGULAR_PATH, 65)
     except IOError:
         font_bold = ImageFont.load_default()
         font_regular = ImageFont.load_default()
 
+    return template, font_bold, font_regular
+
+
+def card_assets():
+    """Resident (template, font_bold, font_regular) for this process"""
+    global _assets
+    if _assets is None:
+        with _assets_lock:
+            if _assets is None:
+                _assets = load_card_assets()
+    return _assets
+
+
+def render_card(assets, student_name, nis, qr_png):
+    """
+    Draw one student card on a copy of the loaded template.
+    :return: PIL Image
+    """
+    base_template, font_bold, font_regular = assets
+    template = base_template.copy()
+    draw = ImageDraw.Draw(template)
+
     # --- LOGIKA TEXT WRAP DIMULAI DI SINI ---
 
     # 1. Tentukan lebar maksimal untuk teks nama (dalam jumlah karakter)
@@ -50,22 +90,38 @@ def generate_student_card(student_name, nis, qr_code):
     # 4. Gambar teks NIS di posisi yang sudah dihitung
     draw.text((nis_x_position, y_position + 20), nis_text, font=font_regular, fill=(255, 255, 255, 255))
 
-    if qr_code:
+    if qr_png:
         try:
-            response = requests.get(qr_code)
-            response.raise_for_status() 
-            qr_img = Image.open(io.BytesIO(response.content)).resize((700, 700))
+            qr_img = Image.open(io.BytesIO(qr_png)).resize((700, 700))
             qr_img_grayscale = qr_img.convert('L')
             inverted_qr_mask = ImageOps.invert(qr_img_grayscale)
             black = 0
             template.paste(black, (290, 1100), mask=inverted_qr_mask)
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching QR code from S3: {e}")
+        except OSError as e:
+            print(f"Error membaca gambar QR: {e}")
             pass
 
-    # Save the image to a byte stream
+    return template
+
+
+def card_png(card):
     img_byte_arr = io.BytesIO()
-    template.save(img_byte_arr, format='PNG')
-    img_byte_arr = img_byte_arr.getvalue()
+    card.save(img_byte_arr, format='PNG')
+    return img_byte_arr.getvalue()
+
+
+def generate_student_card(student_name, nis, qr_png):
+    """
+    Generates a student card with text wrapping for the student's name.
+    qr_png: bytes PNG QR siswa (utils.qr_render.qr_image)
+    """
+    return card_png(render_card(card_assets(), student_name, nis, qr_png))
 
-    return img_byte_arr
\ No newline at end of file
+
+def student_card(student_name, nis, qr_data):
+    """
+    Card PNG for one student from the in-process LRU cache; QR dirender
+    dari qr_data lewat utils.qr_render.qr_image (juga di-cache).
+    """
+    key = (student_name, nis, qr_data, CARD_TEMPLATE_VERSION)
+    return card_cache.get_or_set(key, lambda: generate_student_card(student_name, nis, qr_image(qr_data)))
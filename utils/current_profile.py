@@ -0,0 +1,32 @@
+from flask import g
+from flask_login import current_user
+from sqlalchemy.orm import joinedload
+from models import User, School
+
+
+def load_user_with_profile(user_id):
+    """
+    Load a user together with teacher/student profile, school and subscription
+    in one joined query. Dipakai oleh user_loader Flask-Login sehingga
+    current_user.teacher_profile, current_user.school.subscription, dst.
+    tidak memicu query tambahan selama request.
+    """
+    return User.query.options(
+        joinedload(User.teacher_profile),
+        joinedload(User.student_profile),
+        joinedload(User.school).joinedload(School.subscription)
+    ).filter(User.id == user_id).first()
+
+
+def current_teacher():
+    """Teacher profile of the logged-in user, cached on flask.g for this request"""
+    if '_current_teacher' not in g:
+        g._current_teacher = current_user.teacher_profile if current_user.is_authenticated else None
+    return g._current_teacher
+
+
+def current_student():
+    """Student profile of the logged-in user, cached on flask.g for this request"""
+    if '_current_student' not in g:
+        g._current_student = current_user.student_profile if current_user.is_authenticated else None
+    return g._current_student
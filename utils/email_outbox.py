@@ -0,0 +1,127 @@
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import or_
+from extensions import db, mailer
+from models import EmailOutbox, EmailStatus, jakarta_now
+from utils.mailer import EmailTransportError, OutgoingEmail
+
+# Jeda retry maksimal (backoff eksponensial dibatasi)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+# Isi email (link set password, dll.) tidak disimpan setelah terkirim / gagal permanen
+REDACTED_BODY = '[dihapus]'
+
+
+def queue_email(to_email, subject, body, school_id=None):
+    """
+    Add an email to the outbox in the current transaction. Email hanya
+    terkirim jika transaksi pemanggil di-commit; worker yang mengirimnya.
+    """
+    email = EmailOutbox(
+        school_id=school_id,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status=EmailStatus.PENDING,
+        attempts=0,
+        next_attempt_at=jakarta_now()
+    )
+    db.session.add(email)
+    return email
+
+
+def _retry_delay(attempts):
+    delay = timedelta(seconds=mailer.retry_base_seconds * 2 ** (attempts - 1))
+    return min(delay, MAX_RETRY_DELAY)
+
+
+def _mark_sent(email, now):
+    email.attempts = (email.attempts or 0) + 1
+    email.status = EmailStatus.SENT
+    email.sent_at = now
+    email.last_error = None
+    email.body = REDACTED_BODY
+
+
+def _mark_failed(email, error, now):
+    email.attempts = (email.attempts or 0) + 1
+    email.last_error = str(error)
+    if not error.retryable or email.attempts >= mailer.max_attempts:
+        email.status = EmailStatus.FAILED
+        email.body = REDACTED_BODY
+    else:
+        email.next_attempt_at = now + _retry_delay(email.attempts)
+
+
+def _message(email):
+    return OutgoingEmail(email.to_email, email.subject, email.body)
+
+
+def deliver_outbox(limit=None):
+    """
+    Send one batch of due outbox emails in a single transport call.
+    Jika batch ditolak permanen (mis. satu alamat tidak valid), email dikirim
+    ulang satu per satu agar penerima lain tidak ikut gagal.
+    :return: jumlah email yang diproses
+    """
+    now = jakarta_now()
+    query = EmailOutbox.query.filter(
+        EmailOutbox.status == EmailStatus.PENDING,
+        or_(EmailOutbox.next_attempt_at.is_(None), EmailOutbox.next_attempt_at <= now)
+    ).order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(limit or mailer.batch_size)
+
+    # Beberapa worker bisa berjalan bersamaan di Postgres
+    if db.session.get_bind().dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+
+    emails = query.all()
+    if not emails:
+        db.session.rollback()
+        return 0
+
+    try:
+        mailer.send([_message(email) for email in emails])
+    except EmailTransportError as e:
+        if e.retryable or len(emails) == 1:
+            for email in emails:
+                _mark_failed(email, e, now)
+        else:
+            for email in emails:
+                try:
+                    mailer.send([_message(email)])
+                except EmailTransportError as single_error:
+                    _mark_failed(email, single_error, now)
+                else:
+                    _mark_sent(email, now)
+    else:
+        for email in emails:
+            _mark_sent(email, now)
+
+    db.session.commit()
+    return len(emails)
+
+
+def purge_outbox(retention_days=None):
+    """
+    Delete SENT/FAILED outbox rows older than EMAIL_RETENTION_DAYS.
+    :return: jumlah baris yang dihapus
+    """
+    if retention_days is None:
+        retention_days = current_app.config.get('EMAIL_RETENTION_DAYS', 30)
+    cutoff = jakarta_now() - timedelta(days=retention_days)
+    deleted = EmailOutbox.query.filter(
+        EmailOutbox.status.in_([EmailStatus.SENT, EmailStatus.FAILED]),
+        EmailOutbox.created_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def deliver_all():
+    """Drain every email that is currently due (CLI / test)"""
+    total = 0
+    while True:
+        processed = deliver_outbox()
+        if not processed:
+            return total
+        total += processed
@@ -0,0 +1,126 @@
+import time
+from flask import g, has_request_context, request, request_finished, request_started
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.metrics import Counter, Histogram
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 100, 200, 500, 1000)
+RESPONSE_SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+# Endpoint yang tidak diukur
+SKIP_ENDPOINTS = {'static', 'metrics'}
+
+# Semua metrik per proses worker, label = endpoint Flask
+request_duration = Histogram(
+    'hubsensi_request_duration_seconds',
+    'Wall time per request',
+    label_name='endpoint'
+)
+request_db_duration = Histogram(
+    'hubsensi_request_db_seconds',
+    'Total database time per request',
+    label_name='endpoint'
+)
+request_queries = Histogram(
+    'hubsensi_request_queries',
+    'SQL statements per request',
+    buckets=QUERY_COUNT_BUCKETS,
+    label_name='endpoint'
+)
+response_size = Histogram(
+    'hubsensi_response_size_bytes',
+    'Response body size',
+    buckets=RESPONSE_SIZE_BUCKETS,
+    label_name='endpoint'
+)
+slow_requests = Counter(
+    'hubsensi_slow_requests_total',
+    'Requests over INSTRUMENTATION_SLOW_SECONDS',
+    label_name='endpoint'
+)
+query_heavy_requests = Counter(
+    'hubsensi_query_heavy_requests_total',
+    'Requests over INSTRUMENTATION_MAX_QUERIES (kemungkinan N+1)',
+    label_name='endpoint'
+)
+
+REQUEST_METRICS = [request_duration, request_db_duration, request_queries, response_size, slow_requests, query_heavy_requests]
+
+
+class RequestStats:
+    """Per-request counters disimpan di flask.g selama request berjalan"""
+
+    __slots__ = ('started', 'queries', 'db_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    # Query di luar request (worker, CLI) tidak dihitung
+    if has_request_context():
+        stats = g.get('request_stats')
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+
+def _request_started(sender, **extra):
+    g.request_stats = RequestStats()
+
+
+def _request_finished(sender, response, **extra):
+    stats = g.pop('request_stats', None)
+    endpoint = request.endpoint or 'unmatched'
+    if stats is None or endpoint in SKIP_ENDPOINTS:
+        return
+
+    duration = time.perf_counter() - stats.started
+    request_duration.observe(duration, endpoint)
+    request_db_duration.observe(stats.db_time, endpoint)
+    request_queries.observe(stats.queries, endpoint)
+
+    # Streaming tanpa Content-Length tidak diukur
+    size = response.content_length
+    if size is None and not response.is_streamed:
+        size = response.calculate_content_length()
+    if size is not None:
+        response_size.observe(size, endpoint)
+
+    config = sender.config
+    if duration > config.get('INSTRUMENTATION_SLOW_SECONDS', 1.0):
+        slow_requests.inc(endpoint)
+        sender.logger.warning(
+            "Request lambat: %s %.3fs (%d query, DB %.3fs)", endpoint, duration, stats.queries, stats.db_time
+        )
+    if stats.queries > config.get('INSTRUMENTATION_MAX_QUERIES', 30):
+        query_heavy_requests.inc(endpoint)
+        sender.logger.warning("Query berlebih: %s menjalankan %d query", endpoint, stats.queries)
+
+
+def init_instrumentation(app):
+    """
+    Opt-in per-endpoint request metrics (INSTRUMENTATION_ENABLED): jumlah query,
+    waktu DB, wall time dan ukuran response, disajikan di /metrics.
+    """
+    if not app.config.get('INSTRUMENTATION_ENABLED', False):
+        return
+
+    # Listener di kelas Engine berlaku untuk semua engine (satu per proses)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
@@ -0,0 +1,225 @@
+from datetime import timedelta
+from flask import current_app, abort, send_file
+from sqlalchemy import and_, or_
+from extensions import db, storage
+from models import BackgroundJob, JobStatus, jakarta_now
+
+# Batas entri error yang disimpan per job (sisanya hanya dihitung)
+MAX_JOB_ERRORS = 1000
+
+_handlers = {}
+
+
+def job_handler(job_type):
+    """
+    Register a function as the handler for a job type.
+    Handler dipanggil dengan (ctx: JobContext, payload: dict) dan boleh
+    mengembalikan dict yang disimpan sebagai job.result.
+    """
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+class JobContext:
+    """
+    Progress reporting for a running job.
+
+    Perubahan progres ikut di-commit bersama pekerjaan handler lewat
+    checkpoint(), jadi `processed` selalu sama dengan baris yang sudah
+    tersimpan dan job yang diulang bisa melanjutkan dari sana.
+    """
+
+    def __init__(self, job):
+        self.job = job
+
+    @property
+    def processed(self):
+        return self.job.processed or 0
+
+    def restart(self):
+        """Reset progress for handlers that redo the whole job on retry"""
+        self.job.processed = 0
+        self.job.success_count = 0
+        self.job.error_count = 0
+        self.job.errors = []
+
+    def set_total(self, total):
+        self.job.total = total
+
+    def advance(self, success=True):
+        self.job.processed = self.processed + 1
+        if success:
+            self.job.success_count = (self.job.success_count or 0) + 1
+
+    def add_error(self, row, message, counted=True, **extra):
+        if counted:
+            self.job.error_count = (self.job.error_count or 0) + 1
+        errors = self.job.errors or []
+        if len(errors) < MAX_JOB_ERRORS:
+            # Assign list baru supaya kolom JSON terdeteksi berubah
+            self.job.errors = errors + [{'row': row, 'message': message, **extra}]
+
+    def checkpoint(self):
+        self.job.heartbeat_at = jakarta_now()
+        db.session.commit()
+
+
+def enqueue(job_type, payload, school_id=None, created_by=None, staged=False):
+    """
+    Create a pending job. Dengan JOBS_INLINE=True (testing) job langsung
+    dijalankan di proses ini sebelum fungsi kembali.
+    :param staged: simpan sebagai STAGED; baru masuk antrian setelah release_job()
+    """
+    if job_type not in _handlers:
+        raise ValueError(f"Tipe job tidak dikenal: {job_type}")
+
+    job = BackgroundJob(
+        school_id=school_id,
+        created_by=created_by,
+        job_type=job_type,
+        status=JobStatus.STAGED if staged else JobStatus.PENDING,
+        payload=payload,
+        total=0,
+        processed=0,
+        success_count=0,
+        error_count=0,
+        attempts=0
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    if not staged and current_app.config.get('JOBS_INLINE', False):
+        run_job(job.id)
+    return job
+
+
+def release_job(job):
+    """Move a STAGED job into the queue"""
+    if job.status != JobStatus.STAGED:
+        return job
+    job.status = JobStatus.PENDING
+    db.session.commit()
+
+    if current_app.config.get('JOBS_INLINE', False):
+        run_job(job.id)
+    return job
+
+
+def claim_next_job():
+    """
+    Lock and mark the oldest runnable job as RUNNING.
+    Job RUNNING tanpa heartbeat selama JOBS_STALE_SECONDS dianggap ditinggal
+    worker yang mati dan diambil ulang (sampai JOBS_MAX_ATTEMPTS).
+    :return: id job atau None jika antrian kosong
+    """
+    now = jakarta_now()
+    stale_before = now - timedelta(seconds=current_app.config.get('JOBS_STALE_SECONDS', 300))
+    max_attempts = current_app.config.get('JOBS_MAX_ATTEMPTS', 3)
+
+    query = BackgroundJob.query.filter(or_(
+        BackgroundJob.status == JobStatus.PENDING,
+        and_(BackgroundJob.status == JobStatus.RUNNING, BackgroundJob.heartbeat_at < stale_before)
+    )).order_by(BackgroundJob.created_at, BackgroundJob.id)
+
+    # Beberapa worker bisa berjalan bersamaan di Postgres
+    if db.session.get_bind().dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+
+    while True:
+        job = query.first()
+        if job is None:
+            db.session.rollback()
+            return None
+
+        if (job.attempts or 0) >= max_attempts:
+            job.status = JobStatus.FAILED
+            job.message = 'Job dihentikan setelah percobaan maksimal'
+            job.finished_at = now
+            db.session.commit()
+            continue
+
+        job.status = JobStatus.RUNNING
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        db.session.commit()
+        return job.id
+
+
+def run_job(job_id):
+    """Run one job to completion and record the outcome on the job row"""
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None:
+        return None
+
+    if job.status == JobStatus.PENDING:
+        # Mode inline tidak melewati claim_next_job
+        job.status = JobStatus.RUNNING
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = job.heartbeat_at = jakarta_now()
+        db.session.commit()
+
+    handler = _handlers.get(job.job_type)
+    try:
+        if handler is None:
+            raise ValueError(f"Tipe job tidak dikenal: {job.job_type}")
+        result = handler(JobContext(job), job.payload or {})
+        job.result = result
+        job.status = JobStatus.SUCCEEDED
+        job.finished_at = jakarta_now()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Job {job_id} ({job.job_type}) gagal: {e}")
+        job = db.session.get(BackgroundJob, job_id)
+        job.status = JobStatus.FAILED
+        job.message = str(e)
+        job.finished_at = jakarta_now()
+        db.session.commit()
+    return job
+
+
+def job_file_response(job, as_attachment=True):
+    """Stream the file a finished job stored (job.result['key']) from private storage"""
+    result = job.result or {}
+    if job.status != JobStatus.SUCCEEDED or not result.get('key'):
+        abort(404)
+
+    file_obj = storage.open_private(result['key'])
+    if file_obj is None:
+        abort(404)
+    return send_file(
+        file_obj,
+        mimetype=result.get('content_type', 'application/octet-stream'),
+        as_attachment=as_attachment,
+        download_name=result.get('filename') or result['key'].rsplit('/', 1)[-1]
+    )
+
+
+def delete_job_files(jobs):
+    """Hapus file hasil (job.result['key']) sebelum baris job dihapus"""
+    for job in jobs:
+        key = (job.result or {}).get('key')
+        if key:
+            storage.delete_private(key)
+
+
+def purge_jobs(retention_days=None):
+    """
+    Delete SUCCEEDED/FAILED jobs older than JOBS_RETENTION_DAYS, beserta file hasilnya.
+    :return: jumlah job yang dihapus
+    """
+    if retention_days is None:
+        retention_days = current_app.config.get('JOBS_RETENTION_DAYS', 7)
+    cutoff = jakarta_now() - timedelta(days=retention_days)
+    jobs = BackgroundJob.query.filter(
+        BackgroundJob.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED]),
+        BackgroundJob.created_at < cutoff
+    ).all()
+    delete_job_files(jobs)
+    for job in jobs:
+        db.session.delete(job)
+    db.session.commit()
+    return len(jobs)
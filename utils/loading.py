@@ -0,0 +1,120 @@
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+from models import Attendance, Classroom, Student, TeacherAttendance
+
+
+class LazyLoadError(RuntimeError):
+    """Relationship dimuat per baris (N+1) saat STRICT_LOADING aktif"""
+
+
+def strict_loading_enabled():
+    return current_app.config.get('STRICT_LOADING', False)
+
+
+def list_options(*loads):
+    """
+    Loader options for a list query. Di strict mode semua relationship lain
+    di-raiseload, jadi akses yang lupa di-load langsung error, bukan query per baris.
+    """
+    if strict_loading_enabled():
+        return loads + (raiseload('*'),)
+    return loads
+
+
+# Strategi per konteks daftar: many-to-one di-join, one-to-many lewat selectin
+def attendance_list_options():
+    """Attendance rows shown with student, classroom and recording teacher"""
+    return list_options(
+        joinedload(Attendance.student),
+        joinedload(Attendance.classroom),
+        joinedload(Attendance.teacher)
+    )
+
+
+def teacher_attendance_list_options():
+    return list_options(joinedload(TeacherAttendance.teacher))
+
+
+def student_list_options():
+    return list_options(joinedload(Student.classroom))
+
+
+def classroom_roster_options():
+    """Classroom with its students (satu query tambahan untuk semua kelas)"""
+    return list_options(selectinload(Classroom.students))
+
+
+def attendance_list(school_id, date, classroom_id=None):
+    """Attendance of a school on a date, siap ditampilkan tanpa N+1"""
+    query = Attendance.query.options(*attendance_list_options())\
+                            .filter(Attendance.school_id == school_id, Attendance.date == date)
+    if classroom_id:
+        query = query.filter(Attendance.classroom_id == classroom_id)
+    return query.all()
+
+
+def recent_attendance(school_id, limit=5):
+    return Attendance.query.options(*attendance_list_options())\
+                           .filter(Attendance.school_id == school_id)\
+                           .order_by(Attendance.created_at.desc())\
+                           .limit(limit).all()
+
+
+def teacher_attendance_list(school_id, date):
+    return TeacherAttendance.query.options(*teacher_attendance_list_options())\
+                                  .filter(TeacherAttendance.school_id == school_id, TeacherAttendance.date == date)\
+                                  .all()
+
+
+def students_with_classroom(school_id, classroom_id=None):
+    query = Student.query.options(*student_list_options()).filter(Student.school_id == school_id)
+    if classroom_id:
+        query = query.filter(Student.classroom_id == classroom_id)
+    return query.all()
+
+
+def _count_lazy_load(orm_execute_state):
+    """
+    Strict mode: relationship yang sama di-lazy-load lebih dari
+    STRICT_LOADING_MAX_LAZY kali dalam satu request dianggap N+1.
+    Lazy load tunggal (mis. student.classroom di halaman detail) tetap boleh.
+    """
+    if not orm_execute_state.is_relationship_load or not has_request_context():
+        return
+    # Hanya lazy load sungguhan; selectin/subquery eager load juga relationship load
+    # tetapi lazy_loaded_from-nya None
+    if orm_execute_state.lazy_loaded_from is None:
+        return
+    if not strict_loading_enabled():
+        return
+
+    # Key per relationship (mis. "Attendance.student"), bukan per pasangan kelas
+    path = orm_execute_state.loader_strategy_path
+    if path:
+        key = str(path[-1])
+    else:
+        target = orm_execute_state.all_mappers[0] if orm_execute_state.all_mappers else None
+        key = f"{orm_execute_state.lazy_loaded_from.class_.__name__} -> {target.class_.__name__ if target is not None else '?'}"
+
+    counts = g.setdefault('_lazy_loads', {})
+    counts[key] = counts.get(key, 0) + 1
+    limit = current_app.config.get('STRICT_LOADING_MAX_LAZY', 1)
+    if counts[key] > limit:
+        raise LazyLoadError(
+            f"Lazy load {key} ke-{counts[key]} dalam satu request (kemungkinan N+1); "
+            f"tambahkan loader option dari utils/loading.py"
+        )
+
+
+def init_strict_loading(app):
+    """
+    Debug mode (STRICT_LOADING): error pada lazy load berulang dan pada
+    relationship yang tidak di-load oleh helper di modul ini.
+    """
+    if not app.config.get('STRICT_LOADING', False):
+        return
+
+    # Listener di kelas Session berlaku untuk session Flask-SQLAlchemy
+    if not event.contains(Session, 'do_orm_execute', _count_lazy_load):
+        event.listen(Session, 'do_orm_execute', _count_lazy_load)
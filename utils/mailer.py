@@ -0,0 +1,132 @@
+import os
+import threading
+from collections import namedtuple
+
+OutgoingEmail = namedtuple('OutgoingEmail', ['to_email', 'subject', 'body'])
+
+# Batas personalizations per request SendGrid v3
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+# Isi email per penerima disisipkan lewat substitution
+BODY_PLACEHOLDER = '-body-'
+
+
+class EmailTransportError(Exception):
+    """
+    Pengiriman gagal. retryable=False untuk error yang tidak akan berubah
+    jika diulang (mis. 400 alamat tidak valid, API key belum diset).
+    """
+
+    def __init__(self, message, retryable=True, status_code=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status_code = status_code
+
+
+class SendGridTransport:
+    """
+    SendGrid driver. Satu batch = satu request dengan satu personalization
+    per penerima; client dibuat sekali per proses.
+    """
+
+    def __init__(self, api_key, from_email):
+        self.api_key = api_key
+        self.from_email = from_email
+        self._client = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None or self._client_pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    from sendgrid import SendGridAPIClient
+                    self._client = SendGridAPIClient(self.api_key)
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def send(self, messages):
+        if not self.api_key or not self.from_email:
+            raise EmailTransportError("SENDGRID_API_KEY / SENDGRID_FROM_EMAIL belum diset", retryable=False)
+        if len(messages) > SENDGRID_MAX_PERSONALIZATIONS:
+            raise ValueError(f"Maksimal {SENDGRID_MAX_PERSONALIZATIONS} email per batch")
+
+        from sendgrid.helpers.mail import Mail, Personalization, Subject, Substitution, To
+
+        mail = Mail(from_email=self.from_email, plain_text_content=BODY_PLACEHOLDER)
+        for message in messages:
+            personalization = Personalization()
+            personalization.add_to(To(message.to_email))
+            personalization.subject = Subject(message.subject)
+            personalization.add_substitution(Substitution(BODY_PLACEHOLDER, message.body))
+            mail.add_personalization(personalization)
+
+        try:
+            response = self.client.send(mail)
+        except Exception as e:
+            status_code = getattr(e, 'status_code', None)
+            # 429 dan 5xx (atau error jaringan) boleh diulang, 4xx lain tidak
+            retryable = status_code is None or status_code == 429 or status_code >= 500
+            raise EmailTransportError(f"Gagal mengirim email: {e}", retryable=retryable, status_code=status_code)
+        return response.status_code
+
+
+class FakeTransport:
+    """Local transport for tests/development: email hanya dicatat di memori"""
+
+    def __init__(self):
+        self.sent = []
+        self.batches = 0
+        self.error = None  # isi dengan EmailTransportError untuk mensimulasikan kegagalan
+
+    def send(self, messages):
+        if self.error is not None:
+            raise self.error
+        self.sent.extend(messages)
+        self.batches += 1
+        return 202
+
+    def clear(self):
+        self.sent = []
+        self.batches = 0
+        self.error = None
+
+
+class Mailer:
+    """
+    Email transport extension configured from app.config:
+    - EMAIL_TRANSPORT: 'sendgrid' (default) atau 'fake'
+    - SENDGRID_API_KEY, SENDGRID_FROM_EMAIL untuk 'sendgrid'
+    - EMAIL_BATCH_SIZE, EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_BASE_SECONDS untuk outbox
+    """
+
+    def __init__(self, app=None):
+        self.transport = None
+        self.batch_size = SENDGRID_MAX_PERSONALIZATIONS
+        self.max_attempts = 5
+        self.retry_base_seconds = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, transport=None):
+        config = app.config
+        self.batch_size = min(config.get('EMAIL_BATCH_SIZE', SENDGRID_MAX_PERSONALIZATIONS), SENDGRID_MAX_PERSONALIZATIONS)
+        self.max_attempts = config.get('EMAIL_MAX_ATTEMPTS', 5)
+        self.retry_base_seconds = config.get('EMAIL_RETRY_BASE_SECONDS', 60)
+
+        if transport is not None:
+            self.transport = transport
+        elif config.get('EMAIL_TRANSPORT', 'sendgrid') == 'fake':
+            self.transport = FakeTransport()
+        else:
+            self.transport = SendGridTransport(config.get('SENDGRID_API_KEY'), config.get('SENDGRID_FROM_EMAIL'))
+
+        app.extensions['mailer'] = self
+
+    def send(self, messages):
+        """
+        Send a batch of OutgoingEmail in one call.
+        :raises EmailTransportError: seluruh batch gagal
+        """
+        return self.transport.send(list(messages))
@@ -0,0 +1,180 @@
+import bisect
+import threading
+import time
+
+# Batas bucket (detik), mengikuti default klien Prometheus
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram with optional per-label series,
+    e.g. latency per jenis scan atau per endpoint. Data per proses worker.
+    """
+
+    def __init__(self, name, description='', buckets=DEFAULT_BUCKETS, label_name=None):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.label_name = label_name
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label=None):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def time(self, label=None):
+        return _Timer(self, label)
+
+    def quantile(self, q, label=None):
+        """Estimate a quantile (0-1) by linear interpolation inside the bucket"""
+        with self._lock:
+            series = self._series.get(label)
+            if not series or not series['count']:
+                return None
+            counts = list(series['counts'])
+            total = series['count']
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for i, count in enumerate(counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if count and cumulative + count >= rank:
+                return lower + (upper - lower) * ((rank - cumulative) / count)
+            cumulative += count
+            lower = upper
+        return self.buckets[-1]
+
+    def labels(self):
+        with self._lock:
+            return list(self._series.keys())
+
+    def snapshot(self):
+        """Cumulative bucket counts per label, siap dijadikan JSON"""
+        with self._lock:
+            items = [(label, dict(series, counts=list(series['counts']))) for label, series in self._series.items()]
+        result = {}
+        for label, series in items:
+            cumulative = 0
+            buckets = []
+            for i, upper in enumerate(self.buckets):
+                cumulative += series['counts'][i]
+                buckets.append({'le': upper, 'count': cumulative})
+            buckets.append({'le': '+Inf', 'count': series['count']})
+            result[label if label is not None else 'all'] = {
+                'count': series['count'],
+                'sum': round(series['sum'], 6),
+                'buckets': buckets,
+                'p50': self.quantile(0.5, label),
+                'p95': self.quantile(0.95, label),
+                'p99': self.quantile(0.99, label),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def prometheus_lines(self):
+        """Exposition-format lines: _bucket/_sum/_count plus p50/p95/p99 per label"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        quantile_lines = []
+        for label, series in self.snapshot().items():
+            labels = {} if label == 'all' and self.label_name is None else {self.label_name or 'label': label}
+            for bucket in series['buckets']:
+                lines.append(f"{self.name}_bucket{_label_text(labels, le=bucket['le'])} {bucket['count']}")
+            lines.append(f"{self.name}_sum{_label_text(labels)} {series['sum']}")
+            lines.append(f"{self.name}_count{_label_text(labels)} {series['count']}")
+            for q in ('p50', 'p95', 'p99'):
+                if series[q] is not None:
+                    quantile_lines.append(
+                        f"{self.name}_quantile{_label_text(labels, quantile='0.' + q[1:])} {round(series[q], 6)}"
+                    )
+        if quantile_lines:
+            # Estimasi dari bucket, untuk dashboard tanpa histogram_quantile()
+            lines += [f"# TYPE {self.name}_quantile gauge"] + quantile_lines
+        return lines
+
+
+class Counter:
+    """Thread-safe counter with optional per-label values"""
+
+    def __init__(self, name, description='', label_name=None):
+        self.name = name
+        self.description = description
+        self.label_name = label_name
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label=None, amount=1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def value(self, label=None):
+        with self._lock:
+            return self._values.get(label, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return {label if label is not None else 'all': value for label, value in self._values.items()}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def prometheus_lines(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for label, value in items:
+            labels = {self.label_name or 'label': label} if label is not None else {}
+            lines.append(f"{self.name}{_label_text(labels)} {value}")
+        return lines
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels, **extra):
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in pairs.items()) + '}'
+
+
+def render_prometheus(metrics):
+    """Prometheus text exposition (format 0.0.4) for Histogram/Counter objects"""
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.prometheus_lines())
+    return '\n'.join(lines) + '\n'
+
+
+class _Timer:
+    def __init__(self, histogram, label):
+        self.histogram = histogram
+        self.label = label
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._start, self.label)
+        return False
+
+
+# Latency endpoint scan QR guru, label = jenis QR (student/school/invalid)
+scan_latency = Histogram(
+    'hubsensi_scan_latency_seconds',
+    'Latency teacher.process_scan per jenis QR',
+    label_name='qr_type'
+)
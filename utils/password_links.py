@@ -0,0 +1,48 @@
+import hashlib
+from flask import current_app, has_request_context, url_for
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from extensions import db
+from models import User
+
+_SALT = 'set-password'
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=_SALT)
+
+
+def _fingerprint(user):
+    # Berubah setiap kali password di-set, jadi link hanya berlaku sekali
+    return hashlib.sha256((user.password_hash or '').encode('utf-8')).hexdigest()[:16]
+
+
+def password_link_token(user):
+    return _serializer().dumps({'uid': user.id, 'fp': _fingerprint(user)})
+
+
+def load_password_link(token):
+    """
+    :return: User pemilik link, atau None jika link rusak, kedaluwarsa
+             (PASSWORD_LINK_MAX_AGE) atau sudah dipakai
+    """
+    try:
+        data = _serializer().loads(token, max_age=current_app.config.get('PASSWORD_LINK_MAX_AGE', 72 * 3600))
+    except BadSignature:
+        return None
+    user = db.session.get(User, data['uid']) if data.get('uid') else None
+    if user is None or not user.is_active or data.get('fp') != _fingerprint(user):
+        return None
+    return user
+
+
+def password_link_url(user, base_url=None):
+    """
+    One-time set-password link untuk email akun, pengganti password di isi email.
+    Di worker (tanpa request) URL dibangun dari base_url / APP_BASE_URL.
+    User harus sudah punya id dan password_hash (sudah flush).
+    """
+    token = password_link_token(user)
+    if has_request_context() and base_url is None:
+        return url_for('auth.set_password', token=token, _external=True)
+    with current_app.test_request_context(base_url=base_url or current_app.config['APP_BASE_URL']):
+        return url_for('auth.set_password', token=token, _external=True)
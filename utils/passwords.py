@@ -0,0 +1,50 @@
+import secrets
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+# Default Werkzeug (pbkdf2:sha256:600000)
+DEFAULT_HASH_METHOD = 'pbkdf2'
+
+# Awalan hash yang tidak pernah cocok dengan password apa pun (tanpa '$',
+# check_password_hash selalu False)
+UNUSABLE_PASSWORD_PREFIX = '!'
+
+
+def hash_method():
+    """PASSWORD_HASH_METHOD dari config, mis. 'pbkdf2', 'pbkdf2:sha256:260000', 'scrypt'"""
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    return DEFAULT_HASH_METHOD
+
+
+def _normalized_method(method):
+    """Method lengkap seperti yang ditulis Werkzeug di awal hash"""
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if len(args) > 0 else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == 'scrypt':
+        n, r, p = (args + [2 ** 15, 8, 1][len(args):])[:3]
+        return f"scrypt:{n}:{r}:{p}"
+    return method
+
+
+def hash_password(password, method=None):
+    return generate_password_hash(password, method=method or hash_method())
+
+
+def unusable_password_hash():
+    """
+    Marker for accounts that must set their password through a set-password link.
+    Acak per user agar fingerprint link (utils.password_links) tetap unik;
+    tidak ada hashing, jadi murah untuk import massal.
+    """
+    return UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(16)
+
+
+def needs_rehash(password_hash, method=None):
+    """True jika hash dibuat dengan method lain dari PASSWORD_HASH_METHOD"""
+    if not password_hash or '$' not in password_hash:
+        return True
+    return password_hash.split('$', 1)[0] != _normalized_method(method or hash_method())
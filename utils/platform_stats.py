@@ -0,0 +1,169 @@
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import case, func, or_, tuple_
+from extensions import cache, db
+from models import School, SchoolSubscription, Student, Teacher, User, UserRole, jakarta_now
+from utils.roster_search import _prefix_pattern, decode_cursor, encode_cursor
+
+SCHOOLS_PER_PAGE = 25
+MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun', 'Jul', 'Agu', 'Sep', 'Okt', 'Nov', 'Des']
+
+# Urutan tampilan bucket masa berlaku langganan
+EXPIRY_BUCKETS = [
+    ('expired', 'Kedaluwarsa / nonaktif'),
+    ('week', 'Habis ≤ 7 hari'),
+    ('month', 'Habis ≤ 30 hari'),
+    ('later', 'Habis > 30 hari'),
+    ('none', 'Tanpa langganan'),
+]
+
+_GENERATION_KEY = 'platform:generation'
+
+
+def _ttl():
+    return current_app.config.get('PLATFORM_STATS_TTL', 60)
+
+
+def _key(*parts):
+    # Generation ikut di key, jadi invalidasi cukup satu incr
+    generation = cache.get_counter(_GENERATION_KEY)
+    return ':'.join(['platform', str(generation)] + [str(part) for part in parts])
+
+
+def invalidate_platform_stats():
+    """Dipanggil setelah sekolah/admin ditambah, diubah, dihapus atau di-toggle"""
+    cache.incr(_GENERATION_KEY)
+
+
+def _school_query():
+    """School columns plus subscription, tanpa memuat objek School/relationship"""
+    return db.session.query(
+        School.id, School.name, School.code, School.address, School.is_active, School.created_at,
+        SchoolSubscription.plan, SchoolSubscription.end_date
+    ).outerjoin(SchoolSubscription, SchoolSubscription.school_id == School.id)
+
+
+def _school_rows(schools):
+    """
+    School rows (hasil _school_query) as dicts with admin username and
+    teacher/student counts, dihitung dengan GROUP BY untuk semua sekolah sekaligus.
+    """
+    school_ids = [school.id for school in schools]
+    if not school_ids:
+        return []
+
+    teacher_counts = dict(db.session.query(Teacher.school_id, func.count(Teacher.id))
+                          .filter(Teacher.school_id.in_(school_ids))
+                          .group_by(Teacher.school_id).all())
+    student_counts = dict(db.session.query(Student.school_id, func.count(Student.id))
+                          .filter(Student.school_id.in_(school_ids))
+                          .group_by(Student.school_id).all())
+    admins = dict(db.session.query(User.school_id, func.min(User.username))
+                  .filter(User.school_id.in_(school_ids), User.role == UserRole.ADMIN)
+                  .group_by(User.school_id).all())
+
+    return [{
+        'id': school.id,
+        'name': school.name,
+        'code': school.code,
+        'address': school.address,
+        'is_active': school.is_active,
+        'created_at': school.created_at,
+        'plan': school.plan.value if school.plan else None,
+        'end_date': school.end_date,
+        'admin_username': admins.get(school.id),
+        'teacher_count': teacher_counts.get(school.id, 0),
+        'student_count': student_counts.get(school.id, 0),
+    } for school in schools]
+
+
+def _expiry_counts():
+    today = jakarta_now().date()
+    bucket = case(
+        (SchoolSubscription.id.is_(None), 'none'),
+        (or_(SchoolSubscription.is_active.is_(False), SchoolSubscription.end_date < today), 'expired'),
+        (SchoolSubscription.end_date <= today + timedelta(days=7), 'week'),
+        (SchoolSubscription.end_date <= today + timedelta(days=30), 'month'),
+        else_='later'
+    ).label('bucket')
+    counts = dict(db.session.query(bucket, func.count(School.id))
+                  .outerjoin(SchoolSubscription, SchoolSubscription.school_id == School.id)
+                  .group_by(bucket).all())
+    return [{'key': key, 'label': label, 'count': counts.get(key, 0)} for key, label in EXPIRY_BUCKETS]
+
+
+def platform_overview():
+    """
+    Angka dashboard superadmin dari query agregat (tanpa memuat semua sekolah),
+    di-cache PLATFORM_STATS_TTL detik.
+    :return: dict total/active/inactive, admin_count, month_counts, expiry, recent_schools
+    """
+    def load():
+        status_counts = dict(db.session.query(School.is_active, func.count(School.id))
+                             .group_by(School.is_active).all())
+        active = status_counts.get(True, 0)
+        # Semua yang tidak aktif, termasuk is_active NULL
+        inactive = sum(count for is_active, count in status_counts.items() if not is_active)
+
+        month = func.extract('month', School.created_at)
+        month_counts = [0] * 12
+        for month_number, count in db.session.query(month, func.count(School.id)).group_by(month).all():
+            if month_number:
+                month_counts[int(month_number) - 1] = count
+
+        admin_count = db.session.query(func.count(User.id)).filter(User.role == UserRole.ADMIN).scalar()
+
+        return {
+            'total': active + inactive,
+            'active': active,
+            'inactive': inactive,
+            'admin_count': admin_count,
+            'month_counts': month_counts,
+            'expiry': _expiry_counts(),
+            'recent_schools': _school_rows(
+                _school_query().order_by(School.created_at.desc(), School.id.desc()).limit(5).all()
+            ),
+        }
+
+    return cache.get_or_set(_key('overview'), load, _ttl())
+
+
+def school_page(q=None, status=None, after=None, per_page=SCHOOLS_PER_PAGE):
+    """
+    One page of the school list by name/code prefix and status, keyset-paginated
+    on (lower(name), id), di-cache singkat per filter.
+    :param status: 'active', 'inactive' atau None
+    :return: (list dict sekolah, cursor halaman berikutnya atau None)
+    """
+    q = (q or '').strip()
+    per_page = max(1, min(per_page or SCHOOLS_PER_PAGE, 100))
+
+    def load():
+        sort_key = func.lower(School.name)
+        # Cursor dari lower() database, bukan str.lower(): lower() SQLite hanya melipat ASCII
+        query = _school_query().add_columns(sort_key.label('sort_key'))
+        if q:
+            pattern = _prefix_pattern(q)
+            query = query.filter(or_(
+                sort_key.like(pattern, escape='\\'),
+                func.lower(School.code).like(pattern, escape='\\')
+            ))
+        if status == 'active':
+            query = query.filter(School.is_active.is_(True))
+        elif status == 'inactive':
+            query = query.filter(or_(School.is_active.is_(False), School.is_active.is_(None)))
+
+        position = decode_cursor(after)
+        if position is not None:
+            query = query.filter(tuple_(sort_key, School.id) > tuple_(*position))
+
+        schools = query.order_by(sort_key, School.id).limit(per_page + 1).all()
+        next_cursor = None
+        if len(schools) > per_page:
+            schools = schools[:per_page]
+            next_cursor = encode_cursor(schools[-1].sort_key, schools[-1].id)
+        rows = _school_rows(schools)
+        return {'schools': rows, 'next_cursor': next_cursor}
+
+    page = cache.get_or_set(_key('schools', q, status or '', after or '', per_page), load, _ttl())
+    return page['schools'], page['next_cursor']
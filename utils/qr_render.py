@@ -0,0 +1,69 @@
+import hashlib
+import io
+import qrcode
+import qrcode.image.svg
+from extensions import storage
+from utils.cache import LRUCache
+
+# Naikkan jika parameter render berubah agar ETag lama tidak dipakai lagi
+QR_RENDER_VERSION = 1
+QR_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Gambar QR yang sudah dirender (PNG ~1 KB), key (format, isi QR)
+qr_image_cache = LRUCache(max_entries=4096)
+
+
+def render_qr_png(qr_data):
+    """Render one QR code to PNG bytes (tanpa cache; lihat qr_image)"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4
+    )
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    output = io.BytesIO()
+    img.save(output, format='PNG')
+    return output.getvalue()
+
+
+def render_qr_svg(qr_data):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+        image_factory=qrcode.image.svg.SvgPathImage
+    )
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+
+    output = io.BytesIO()
+    qr.make_image().save(output)
+    return output.getvalue()
+
+
+def qr_image(qr_data, fmt='png'):
+    """Rendered QR bytes from the in-process LRU cache"""
+    render = render_qr_svg if fmt == 'svg' else render_qr_png
+    return qr_image_cache.get_or_set((fmt, qr_data), lambda: render(qr_data))
+
+
+def qr_etag(qr_data, fmt='png'):
+    """Strong ETag dihitung dari isi QR saja, jadi 304 bisa dijawab tanpa render"""
+    return hashlib.sha1(f"{QR_RENDER_VERSION}:{fmt}:{qr_data}".encode('utf-8')).hexdigest()
+
+
+def student_qr_data(nis, school_id):
+    return f"STUDENT:{nis}:{school_id}"
+
+
+def school_qr_data(school_id):
+    return f"SCHOOL:{school_id}"
+
+
+def delete_qr(url):
+    return storage.delete_url(url)
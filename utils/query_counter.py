@@ -0,0 +1,43 @@
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """
+    Count SQL statements executed on an engine while the block runs.
+
+        with QueryCounter(db.engine) as counter:
+            client.get('/admin/dashboard')
+        counter.assert_at_most(15)
+
+    Bisa dipakai langsung sebagai fixture pytest (yield di dalam with).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        return False
+
+    def assert_at_most(self, budget, label=''):
+        """:raises QueryBudgetExceeded: berisi daftar query agar N+1 mudah dilihat"""
+        if self.count > budget:
+            listing = '\n'.join(f"  {i}. {' '.join(sql.split())[:200]}" for i, sql in enumerate(self.statements, 1))
+            raise QueryBudgetExceeded(f"{label or 'Blok'}: {self.count} query (batas {budget})\n{listing}")
@@ -0,0 +1,93 @@
+import csv
+import io
+import tempfile
+import xlsxwriter
+from flask import Response, send_file, stream_with_context
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Lebar kolom maksimal (karakter), sama seperti ekspor lama
+MAX_COLUMN_WIDTH = 50
+
+
+def csv_response(headers, rows, filename):
+    """
+    Stream rows as CSV; baris ditulis ke response satu per satu sehingga
+    memori konstan berapa pun jumlah datanya.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM supaya Excel membaca UTF-8 dengan benar
+        buffer.write('\ufeff')
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+def write_xlsx(sheets):
+    """
+    Write worksheets with xlsxwriter constant_memory mode into a temp file.
+    :param sheets: iterable of (sheet_name, headers, rows, options); options boleh None atau dict:
+        'column_widths' {index: lebar} untuk lebar tetap, 'freeze_panes' (row, col),
+        'cell_format' callable(row_index, col, value) -> dict format xlsxwriter atau None
+    :return: file object (sudah di-seek ke awal), dihapus otomatis saat ditutup
+    """
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#D9E1F2', 'border': 1})
+    formats = {}
+
+    for sheet_name, headers, rows, options in sheets:
+        options = options or {}
+        worksheet = workbook.add_worksheet(sheet_name)
+        widths = [len(str(h)) for h in headers]
+        worksheet.write_row(0, 0, headers, header_format)
+
+        cell_format = options.get('cell_format')
+        row_index = 0
+        for row_index, row in enumerate(rows, start=1):
+            for col, value in enumerate(row):
+                fmt = None
+                if cell_format:
+                    spec = cell_format(row_index, col, value)
+                    if spec:
+                        key = tuple(sorted(spec.items()))
+                        fmt = formats.get(key)
+                        if fmt is None:
+                            fmt = formats[key] = workbook.add_format(spec)
+                worksheet.write(row_index, col, value, fmt)
+                # Lebar kolom dari nilai maksimum berjalan, tanpa membaca ulang sel
+                length = len(str(value)) if value is not None else 0
+                if length > widths[col]:
+                    widths[col] = length
+
+        fixed_widths = options.get('column_widths') or {}
+        for col, width in enumerate(widths):
+            worksheet.set_column(col, col, fixed_widths.get(col, min(width + 2, MAX_COLUMN_WIDTH)))
+        if options.get('freeze_panes'):
+            worksheet.freeze_panes(*options['freeze_panes'])
+
+    workbook.close()
+    output.seek(0)
+    return output
+
+
+def xlsx_response(sheets, filename):
+    return send_file(
+        write_xlsx(sheets),
+        mimetype=XLSX_MIMETYPE,
+        as_attachment=True,
+        download_name=filename
+    )
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from extensions import db, cache
+from models import Student, Classroom, User
+
+RosterEntry = namedtuple(
+    'RosterEntry',
+    ['student_id', 'nis', 'full_name', 'classroom_id', 'classroom_name', 'is_active']
+)
+
+
+class RosterIndex:
+    """
+    Per-school in-memory index NIS -> RosterEntry for the scan path.
+
+    Dimuat saat scan pertama untuk sekolah tersebut. Invalidasi memakai
+    nomor generasi di cache (extensions.cache), sehingga dengan backend
+    Redis semua worker ikut memuat ulang setelah data siswa berubah.
+
+    Dengan backend memory, invalidasi hanya terlihat di proses ini; worker
+    gunicorn lain baru tahu setelah ROSTER_INDEX_TTL. Karena itu setiap hit
+    dicek ulang ke baris siswanya (satu query per request atau per batch
+    sinkronisasi): siswa yang dihapus, pindah kelas atau dinonaktifkan tidak
+    pernah dipakai dari roster lama.
+    """
+
+    def __init__(self):
+        self._rosters = {}  # school_id -> (generation, loaded_at, {nis: RosterEntry})
+        self._lock = threading.Lock()
+
+    def _generation(self, school_id):
+        return cache.get_counter(f"roster:{school_id}:generation")
+
+    def _load(self, school_id):
+        rows = db.session.query(
+            Student.id, Student.nis, Student.full_name, Student.classroom_id,
+            Classroom.name, User.is_active
+        ).outerjoin(Classroom, Classroom.id == Student.classroom_id)\
+         .outerjoin(User, User.id == Student.user_id)\
+         .filter(Student.school_id == school_id).all()
+
+        return {
+            row[1]: RosterEntry(
+                student_id=row[0],
+                nis=row[1],
+                full_name=row[2],
+                classroom_id=row[3],
+                classroom_name=row[4],
+                is_active=bool(row[5])
+            )
+            for row in rows
+        }
+
+    def _roster(self, school_id, force_reload=False):
+        generation = self._generation(school_id)
+        ttl = current_app.config.get('ROSTER_INDEX_TTL', 600)
+        with self._lock:
+            cached = self._rosters.get(school_id)
+        if (cached and not force_reload and cached[0] == generation
+                and time.monotonic() - cached[1] < ttl):
+            return cached
+
+        entries = self._load(school_id)
+        cached = (generation, time.monotonic(), entries)
+        with self._lock:
+            self._rosters[school_id] = cached
+        return cached
+
+    def lookup(self, school_id, nis):
+        """
+        Find a student by NIS in the school's roster.
+        NIS yang tidak ditemukan memicu satu kali muat ulang jika roster sudah
+        lebih tua dari ROSTER_MISS_RELOAD_SECONDS (siswa baru dari worker lain).
+        """
+        return self.lookup_many(school_id, [nis]).get(nis)
+
+    def lookup_many(self, school_id, nis_values):
+        """
+        Batch variant of lookup for sync batches: cek ulang semua hit dalam satu query.
+        :return: dict nis -> RosterEntry (NIS yang tidak ditemukan tidak ada di dict)
+        """
+        nis_values = set(nis_values)
+        _, loaded_at, entries = self._roster(school_id)
+        found = {nis: entries[nis] for nis in nis_values if nis in entries}
+        if found and not cache.shared:
+            found = self._verify(school_id, found)
+        missing = nis_values - found.keys()
+        if missing:
+            min_age = current_app.config.get('ROSTER_MISS_RELOAD_SECONDS', 30)
+            if time.monotonic() - loaded_at >= min_age:
+                _, _, entries = self._roster(school_id, force_reload=True)
+                found.update((nis, entries[nis]) for nis in missing if nis in entries)
+        return found
+
+    def _verify(self, school_id, found):
+        """Current classroom/is_active of roster hits; siswa yang sudah tidak ada dibuang"""
+        by_id = {entry.student_id: entry for entry in found.values()}
+        rows = db.session.query(
+            Student.id, Student.nis, Student.full_name, Student.classroom_id, Classroom.name, User.is_active
+        ).outerjoin(Classroom, Classroom.id == Student.classroom_id)\
+         .outerjoin(User, User.id == Student.user_id)\
+         .filter(Student.id.in_(list(by_id)), Student.school_id == school_id).all()
+        verified = {}
+        for row in rows:
+            entry = by_id[row[0]]
+            if row[1] == entry.nis:
+                verified[entry.nis] = entry._replace(full_name=row[2], classroom_id=row[3],
+                                                     classroom_name=row[4], is_active=bool(row[5]))
+        return verified
+
+    def invalidate(self, school_id):
+        """Dipanggil setelah siswa ditambah/diubah/dihapus/diimpor"""
+        with self._lock:
+            self._rosters.pop(school_id, None)
+        cache.incr(f"roster:{school_id}:generation")
+
+    def clear(self):
+        with self._lock:
+            self._rosters.clear()
+
+
+roster_index = RosterIndex()
+
+
+def _collect_roster_changes(session, flush_context, instances):
+    """
+    Catat sekolah yang roster-nya berubah lewat ORM (siswa ditambah/diubah/dihapus,
+    nama kelas, User.is_active); invalidasi dijalankan setelah commit.
+    Import massal (Core insert) tetap memanggil roster_index.invalidate sendiri.
+    """
+    changed = session.info.setdefault('roster_changed', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Student):
+            changed.add(obj.school_id)
+        elif isinstance(obj, Classroom) and inspect(obj).attrs.name.history.has_changes():
+            changed.add(obj.school_id)
+        elif isinstance(obj, User) and obj.school_id and inspect(obj).attrs.is_active.history.has_changes():
+            changed.add(obj.school_id)
+
+
+def _invalidate_after_commit(session):
+    for school_id in session.info.pop('roster_changed', ()):
+        if school_id is not None:
+            roster_index.invalidate(school_id)
+
+
+def _discard_after_rollback(session):
+    session.info.pop('roster_changed', None)
+
+
+def init_roster_index(app):
+    # Listener di kelas Session berlaku untuk session Flask-SQLAlchemy
+    for name, listener in (('before_flush', _collect_roster_changes),
+                           ('after_commit', _invalidate_after_commit),
+                           ('after_rollback', _discard_after_rollback)):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
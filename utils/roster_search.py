@@ -0,0 +1,131 @@
+import base64
+import json
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.orm import joinedload
+from models import Student, Teacher
+
+ROSTER_PER_PAGE = 25
+MAX_PER_PAGE = 100
+
+
+def encode_cursor(sort_key, row_id):
+    raw = json.dumps([sort_key, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """:return: (lower(full_name), id) atau None jika cursor kosong/rusak"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_key, row_id = json.loads(raw)
+        return str(sort_key), int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _prefix_pattern(q):
+    """
+    LIKE pattern awalan, huruf besar/kecil dipertahankan. Kolom nama dicocokkan
+    dengan _prefix_pattern(q.lower()) terhadap lower(full_name); NIS/NISN/NIP
+    memakai q apa adanya agar index varchar_pattern_ops di Postgres tetap terpakai.
+    """
+    escaped = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+
+def _keyset_page(query, model, after, per_page):
+    """
+    Order by (lower(full_name), id) and continue after the cursor; memakai
+    index ix_<tabel>_school_name_lower sehingga halaman jauh tidak perlu OFFSET.
+    :return: (items, cursor halaman berikutnya atau None)
+    """
+    per_page = max(1, min(per_page or ROSTER_PER_PAGE, MAX_PER_PAGE))
+    sort_key = func.lower(model.full_name)
+
+    position = decode_cursor(after)
+    if position is not None:
+        query = query.filter(tuple_(sort_key, model.id) > tuple_(*position))
+
+    # Cursor dari lower() database, bukan str.lower(): lower() SQLite hanya melipat ASCII
+    rows = query.add_columns(sort_key).order_by(sort_key, model.id).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last, last_key = rows[-1]
+        next_cursor = encode_cursor(last_key, last.id)
+    return [item for item, _ in rows], next_cursor
+
+
+def search_students(school_id, q=None, classroom_id=None, after=None, per_page=ROSTER_PER_PAGE):
+    """
+    Students of a school by name/NIS/NISN prefix and classroom, keyset-paginated,
+    dengan classroom dan user di-load sekaligus (tanpa query per baris).
+    :param classroom_id: id kelas, atau 0 untuk siswa tanpa kelas
+    """
+    query = Student.query.options(
+        joinedload(Student.classroom),
+        joinedload(Student.user)
+    ).filter(Student.school_id == school_id)
+
+    q = (q or '').strip()
+    if q:
+        name_pattern, id_pattern = _prefix_pattern(q.lower()), _prefix_pattern(q)
+        query = query.filter(or_(
+            func.lower(Student.full_name).like(name_pattern, escape='\\'),
+            Student.nis.like(id_pattern, escape='\\'),
+            Student.nisn.like(id_pattern, escape='\\')
+        ))
+
+    if classroom_id == 0:
+        query = query.filter(Student.classroom_id.is_(None))
+    elif classroom_id:
+        query = query.filter(Student.classroom_id == classroom_id)
+
+    return _keyset_page(query, Student, after, per_page)
+
+
+def search_teachers(school_id, q=None, is_homeroom=None, after=None, per_page=ROSTER_PER_PAGE):
+    """Teachers of a school by name/NIP prefix, keyset-paginated, user di-load sekaligus"""
+    query = Teacher.query.options(
+        joinedload(Teacher.user),
+        joinedload(Teacher.homeroom_class)
+    ).filter(Teacher.school_id == school_id)
+
+    q = (q or '').strip()
+    if q:
+        name_pattern, id_pattern = _prefix_pattern(q.lower()), _prefix_pattern(q)
+        query = query.filter(or_(
+            func.lower(Teacher.full_name).like(name_pattern, escape='\\'),
+            Teacher.nip.like(id_pattern, escape='\\')
+        ))
+
+    if is_homeroom is not None:
+        query = query.filter(Teacher.is_homeroom.is_(bool(is_homeroom)))
+
+    return _keyset_page(query, Teacher, after, per_page)
+
+
+def student_to_dict(student):
+    return {
+        'id': student.id,
+        'nis': student.nis,
+        'nisn': student.nisn,
+        'full_name': student.full_name,
+        'email': student.user.email if student.user else None,
+        'classroom': {'id': student.classroom.id, 'name': student.classroom.name} if student.classroom else None,
+        'created_at': student.created_at.isoformat() if student.created_at else None
+    }
+
+
+def teacher_to_dict(teacher):
+    return {
+        'id': teacher.id,
+        'nip': teacher.nip,
+        'full_name': teacher.full_name,
+        'email': teacher.user.email if teacher.user else None,
+        'is_homeroom': bool(teacher.is_homeroom),
+        'homeroom_class': teacher.homeroom_class.name if teacher.homeroom_class else None,
+        'created_at': teacher.created_at.isoformat() if teacher.created_at else None
+    }
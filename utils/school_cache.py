@@ -0,0 +1,70 @@
+from flask import current_app
+from extensions import cache
+from models import School, SchoolSubscription, jakarta_now
+
+
+def _branding_key(school_id):
+    return f"school:{school_id}:branding"
+
+
+def _subscription_key(school_id):
+    return f"school:{school_id}:subscription"
+
+
+def _ttl():
+    return current_app.config.get('SCHOOL_CACHE_TTL', 300)
+
+
+def get_school_branding(school_id):
+    """
+    Branding fields of a school (nama, warna, logo), cached per school_id.
+    :return: dict atau None jika sekolah tidak ada
+    """
+    def load():
+        school = School.query.with_entities(
+            School.id, School.name, School.brand_name, School.primary_color,
+            School.secondary_color, School.logo_url, School.is_active
+        ).filter(School.id == school_id).first()
+        if not school:
+            return None
+        return {
+            'id': school.id,
+            'name': school.name,
+            'brand_name': school.brand_name or school.name,
+            'primary_color': school.primary_color or '#0d6efd',
+            'secondary_color': school.secondary_color or '#6c757d',
+            'logo_url': school.logo_url,
+            'is_active': school.is_active
+        }
+
+    return cache.get_or_set(_branding_key(school_id), load, _ttl())
+
+
+def get_subscription_status(school_id):
+    """
+    Cached subscription status of a school.
+    :return: dict {'has_subscription', 'is_active', 'end_date'}
+    """
+    def load():
+        subscription = SchoolSubscription.query.with_entities(
+            SchoolSubscription.is_active, SchoolSubscription.end_date
+        ).filter(SchoolSubscription.school_id == school_id).first()
+        if not subscription:
+            return {'has_subscription': False, 'is_active': False, 'end_date': None}
+        return {
+            'has_subscription': True,
+            'is_active': subscription.is_active,
+            'end_date': subscription.end_date
+        }
+
+    return cache.get_or_set(_subscription_key(school_id), load, _ttl())
+
+
+def subscription_is_valid(status):
+    """Same rule as SchoolSubscription.is_valid(), evaluated on the cached status"""
+    return bool(status['is_active']) and jakarta_now().date() <= status['end_date']
+
+
+def invalidate_school(school_id):
+    """Dipanggil setelah commit yang mengubah data sekolah atau langganannya"""
+    cache.delete(_branding_key(school_id), _subscription_key(school_id))
@@ -0,0 +1,316 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+
+class StorageError(Exception):
+    pass
+
+
+class S3Storage:
+    """
+    S3 driver. Satu client boto3 per proses (thread-safe, dengan pool koneksi
+    dan retry botocore), dibuat ulang setelah fork.
+    """
+
+    def __init__(self, bucket, region=None, access_key=None, secret_key=None,
+                 endpoint_url=None, public_url=None, max_pool_connections=32, max_attempts=5):
+        self.bucket = bucket
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.endpoint_url = endpoint_url
+        self.public_url = (public_url or f"https://{bucket}.s3.{region}.amazonaws.com").rstrip('/')
+        self.max_pool_connections = max_pool_connections
+        self.max_attempts = max_attempts
+        self._client = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None or self._client_pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    import boto3
+                    from botocore.config import Config as BotoConfig
+                    self._client = boto3.client(
+                        "s3",
+                        aws_access_key_id=self.access_key,
+                        aws_secret_access_key=self.secret_key,
+                        region_name=self.region,
+                        endpoint_url=self.endpoint_url,
+                        config=BotoConfig(
+                            max_pool_connections=self.max_pool_connections,
+                            retries={'max_attempts': self.max_attempts, 'mode': 'standard'}
+                        )
+                    )
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def reset(self):
+        """Buang client bersama (mis. setelah memulai mock moto)"""
+        with self._lock:
+            self._client = None
+            self._client_pid = None
+
+    def put(self, key, data, content_type='application/octet-stream'):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+        return self.url(key)
+
+    def put_stream(self, key, file_obj, content_type='application/octet-stream'):
+        # upload_fileobj memecah file besar menjadi multipart upload
+        self.client.upload_fileobj(file_obj, self.bucket, key, ExtraArgs={'ContentType': content_type})
+        return self.url(key)
+
+    def get(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def open(self, key):
+        """Streaming body (file-like) atau None"""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        # delete_objects maksimal 1000 key per request
+        for i in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[i:i + 1000]], 'Quiet': True}
+            )
+
+    def url(self, key):
+        return f"{self.public_url}/{key}"
+
+    def key_from_url(self, url):
+        if not url:
+            return None
+        if url.startswith(self.public_url + '/'):
+            return url[len(self.public_url) + 1:]
+        # URL S3 lain untuk bucket yang sama (mis. gaya path / region berbeda)
+        parsed = urlparse(url)
+        if parsed.netloc.startswith(f"{self.bucket}.s3"):
+            return parsed.path.lstrip('/')
+        return None
+
+
+class LocalStorage:
+    """Local-disk driver: file di bawah root, disajikan dari base_url (mis. /static/uploads)"""
+
+    def __init__(self, root, base_url):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, *key.split('/')))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Key tidak valid: {key}")
+        return path
+
+    def _write(self, key, write):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+        return self.url(key)
+
+    def put(self, key, data, content_type=None):
+        return self._write(key, lambda f: f.write(data))
+
+    def put_stream(self, key, file_obj, content_type=None):
+        return self._write(key, lambda f: shutil.copyfileobj(file_obj, f))
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def open(self, key):
+        try:
+            return open(self._path(key), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    def key_from_url(self, url):
+        if url and url.startswith(self.base_url + '/'):
+            return url[len(self.base_url) + 1:]
+        return None
+
+
+class Storage:
+    """
+    Object storage extension configured from app.config:
+    - STORAGE_BACKEND: 's3' (default) atau 'local'
+    - S3_BUCKET_NAME, AWS_REGION, S3_ENDPOINT_URL, S3_PUBLIC_URL, ... untuk 's3'
+    - STORAGE_LOCAL_ROOT, STORAGE_LOCAL_URL untuk 'local'
+
+    File private (hasil job berisi data siswa) disimpan terpisah dan hanya
+    dibaca lewat *_private(), tidak pernah lewat URL publik:
+    - 'local': di bawah STORAGE_PRIVATE_ROOT (di luar static/)
+    - 's3': di S3_PRIVATE_BUCKET_NAME, atau di bucket utama dengan prefix
+      private/ (policy public-read bucket tidak boleh mencakup private/*)
+    """
+
+    PRIVATE_PREFIX = 'private/'
+
+    def __init__(self, app=None):
+        self.driver = None
+        self.private = None
+        self.private_prefix = ''
+        self.upload_threads = 16
+        self.upload_attempts = 3
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, driver=None, private_driver=None):
+        config = app.config
+        self.upload_threads = config.get('STORAGE_UPLOAD_THREADS', 16)
+        self.upload_attempts = config.get('STORAGE_UPLOAD_ATTEMPTS', 3)
+        self.private_prefix = ''
+
+        if driver is not None:
+            self.driver = driver
+            self.private = private_driver or driver
+            if private_driver is None:
+                self.private_prefix = self.PRIVATE_PREFIX
+        elif config.get('STORAGE_BACKEND', 's3') == 'local':
+            self.driver = LocalStorage(config['STORAGE_LOCAL_ROOT'], config.get('STORAGE_LOCAL_URL', '/static/uploads'))
+            self.private = LocalStorage(config['STORAGE_PRIVATE_ROOT'], '')
+        else:
+            self.driver = self._s3_driver(config, config.get('S3_BUCKET_NAME'))
+            private_bucket = config.get('S3_PRIVATE_BUCKET_NAME')
+            self.private = self._s3_driver(config, private_bucket) if private_bucket else self.driver
+            if not private_bucket:
+                self.private_prefix = self.PRIVATE_PREFIX
+
+        app.extensions['storage'] = self
+
+    @staticmethod
+    def _s3_driver(config, bucket):
+        return S3Storage(
+            bucket=bucket,
+            region=config.get('AWS_REGION'),
+            access_key=config.get('AWS_ACCESS_KEY_ID'),
+            secret_key=config.get('AWS_SECRET_ACCESS_KEY'),
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            public_url=config.get('S3_PUBLIC_URL'),
+            max_pool_connections=config.get('S3_MAX_POOL_CONNECTIONS', 32),
+            max_attempts=config.get('S3_MAX_ATTEMPTS', 5)
+        )
+
+    def _put_with_retry(self, key, data, content_type):
+        for attempt in range(1, self.upload_attempts + 1):
+            try:
+                return self.driver.put(key, data, content_type)
+            except Exception:
+                if attempt == self.upload_attempts:
+                    raise
+                time.sleep(0.2 * 2 ** (attempt - 1))
+
+    def put(self, key, data, content_type='application/octet-stream'):
+        return self._put_with_retry(key, data, content_type)
+
+    def put_stream(self, key, file_obj, content_type='application/octet-stream'):
+        return self.driver.put_stream(key, file_obj, content_type)
+
+    def put_many(self, items, content_type='application/octet-stream'):
+        """
+        Upload many objects concurrently (thread pool, satu client bersama),
+        dengan retry per objek.
+        :param items: iterable (key, data)
+        :return: (urls {key: url}, errors {key: pesan error})
+        """
+        urls, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=self.upload_threads) as pool:
+            futures = {
+                pool.submit(self._put_with_retry, key, data, content_type): key
+                for key, data in items
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    urls[key] = future.result()
+                except Exception as e:
+                    errors[key] = str(e)
+        return urls, errors
+
+    def get(self, key):
+        return self.driver.get(key)
+
+    def open(self, key):
+        return self.driver.open(key)
+
+    def delete(self, key):
+        try:
+            return self.driver.delete(key)
+        except Exception as e:
+            print(f"Gagal hapus file storage ({key}): {e}")
+            return False
+
+    def delete_many(self, keys):
+        try:
+            self.driver.delete_many(keys)
+        except Exception as e:
+            print(f"Gagal hapus file storage: {e}")
+
+    def put_private_stream(self, key, file_obj, content_type='application/octet-stream'):
+        """Upload a private file; tidak mengembalikan URL karena tidak boleh disajikan langsung"""
+        self.private.put_stream(self.private_prefix + key, file_obj, content_type)
+        return key
+
+    def open_private(self, key):
+        return self.private.open(self.private_prefix + key)
+
+    def delete_private(self, key):
+        try:
+            return self.private.delete(self.private_prefix + key)
+        except Exception as e:
+            print(f"Gagal hapus file storage ({key}): {e}")
+            return False
+
+    def url(self, key):
+        return self.driver.url(key)
+
+    def key_from_url(self, url):
+        return self.driver.key_from_url(url)
+
+    def read_url(self, url):
+        """Read one of our own files by its public URL without an HTTP round-trip"""
+        key = self.key_from_url(url)
+        return self.get(key) if key else None
+
+    def delete_url(self, url):
+        key = self.key_from_url(url)
+        return self.delete(key) if key else False
@@ -0,0 +1,209 @@
+import pandas as pd
+from extensions import db
+from models import Student, User, UserRole
+from utils.email_outbox import queue_email
+from utils.jobs import job_handler
+from utils.password_links import password_link_url
+from utils.passwords import unusable_password_hash
+from utils.roster_index import roster_index
+
+IMPORT_JOB_TYPE = 'import_students'
+REQUIRED_COLUMNS = ['nis', 'full_name', 'email']
+ROW_FIELDS = ['nis', 'full_name', 'email', 'nisn']
+
+# Commit + laporan progres setiap N baris
+IMPORT_CHECKPOINT_EVERY = 25
+
+# Batas nilai per klausa IN (...)
+IN_QUERY_CHUNK_SIZE = 1000
+
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+
+def read_import_file(file, school_id):
+    """
+    Parse the uploaded CSV/Excel into plain dicts for validation and the job payload.
+    :return: list dict row (nomor baris spreadsheet)/nis/full_name/email/nisn
+    :raises ValueError: jika kolom wajib tidak ada
+    """
+    # Semua sel dibaca sebagai teks, sel kosong menjadi '' (bukan NaN)
+    if file.filename.endswith('.csv'):
+        df = pd.read_csv(file, dtype=str, na_filter=False)
+    else:
+        df = pd.read_excel(file, dtype=str, na_filter=False)
+
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError('File harus memiliki kolom: nis, full_name, email')
+    if 'nisn' not in df.columns:
+        df['nisn'] = ''
+
+    df = df[ROW_FIELDS].apply(lambda column: column.str.strip())
+    default_email = 'student_' + df['nis'] + f'@school{school_id}.local'
+    df['email'] = df['email'].where(df['email'] != '', default_email)
+    df.insert(0, 'row', df.index + 2)  # baris 1 = header
+
+    rows = []
+    for record in df.to_dict('records'):
+        row = {key: (value if value != '' else None) for key, value in record.items()}
+        row['row'] = int(record['row'])
+        rows.append(row)
+    return rows
+
+
+def _existing_values(column, values, *criteria):
+    """Values of `column` already in the database, one IN query per chunk"""
+    values = list(values)
+    found = set()
+    for i in range(0, len(values), IN_QUERY_CHUNK_SIZE):
+        chunk = values[i:i + IN_QUERY_CHUNK_SIZE]
+        found.update(value for (value,) in db.session.query(column).filter(column.in_(chunk), *criteria))
+    return found
+
+
+def validate_rows(rows, school_id):
+    """
+    Validate all import rows at once with pandas masks plus one IN query each
+    against Student.nis, User.email and User.username.
+    :return: list pesan error (None jika baris valid), urut sesuai rows
+    """
+    if not rows:
+        return []
+
+    df = pd.DataFrame(rows, columns=ROW_FIELDS).fillna('')
+    nis = df['nis']
+    email = df['email']
+    username = 'student_' + nis
+
+    existing_nis = _existing_values(Student.nis, set(nis[nis != '']), Student.school_id == school_id)
+    existing_emails = _existing_values(User.email, set(email[email != '']))
+    existing_usernames = _existing_values(User.username, set(username[nis != '']))
+
+    checks = [
+        (nis == '', 'NIS wajib diisi'),
+        (df['full_name'] == '', 'Nama lengkap wajib diisi'),
+        (~email.str.match(EMAIL_PATTERN), 'Format email tidak valid'),
+        ((nis != '') & nis.duplicated(keep=False), 'NIS ganda di dalam file'),
+        ((email != '') & email.str.lower().duplicated(keep=False), 'Email ganda di dalam file'),
+        (nis.isin(existing_nis), 'NIS sudah terdaftar di sekolah'),
+        (email.isin(existing_emails), 'Email sudah digunakan'),
+        ((nis != '') & username.isin(existing_usernames), 'Username siswa sudah digunakan'),
+    ]
+
+    messages = [[] for _ in range(len(df))]
+    for mask, message in checks:
+        for position in mask.to_numpy().nonzero()[0]:
+            messages[position].append(message)
+    return ['; '.join(found) if found else None for found in messages]
+
+
+def split_valid_rows(rows, school_id):
+    """
+    :return: (baris valid, baris ditolak dengan kunci 'message')
+    """
+    valid, rejected = [], []
+    for row, message in zip(rows, validate_rows(rows, school_id)):
+        if message:
+            rejected.append({**row, 'message': message})
+        else:
+            valid.append(row)
+    return valid, rejected
+
+
+def error_report_rows(job):
+    """Rows for the downloadable error report: validation rejects then runtime errors"""
+    for item in (job.payload or {}).get('rejected', []):
+        yield [item.get('row'), item.get('nis'), item.get('full_name'), item.get('email'), item.get('message')]
+    for item in job.errors or []:
+        yield [item.get('row'), item.get('nis'), None, None, item.get('message')]
+
+
+def _create_student(school_id, classroom_id, row):
+    """
+    Akun baru belum punya password yang bisa dipakai login; siswa mengatur
+    password sendiri lewat link di email akun.
+    """
+    nis = row['nis']
+    user = User(
+        school_id=school_id,
+        username=f"student_{nis}",
+        email=row['email'],
+        role=UserRole.STUDENT,
+        password_hash=unusable_password_hash()
+    )
+    db.session.add(user)
+    db.session.flush()  # agar user.id tersedia
+
+    student = Student(
+        school_id=school_id,
+        user_id=user.id,
+        nis=nis,
+        nisn=row.get('nisn'),
+        full_name=row['full_name'],
+        classroom_id=classroom_id
+    )
+    db.session.add(student)
+    db.session.flush()
+    return student, user
+
+
+def _queue_account_email(school_id, student, user, login_url, base_url=None):
+    # Link set password sekali pakai; password acak akun tidak pernah dikirim
+    body = f"""
+Halo {student.full_name},
+
+Akun siswa Anda telah dibuat dengan username: {user.username}
+
+Atur password Anda melalui link berikut (sekali pakai):
+{password_link_url(user, base_url)}
+
+Setelah itu silakan login di {login_url}
+"""
+    queue_email(user.email, "Akun Siswa Baru", body, school_id=school_id)
+
+
+@job_handler(IMPORT_JOB_TYPE)
+def import_students_job(ctx, payload):
+    """
+    Create student accounts from payload['rows'] (baris yang lolos validasi).
+    Setiap baris berjalan di savepoint sendiri; baris gagal dicatat di
+    job.errors (nomor baris sesuai spreadsheet) tanpa membatalkan baris lain.
+    Email akun masuk outbox di savepoint yang sama dan dikirim oleh worker.
+    """
+    school_id = payload['school_id']
+    classroom_id = payload.get('classroom_id')
+    rows = payload.get('rows') or []
+    login_url = payload.get('login_url', '')
+    base_url = payload.get('base_url')
+
+    ctx.set_total(len(rows))
+
+    def checkpoint():
+        ctx.checkpoint()
+        roster_index.invalidate(school_id)
+
+    # Validasi ulang sekali untuk baris yang tersisa (data bisa berubah sejak
+    # pratinjau); job yang diulang melanjutkan dari baris terakhir yang di-commit
+    # QR siswa dirender on demand dari NIS (blueprint qr), tidak dibuat di sini
+    start = ctx.processed
+    remaining = list(zip(rows[start:], validate_rows(rows[start:], school_id)))
+
+    for i in range(0, len(remaining), IMPORT_CHECKPOINT_EVERY):
+        for row, problem in remaining[i:i + IMPORT_CHECKPOINT_EVERY]:
+            if problem:
+                ctx.add_error(row['row'], problem, nis=row.get('nis'))
+                ctx.advance(success=False)
+                continue
+            try:
+                with db.session.begin_nested():
+                    student, user = _create_student(school_id, classroom_id, row)
+                    _queue_account_email(school_id, student, user, login_url, base_url)
+            except Exception as e:
+                ctx.add_error(row['row'], f'Gagal membuat siswa: {e}', nis=row.get('nis'))
+                ctx.advance(success=False)
+            else:
+                ctx.advance()
+
+        checkpoint()
+
+    checkpoint()
+    return {'created': ctx.job.success_count or 0, 'failed': ctx.job.error_count or 0}
@@ -0,0 +1,66 @@
+# worker.py
+import sys
+import time
+from app import app
+from extensions import db
+from utils.email_outbox import deliver_outbox, purge_outbox
+from utils.jobs import claim_next_job, purge_jobs, run_job
+
+
+def main(burst=False):
+    """
+    Poll background_jobs and run them one at a time; di sela job, kirim
+    satu batch email_outbox.
+    --burst: proses sampai antrian kosong lalu berhenti.
+    """
+    interval = app.config.get('JOBS_POLL_INTERVAL', 2)
+    next_purge = 0
+    with app.app_context():
+        print("Worker background job berjalan...")
+        while True:
+            # Outbox dan job lama dibersihkan paling sering sekali per jam
+            if time.monotonic() >= next_purge:
+                try:
+                    purged = purge_outbox()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Gagal membersihkan email outbox: {e}")
+                else:
+                    if purged:
+                        print(f"Email outbox lama dihapus: {purged}")
+                try:
+                    purged = purge_jobs()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Gagal membersihkan background job: {e}")
+                else:
+                    if purged:
+                        print(f"Background job lama dihapus: {purged}")
+                next_purge = time.monotonic() + 3600
+
+            try:
+                emails = deliver_outbox()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Gagal memproses email outbox: {e}")
+                emails = 0
+            if emails:
+                print(f"Email outbox diproses: {emails}")
+
+            job_id = claim_next_job()
+            if job_id is None:
+                db.session.remove()
+                if emails:
+                    continue
+                if burst:
+                    break
+                time.sleep(interval)
+                continue
+
+            job = run_job(job_id)
+            print(f"Job {job_id} selesai: {job.status.value if job else 'hilang'}")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main(burst='--burst' in sys.argv)